@@ -10,7 +10,9 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+# Callers that have their own logging (init_db) turn this off.
+if config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
@@ -20,6 +22,8 @@ fileConfig(config.config_file_name)
 
 from app.models import SQLModel  # noqa
 from app.core.config import settings # noqa
+from app.plate_search import TRIGRAM_TABLE # noqa
+from app.search_index import FTS_TABLE # noqa
 
 target_metadata = SQLModel.metadata
 
@@ -29,6 +33,13 @@ target_metadata = SQLModel.metadata
 # ... etc.
 
 
+def include_name(name, type_, _parent_names):
+    # FTS5 tables and their shadow tables are managed by migrations
+    if type_ == "table":
+        return not name.startswith((TRIGRAM_TABLE, FTS_TABLE))
+    return True
+
+
 def get_url():
     return str(settings.SQLALCHEMY_DATABASE_URI)
 
@@ -47,7 +58,11 @@ def run_migrations_offline():
     """
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -71,7 +86,10 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
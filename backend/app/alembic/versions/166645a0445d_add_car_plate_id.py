@@ -0,0 +1,38 @@
+"""Add car.plate_id foreign key to licenseplate
+
+Revision ID: 166645a0445d
+Revises: ed88e483b930
+Create Date: 2026-10-19 15:41:27.118930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '166645a0445d'
+down_revision = 'ed88e483b930'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('car') as batch_op:
+        batch_op.add_column(sa.Column('plate_id', sa.Uuid(), nullable=True))
+        batch_op.create_index('ix_car_plate_id', ['plate_id'], unique=False)
+        batch_op.create_foreign_key(
+            'fk_car_plate_id_licenseplate', 'licenseplate', ['plate_id'], ['id'], ondelete='SET NULL'
+        )
+    # Link existing cars to their plates by plate number
+    op.execute(
+        "UPDATE car SET plate_id = ("
+        "SELECT id FROM licenseplate WHERE licenseplate.plate_number = car.plate_number)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('car') as batch_op:
+        batch_op.drop_constraint('fk_car_plate_id_licenseplate', type_='foreignkey')
+        batch_op.drop_index('ix_car_plate_id')
+        batch_op.drop_column('plate_id')
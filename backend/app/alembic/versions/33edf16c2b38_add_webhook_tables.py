@@ -0,0 +1,55 @@
+"""Add webhook tables
+
+Revision ID: 33edf16c2b38
+Revises: d375c3ec37b7
+Create Date: 2026-10-19 21:09:12.420326
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '33edf16c2b38'
+down_revision = 'd375c3ec37b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('webhook',
+    sa.Column('url', sqlmodel.sql.sqltypes.AutoString(length=2048), nullable=False),
+    sa.Column('events', sa.JSON(), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('secret', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('create_by', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('create_time', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('webhookdelivery',
+    sa.Column('event', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_time', sa.DateTime(), nullable=False),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('create_time', sa.DateTime(), nullable=False),
+    sa.Column('delivered_time', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('webhook_id', sa.Uuid(), nullable=False),
+    sa.ForeignKeyConstraint(['webhook_id'], ['webhook.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_webhookdelivery_status_next_attempt_time', 'webhookdelivery', ['status', 'next_attempt_time'], unique=False)
+    op.create_index(op.f('ix_webhookdelivery_webhook_id'), 'webhookdelivery', ['webhook_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_webhookdelivery_webhook_id'), table_name='webhookdelivery')
+    op.drop_index('ix_webhookdelivery_status_next_attempt_time', table_name='webhookdelivery')
+    op.drop_table('webhookdelivery')
+    op.drop_table('webhook')
@@ -0,0 +1,80 @@
+"""Add search index
+
+Revision ID: 3d2b11681caa
+Revises: 6d03925785e7
+Create Date: 2026-10-19 19:22:47.318260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3d2b11681caa'
+down_revision = '6d03925785e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('searchentry',
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+    sa.Column('ref_id', sa.Uuid(), nullable=False),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('subtitle', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_searchentry_key', 'searchentry', ['key'], unique=False)
+    op.create_index('ix_searchentry_entity_ref_id', 'searchentry', ['entity', 'ref_id'], unique=False)
+
+    # Entries are written by b68a2b03179e, once renters have every column
+    # search_index reads
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_searchentry_key_trgm',
+            'searchentry',
+            ['key'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'key': 'gin_trgm_ops'},
+        )
+        return
+
+    # External-content FTS5 table: it indexes searchentry.key by rowid
+    # without storing a second copy of the keys
+    op.execute(
+        "CREATE VIRTUAL TABLE searchentryfts USING fts5("
+        "key, content = 'searchentry', content_rowid = 'id', tokenize = 'trigram')"
+    )
+    op.execute("INSERT INTO searchentryfts (searchentryfts) VALUES ('rebuild')")
+    op.execute(
+        'CREATE TRIGGER searchentry_fts_insert AFTER INSERT ON searchentry BEGIN '
+        'INSERT INTO searchentryfts (rowid, key) VALUES (NEW.id, NEW.key); END'
+    )
+    op.execute(
+        'CREATE TRIGGER searchentry_fts_delete AFTER DELETE ON searchentry BEGIN '
+        "INSERT INTO searchentryfts (searchentryfts, rowid, key) VALUES ('delete', OLD.id, OLD.key); END"
+    )
+    op.execute(
+        'CREATE TRIGGER searchentry_fts_update AFTER UPDATE ON searchentry BEGIN '
+        "INSERT INTO searchentryfts (searchentryfts, rowid, key) VALUES ('delete', OLD.id, OLD.key); "
+        'INSERT INTO searchentryfts (rowid, key) VALUES (NEW.id, NEW.key); END'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_searchentry_key_trgm', table_name='searchentry')
+    else:
+        for action in ('insert', 'delete', 'update'):
+            op.execute(f'DROP TRIGGER IF EXISTS searchentry_fts_{action}')
+        op.execute('DROP TABLE IF EXISTS searchentryfts')
+    op.drop_index('ix_searchentry_entity_ref_id', table_name='searchentry')
+    op.drop_index('ix_searchentry_key', table_name='searchentry')
+    op.drop_table('searchentry')
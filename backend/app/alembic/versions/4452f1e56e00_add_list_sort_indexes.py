@@ -0,0 +1,39 @@
+"""Add (sort key, id) indexes for list endpoint ordering
+
+Revision ID: 4452f1e56e00
+Revises: c61bb811e257
+Create Date: 2026-10-19 16:58:02.271946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4452f1e56e00'
+down_revision = 'c61bb811e257'
+branch_labels = None
+depends_on = None
+
+
+# table -> sort keys, each indexed together with id
+SORT_KEYS = {
+    'renter': ['full_name', 'driver_license_number'],
+    'licenseplate': ['purchase_date', 'purchase_amount'],
+    'car': ['create_time', 'year', 'model', 'price'],
+    'carrental': ['start_date', 'end_date', 'create_time', 'remaining_amount'],
+    'platelease': ['start_date', 'end_date', 'create_time', 'remaining_amount'],
+}
+
+
+def upgrade():
+    for table, columns in SORT_KEYS.items():
+        for column in columns:
+            op.create_index(f'ix_{table}_{column}_id', table, [column, 'id'], unique=False)
+
+
+def downgrade():
+    for table, columns in SORT_KEYS.items():
+        for column in columns:
+            op.drop_index(f'ix_{table}_{column}_id', table_name=table)
@@ -0,0 +1,42 @@
+"""Add indexes for contract and payment range filters
+
+Revision ID: 65fc884330b3
+Revises: 4452f1e56e00
+Create Date: 2026-10-19 17:34:45.902117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '65fc884330b3'
+down_revision = '4452f1e56e00'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_carrental_total_amount_id', 'carrental', ['total_amount', 'id']),
+    ('ix_platelease_total_amount_id', 'platelease', ['total_amount', 'id']),
+    ('ix_rentalpayment_rental_id_payment_date', 'rentalpayment', ['rental_id', 'payment_date']),
+    ('ix_rentalpayment_payment_date_id', 'rentalpayment', ['payment_date', 'id']),
+    ('ix_rentalpayment_create_time', 'rentalpayment', ['create_time']),
+    ('ix_rentalpayment_amount', 'rentalpayment', ['amount']),
+    ('ix_platepayment_lease_id_payment_date', 'platepayment', ['lease_id', 'payment_date']),
+    ('ix_platepayment_payment_date_id', 'platepayment', ['payment_date', 'id']),
+    ('ix_platepayment_create_time', 'platepayment', ['create_time']),
+    ('ix_platepayment_amount', 'platepayment', ['amount']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
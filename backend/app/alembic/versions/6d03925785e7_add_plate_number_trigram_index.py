@@ -0,0 +1,91 @@
+"""Add plate number trigram index
+
+Revision ID: 6d03925785e7
+Revises: f2634fa54183
+Create Date: 2026-10-19 18:40:12.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '6d03925785e7'
+down_revision = 'f2634fa54183'
+branch_labels = None
+depends_on = None
+
+
+# tables whose plate_number values are indexed
+PLATE_TABLES = ['car', 'licenseplate']
+
+# Plate numbers shorter than a trigram cannot be matched and are left out
+ADD_NUMBER = """
+    INSERT INTO platenumbertrigram (plate_number)
+    SELECT NEW.plate_number
+    WHERE length(NEW.plate_number) >= 3 AND NOT EXISTS (
+        SELECT 1 FROM platenumbertrigram
+        WHERE platenumbertrigram MATCH '"' || replace(NEW.plate_number, '"', '""') || '"'
+        AND plate_number = NEW.plate_number
+    );
+"""
+
+# A number stays while any car or plate still carries it
+DROP_NUMBER = """
+    DELETE FROM platenumbertrigram
+    WHERE platenumbertrigram MATCH '"' || replace(OLD.plate_number, '"', '""') || '"'
+    AND plate_number = OLD.plate_number
+    AND length(OLD.plate_number) >= 3
+    AND NOT EXISTS (SELECT 1 FROM car WHERE plate_number = OLD.plate_number)
+    AND NOT EXISTS (SELECT 1 FROM licenseplate WHERE plate_number = OLD.plate_number);
+"""
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in PLATE_TABLES:
+            op.create_index(
+                f'ix_{table}_plate_number_trgm',
+                table,
+                ['plate_number'],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={'plate_number': 'gin_trgm_ops'},
+            )
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE platenumbertrigram USING fts5(plate_number, tokenize = 'trigram')"
+    )
+    for table in PLATE_TABLES:
+        op.execute(
+            f'CREATE TRIGGER {table}_plate_number_trigram_insert AFTER INSERT ON {table} '
+            f'WHEN NEW.plate_number IS NOT NULL BEGIN {ADD_NUMBER} END'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_plate_number_trigram_update AFTER UPDATE OF plate_number ON {table} '
+            f'BEGIN {ADD_NUMBER} {DROP_NUMBER} END'
+        )
+        op.execute(
+            f'CREATE TRIGGER {table}_plate_number_trigram_delete AFTER DELETE ON {table} '
+            f'BEGIN {DROP_NUMBER} END'
+        )
+    op.execute(
+        'INSERT INTO platenumbertrigram (plate_number) '
+        'SELECT plate_number FROM car WHERE length(plate_number) >= 3 '
+        'UNION SELECT plate_number FROM licenseplate WHERE length(plate_number) >= 3'
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in PLATE_TABLES:
+            op.drop_index(f'ix_{table}_plate_number_trgm', table_name=table)
+        return
+
+    for table in PLATE_TABLES:
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f'DROP TRIGGER IF EXISTS {table}_plate_number_trigram_{action}')
+    op.execute('DROP TABLE IF EXISTS platenumbertrigram')
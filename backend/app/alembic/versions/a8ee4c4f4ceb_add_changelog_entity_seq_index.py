@@ -0,0 +1,25 @@
+"""Add changelog entity seq index
+
+Revision ID: a8ee4c4f4ceb
+Revises: 33edf16c2b38
+Create Date: 2026-10-19 21:47:26.105583
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8ee4c4f4ceb'
+down_revision = '33edf16c2b38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_changelog_entity_seq', 'changelog', ['entity', 'seq'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_changelog_entity_seq', table_name='changelog')
@@ -0,0 +1,71 @@
+"""Add normalized renter phone and license columns
+
+Revision ID: b68a2b03179e
+Revises: 3d2b11681caa
+Create Date: 2026-10-19 20:03:31.845120
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+from app import search_index
+
+
+# revision identifiers, used by Alembic.
+revision = 'b68a2b03179e'
+down_revision = '3d2b11681caa'
+branch_labels = None
+depends_on = None
+
+
+def _normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone)
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    return digits
+
+
+def _normalize_license(license_number):
+    return re.sub(r'[^0-9A-Za-z]', '', license_number).upper()
+
+
+def upgrade():
+    with op.batch_alter_table('renter', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('phone_normalized', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=True))
+        batch_op.add_column(sa.Column('driver_license_normalized', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_renter_phone_normalized'), ['phone_normalized'], unique=False)
+        batch_op.create_index(batch_op.f('ix_renter_driver_license_normalized'), ['driver_license_normalized'], unique=False)
+
+    bind = op.get_bind()
+    renters = bind.execute(
+        sa.text('SELECT id, phone, driver_license_number FROM renter')
+    ).all()
+    if renters:
+        bind.execute(
+            sa.text(
+                'UPDATE renter SET phone_normalized = :phone, driver_license_normalized = :license '
+                'WHERE id = :id'
+            ),
+            [
+                {
+                    'id': id,
+                    'phone': _normalize_phone(phone),
+                    'license': _normalize_license(license_number),
+                }
+                for id, phone, license_number in renters
+            ],
+        )
+    # Fill the search index added by 3d2b11681caa; the normalized forms are
+    # search keys of the renter as well
+    search_index.rebuild(bind)
+
+
+def downgrade():
+    with op.batch_alter_table('renter', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_renter_driver_license_normalized'))
+        batch_op.drop_index(batch_op.f('ix_renter_phone_normalized'))
+        batch_op.drop_column('driver_license_normalized')
+        batch_op.drop_column('phone_normalized')
@@ -0,0 +1,37 @@
+"""Add partial unique indexes for active leases and rentals
+
+Revision ID: b7c3e1d2a5f4
+Revises: e42b2feba8a0
+Create Date: 2026-10-19 13:12:40.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c3e1d2a5f4'
+down_revision = 'e42b2feba8a0'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_LEASE = sa.text("status = 'active'")
+ACTIVE_RENTAL = sa.text("status = 'active' AND payment_status = 'unpaid'")
+
+
+def upgrade():
+    op.create_index(
+        'ux_platelease_active_plate_id', 'platelease', ['plate_id'], unique=True,
+        sqlite_where=ACTIVE_LEASE, postgresql_where=ACTIVE_LEASE,
+    )
+    op.create_index(
+        'ux_carrental_active_car_id', 'carrental', ['car_id'], unique=True,
+        sqlite_where=ACTIVE_RENTAL, postgresql_where=ACTIVE_RENTAL,
+    )
+
+
+def downgrade():
+    op.drop_index('ux_carrental_active_car_id', table_name='carrental')
+    op.drop_index('ux_platelease_active_plate_id', table_name='platelease')
@@ -0,0 +1,47 @@
+"""Add statuscounter table
+
+Revision ID: c61bb811e257
+Revises: 166645a0445d
+Create Date: 2026-10-19 16:20:53.407715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c61bb811e257'
+down_revision = '166645a0445d'
+branch_labels = None
+depends_on = None
+
+
+# table -> counted status columns
+COUNTED_FIELDS = {
+    'car': ['status'],
+    'licenseplate': ['status'],
+    'carrental': ['status', 'payment_status'],
+    'platelease': ['status', 'payment_status'],
+}
+
+
+def upgrade():
+    op.create_table('statuscounter',
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('field', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('value', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'field', 'value')
+    )
+    for table, fields in COUNTED_FIELDS.items():
+        for field in fields:
+            op.execute(
+                f"INSERT INTO statuscounter (entity, field, value, count) "
+                f"SELECT '{table}', '{field}', {field}, COUNT(*) FROM {table} "
+                f"WHERE {field} IS NOT NULL GROUP BY {field}"
+            )
+
+
+def downgrade():
+    op.drop_table('statuscounter')
@@ -0,0 +1,36 @@
+"""Add changelog table
+
+Revision ID: d375c3ec37b7
+Revises: b68a2b03179e
+Create Date: 2026-10-19 20:41:09.662734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'd375c3ec37b7'
+down_revision = 'b68a2b03179e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('changelog',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+    sa.Column('ref_id', sa.Uuid(), nullable=False),
+    sa.Column('op', sqlmodel.sql.sqltypes.AutoString(length=8), nullable=False),
+    sa.Column('snapshot', sa.JSON(), nullable=True),
+    sa.Column('create_time', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    op.create_index(op.f('ix_changelog_create_time'), 'changelog', ['create_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_changelog_create_time'), table_name='changelog')
+    op.drop_table('changelog')
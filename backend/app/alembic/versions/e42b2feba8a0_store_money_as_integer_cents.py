@@ -0,0 +1,77 @@
+"""Store money as integer cents
+
+Revision ID: e42b2feba8a0
+Revises: 7091133e9c10
+Create Date: 2026-10-19 11:37:05.914562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e42b2feba8a0'
+down_revision = '7091133e9c10'
+branch_labels = None
+depends_on = None
+
+
+# table -> money columns (column name, server default)
+MONEY_COLUMNS = {
+    'licenseplate': [('purchase_amount', None)],
+    'platelease': [('total_amount', '0.0'), ('paid_amount', '0.0'), ('remaining_amount', '0.0')],
+    'platepayment': [('amount', None)],
+    'car': [
+        ('price', None),
+        ('installation_fee_for_safety_equipment', None),
+        ('insurance_expenses', None),
+        ('service_expenses', None),
+        ('maintenance_costs', None),
+        ('full_coverage_auto_insurance', None),
+        ('other_expenses', None),
+    ],
+    'carrental': [('total_amount', None), ('paid_amount', None), ('remaining_amount', '0.0')],
+    'rentalpayment': [('amount', None)],
+    'installment': [('amount', None), ('paid_amount', None)],
+    'agingsnapshot': [
+        ('current_amount', None),
+        ('days_1_30', None),
+        ('days_31_60', None),
+        ('days_61_90', None),
+        ('days_over_90', None),
+        ('overdue_amount', None),
+        ('total_amount', None),
+    ],
+}
+
+
+def upgrade():
+    for table, columns in MONEY_COLUMNS.items():
+        # Scale in place first so the type change below only drops the ".0"
+        assignments = ', '.join(f'{name} = ROUND({name} * 100)' for name, _ in columns)
+        op.execute(f'UPDATE {table} SET {assignments}')
+        with op.batch_alter_table(table) as batch_op:
+            for name, server_default in columns:
+                batch_op.alter_column(
+                    name,
+                    existing_type=sa.Float(),
+                    type_=sa.BigInteger(),
+                    postgresql_using=f'{name}::bigint',
+                    **({'server_default': '0', 'existing_server_default': server_default} if server_default else {}),
+                )
+
+
+def downgrade():
+    for table, columns in MONEY_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for name, server_default in columns:
+                batch_op.alter_column(
+                    name,
+                    existing_type=sa.BigInteger(),
+                    type_=sa.Float(),
+                    postgresql_using=f'{name}::double precision',
+                    **({'server_default': server_default, 'existing_server_default': '0'} if server_default else {}),
+                )
+        assignments = ', '.join(f'{name} = {name} / 100.0' for name, _ in columns)
+        op.execute(f'UPDATE {table} SET {assignments}')
@@ -0,0 +1,53 @@
+"""Add current rental/lease pointers to car and licenseplate
+
+Revision ID: ed88e483b930
+Revises: 1201dfa99e91
+Create Date: 2026-10-19 15:02:11.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'ed88e483b930'
+down_revision = '1201dfa99e91'
+branch_labels = None
+depends_on = None
+
+
+# (holder table, pointer column, contract table, contract foreign key)
+POINTERS = [
+    ('car', 'current_rental_id', 'carrental', 'car_id'),
+    ('licenseplate', 'current_lease_id', 'platelease', 'plate_id'),
+]
+
+
+def upgrade():
+    for table, column, contract_table, contract_fk in POINTERS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column(column, sa.Uuid(), nullable=True))
+            batch_op.create_index(f'ix_{table}_{column}', [column], unique=False)
+            batch_op.create_foreign_key(
+                f'fk_{table}_{column}_{contract_table}', contract_table,
+                [column], ['id'], ondelete='SET NULL',
+            )
+        # Point at the open contract, then make status agree with the pointer
+        op.execute(
+            f"UPDATE {table} SET {column} = ("
+            f"SELECT id FROM {contract_table} WHERE {contract_table}.{contract_fk} = {table}.id "
+            f"AND status = 'active' AND payment_status = 'unpaid')"
+        )
+        op.execute(
+            f"UPDATE {table} SET status = CASE WHEN {column} IS NULL THEN 'available' ELSE 'rented' END "
+            f"WHERE {column} IS NOT NULL OR status = 'rented'"
+        )
+
+
+def downgrade():
+    for table, column, contract_table, _ in reversed(POINTERS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_{column}_{contract_table}', type_='foreignkey')
+            batch_op.drop_index(f'ix_{table}_{column}')
+            batch_op.drop_column(column)
@@ -0,0 +1,29 @@
+"""Add fleet search indexes on car
+
+Revision ID: f2634fa54183
+Revises: 65fc884330b3
+Create Date: 2026-10-19 18:05:19.550284
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2634fa54183'
+down_revision = '65fc884330b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_car_status_wav_year', 'car', ['status', 'wav', 'year'], unique=False)
+    op.create_index('ix_car_status_marker_color', 'car', ['status', 'marker', 'color'], unique=False)
+    op.create_index('ix_car_vin_number', 'car', ['vin_number'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_car_vin_number', table_name='car')
+    op.drop_index('ix_car_status_marker_color', table_name='car')
+    op.drop_index('ix_car_status_wav_year', table_name='car')
@@ -0,0 +1,125 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app import changelog
+from app.api import compression, responses
+from app.api.deps import SessionDep
+from app.core.config import settings
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    # Compressed copies by content coding, made on first request
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+class ResponseCache:
+    """
+    Serialized GET responses of this worker by media type, route and query
+    parameters, least recently used first out. An entry is only served while
+    its ETag is current, so writes invalidate it without being told about it.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._entries: OrderedDict[str, tuple[str, CachedBody]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: str) -> CachedBody | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes) -> CachedBody:
+        cached_body = CachedBody(body)
+        with self._lock:
+            self._entries[key] = (etag, cached_body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return cached_body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE)
+
+
+class CachedResponse:
+    """ETag of a request, with the cached or not-modified response for it."""
+
+    def __init__(self, request: Request, key: str, etag: str, media_type: str) -> None:
+        self.request = request
+        self.key = key
+        self.etag = etag
+        self.media_type = media_type
+        self.headers = {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "Accept, Accept-Encoding",
+        }
+
+    def hit(self) -> Response | None:
+        """304 when the client has the current version, else the cached response if any."""
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or self.etag.removeprefix("W/") in tags:
+                return Response(status_code=304, headers=self.headers)
+        cached_body = response_cache.get(self.key, self.etag)
+        if cached_body is None:
+            return None
+        return self._response(cached_body)
+
+    def store(self, content: BaseModel) -> Response:
+        """Serialize the response model and cache it under the request's ETag."""
+        body = responses.serialize(content, self.media_type)
+        return self._response(response_cache.put(self.key, self.etag, body))
+
+    def _response(self, cached_body: CachedBody) -> Response:
+        body, headers = cached_body.body, self.headers
+        encoding = None
+        if len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+            encoding = compression.choose_encoding(self.request.headers.get("accept-encoding"))
+        if encoding is not None:
+            if encoding not in cached_body.encoded:
+                cached_body.encoded[encoding] = compression.compress(body, encoding)
+            body = cached_body.encoded[encoding]
+            headers = {**headers, "Content-Encoding": encoding}
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+def cached(*entities: str) -> Callable[[Request, SessionDep], CachedResponse]:
+    """
+    Dependency for a GET route whose response is built from the given change
+    feed entities. Its ETag is derived from their write versions, which is
+    one index lookup per entity, so unchanged data is answered with 304 or
+    from the cache without querying, serializing or compressing it again.
+    """
+
+    def dependency(request: Request, session: SessionDep) -> CachedResponse:
+        media_type = responses.negotiate(request)
+        key = f"{media_type} {request.url.path}"
+        if request.query_params:
+            key += "?" + urlencode(sorted(request.query_params.multi_items()))
+        # Read before the data, so a write in between can only make the ETag
+        # stale, never the response
+        versions = changelog.write_version(session, entities)
+        digest = hashlib.blake2b(f"{key} {versions}".encode(), digest_size=12).hexdigest()
+        # Weak: the same for every content coding of the response
+        return CachedResponse(request, key, f'W/"{digest}"', media_type)
+
+    return dependency
@@ -0,0 +1,99 @@
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import HTTPException
+from sqlmodel import Session, func, select
+
+
+def parse_facets(facets: str | None, allowed: Iterable[str]) -> list[str]:
+    """Split a comma-separated facets parameter, rejecting fields that cannot be faceted."""
+    if not facets:
+        return []
+    names = list(dict.fromkeys(name.strip() for name in facets.split(",") if name.strip()))
+    allowed = set(allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown facet(s): {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}",
+        )
+    return names
+
+
+def facet_counts(
+    *, session: Session, statement: Any, facets: list[str]
+) -> dict[str, dict[str, int]] | None:
+    """
+    Row counts per value of each facet over the filtered list statement.
+
+    One GROUP BY over all requested facets together is run on the same
+    subquery the list count uses; the per-facet counts are summed from its
+    rows, so the filtered rows are only read once.
+    """
+    if not facets:
+        return None
+    filtered = statement.subquery()
+    columns = [filtered.c[name] for name in facets]
+    rows = session.exec(select(*columns, func.count()).group_by(*columns)).all()
+
+    counts: dict[str, dict[str, int]] = {name: {} for name in facets}
+    for *values, count in rows:
+        for name, value in zip(facets, values, strict=True):
+            key = "null" if value is None else str(value)
+            counts[name][key] = counts[name].get(key, 0) + count
+    return counts
+
+
+def order_by_clauses(order_by: str | None, *, source: Any, allowed: Iterable[str]) -> list[Any]:
+    """
+    ORDER BY for a comma-separated order_by parameter such as "-create_time,car_id".
+
+    The source id is appended as a tiebreaker, in the direction of the last
+    key, so pages are deterministic and an index on (key, id) serves the
+    sort in either direction.
+    """
+    if not order_by:
+        return []
+    allowed = set(allowed)
+    clauses = []
+    descending = False
+    for key in (key.strip() for key in order_by.split(",") if key.strip()):
+        descending = key.startswith("-")
+        name = key.lstrip("-")
+        if name not in allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot order by '{name}'. Allowed: {', '.join(sorted(allowed))}",
+            )
+        column = getattr(source, name)
+        clauses.append(column.desc() if descending else column.asc())
+    if not clauses:
+        return []
+    clauses.append(source.id.desc() if descending else source.id.asc())
+    return clauses
+
+
+def range_filters(source: Any, **bounds: tuple[Any, Any]) -> list[Any]:
+    """
+    WHERE clauses for inclusive (lower, upper) bounds on source columns,
+    e.g. range_filters(CarRental, start_date=(start_date_from, start_date_to)).
+    A None bound is open.
+    """
+    clauses = []
+    for name, (lower, upper) in bounds.items():
+        column = getattr(source, name)
+        if lower is not None:
+            clauses.append(column >= lower)
+        if upper is not None:
+            clauses.append(column <= upper)
+    return clauses
+
+
+def prefix_filter(column: Any, prefix: str) -> list[Any]:
+    """
+    Prefix match as a half-open range, prefix <= column < next prefix, so a
+    plain index on the column serves it (unlike LIKE under SQLite's
+    case-insensitive default).
+    """
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return [column >= prefix, column < upper]
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import items, login, private, users, utils, plates, renters, leases, cars, rentals
+from app.api.routes import items, login, private, users, utils, plates, renters, leases, cars, rentals, installments, reports, stats, payments, search, suggest, changes, events, webhooks
 from app.core.config import settings
 
 api_router = APIRouter()
@@ -13,6 +13,15 @@ api_router.include_router(renters.router)
 api_router.include_router(leases.router)
 api_router.include_router(cars.router)
 api_router.include_router(rentals.router)
+api_router.include_router(installments.router)
+api_router.include_router(reports.router)
+api_router.include_router(stats.router)
+api_router.include_router(payments.router)
+api_router.include_router(search.router)
+api_router.include_router(suggest.router)
+api_router.include_router(changes.router)
+api_router.include_router(events.router)
+api_router.include_router(webhooks.router)
 
 
 if settings.ENVIRONMENT == "local":
@@ -0,0 +1,161 @@
+import argparse
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from decimal import Decimal
+from functools import partial
+from typing import Any
+
+import anyio
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+
+from app.api import compression
+from app.models import CarPublic, CarsPublic, get_ny_time
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: clients asking for MessagePack get JSON
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def negotiate(request: Request) -> str:
+    """Media type of the response to a request: MessagePack if asked for and available, else JSON."""
+    accept = request.headers.get("accept", "")
+    if msgpack is not None and any(media_type in accept for media_type in MSGPACK_TYPES):
+        return MSGPACK
+    return JSON
+
+
+def serialize(content: BaseModel, media_type: str = JSON) -> bytes:
+    """
+    Body of a response model a handler has built itself. Pydantic serializes
+    it in one pass, where returning it would validate it against the
+    response_model again and re-encode the result.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb(content.model_dump(mode="json"))
+    return content.model_dump_json().encode()
+
+
+def _sample_cars(rows: int) -> CarsPublic:
+    now = get_ny_time()
+    cars = [
+        CarPublic(
+            id=uuid.uuid4(),
+            car_id=index,
+            model="Toyota Camry Hybrid",
+            wav=index % 2,
+            color="Black",
+            year=2020 + index % 5,
+            vin_number=f"4T1B11HK5KU{index:06d}",
+            plate_number=f"T{index:07d}",
+            registration_expires_at=now,
+            insurance_expires_at=now,
+            price=Decimal("28999.99"),
+            installation_fee_for_safety_equipment=Decimal("450.00"),
+            insurance_expenses=Decimal("3200.00"),
+            service_expenses=Decimal("120.50"),
+            maintenance_costs=Decimal("80.25"),
+            full_coverage_auto_insurance=Decimal("2400.00"),
+            other_expenses=Decimal("0.00"),
+            status="rented",
+            notes="Front bumper scratch",
+            create_by="admin@example.com",
+            create_time=now,
+            update_time=now,
+            current_rental_id=uuid.uuid4(),
+            current_renter_id=uuid.uuid4(),
+            current_renter_name="Jane Renter",
+            current_remaining_amount=Decimal("1250.00"),
+            plate_id=uuid.uuid4(),
+        )
+        for index in range(rows)
+    ]
+    return CarsPublic(data=cars, count=rows)
+
+
+def _best_of(repeat: int, func: Callable[[], bytes]) -> tuple[float, bytes]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def benchmark(*, rows: int = 1000, repeat: int = 5) -> dict[str, dict[str, float]]:
+    """
+    Serialize a CarsPublic page of `rows` cars through FastAPI's default
+    response_model path, the same with orjson rendering, and directly from
+    the model (JSON and MessagePack); report seconds and body sizes, and
+    the size and time of compressing each body.
+    """
+    content = _sample_cars(rows)
+    field = create_model_field(name="Response_read_cars", type_=CarsPublic, mode="serialization")
+
+    def response_model_path(response_class: type[JSONResponse]) -> Callable[[], bytes]:
+        def run() -> bytes:
+            serialized = anyio.run(
+                lambda: serialize_response(field=field, response_content=content, is_coroutine=True)
+            )
+            return response_class(serialized).body
+
+        return run
+
+    paths = {
+        "response_model": response_model_path(JSONResponse),
+        "response_model_orjson": response_model_path(FastJSONResponse),
+        "model_json": partial(serialize, content),
+    }
+    if msgpack is not None:
+        paths["model_msgpack"] = partial(serialize, content, MSGPACK)
+    results = {}
+    for name, func in paths.items():
+        seconds, body = _best_of(repeat, func)
+        results[name] = {"seconds": seconds, "bytes": len(body)}
+        encodings = ("gzip", "br") if compression.brotli is not None else ("gzip",)
+        for encoding in encodings:
+            seconds, compressed = _best_of(repeat, partial(compression.compress, body, encoding))
+            results[name][f"{encoding}_seconds"] = seconds
+            results[name][f"{encoding}_bytes"] = len(compressed)
+        logger.info("%s: %s", name, results[name])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare list response serialization paths")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+    benchmark(rows=args.rows, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
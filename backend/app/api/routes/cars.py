@@ -1,64 +1,271 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlmodel import case, func, select
 
+from app import crud, plate_search, reports
+from app.api import listing
+from app.api.caching import CachedResponse, cached
 from app.api.deps import CurrentUser, SessionDep
 from app.models import (
     Car,
+    CarRental,
     CarCreate,
+    CarDetailPublic,
     CarPublic,
     CarUpdate,
     CarsPublic,
+    ExpiryDigest,
+    ExpiryDigestPublic,
+    ExpiryDigestsPublic,
+    LicensePlate,
+    LicensePlatePublic,
     Message,
+    PlateLease,
+    Renter,
+    get_ny_time,
 )
 
 
 router = APIRouter(prefix="/cars", tags=["cars"])
 
+# Fields the list endpoint can return facet counts for
+CAR_FACETS = ("status", "model", "year", "marker", "color", "wav", "state")
+# Fields the list endpoint can sort by (each backed by an index on (field, id))
+CAR_SORTS = ("car_id", "create_time", "year", "model", "plate_number", "price")
+
+
+def _car_conflict(
+    error: IntegrityError, plate_number: str | None, car_id: int | None
+) -> Exception:
+    """Map a unique violation on car to the API error, re-raising anything else."""
+    if crud.is_unique_violation(
+        error, table="car", column="plate_number", constraint="ix_car_plate_number"
+    ):
+        return HTTPException(
+            status_code=400,
+            detail=f"A car with plate number '{plate_number}' already exists."
+        )
+    if crud.is_unique_violation(
+        error, table="car", column="car_id", constraint="uq_car_car_id"
+    ):
+        if car_id is None:
+            # The ID was generated, not sent: the request can simply be repeated
+            return HTTPException(
+                status_code=400, detail="Could not allocate a car ID, retry."
+            )
+        return HTTPException(
+            status_code=400,
+            detail=f"A car with ID '{car_id}' already exists."
+        )
+    return error
+
 
 @router.get("/", response_model=CarsPublic)
 def read_cars(
     session: SessionDep,
     current_user: CurrentUser,
+    cache: Annotated[CachedResponse, Depends(cached("car", "rental", "renter"))],
     skip: int = 0,
     limit: int = 100,
     model: str | None = None,
     plate_number: str | None = None,
     status: str | None = None,
+    wav: int | None = None,
+    year_min: int | None = None,
+    year_max: int | None = None,
+    color: str | None = None,
+    marker: str | None = None,
+    state: str | None = None,
+    vin_prefix: str | None = None,
+    price_min: Decimal | None = None,
+    price_max: Decimal | None = None,
+    facets: str | None = None,
+    order_by: str | None = None,
 ) -> Any:
     """
-    Retrieve cars.
+    Retrieve cars. Equality filters (status, wav, marker, color, state) and
+    the year range line up with the (status, wav, year) and
+    (status, marker, color) indexes; vin_prefix uses the VIN index.
     """
     _ = current_user
-    statement = select(Car)
+    if response := cache.hit():
+        return response
+    facet_names = listing.parse_facets(facets, CAR_FACETS)
+    # Current renter and balance come from the rental the car points at
+    statement = (
+        select(Car, CarRental.renter_id, Renter.full_name, CarRental.remaining_amount)
+        .outerjoin(CarRental, Car.current_rental_id == CarRental.id)
+        .outerjoin(Renter, CarRental.renter_id == Renter.id)
+    )
     if model:
         statement = statement.where(Car.model.contains(model))
     if plate_number:
-        statement = statement.where(Car.plate_number.contains(plate_number))
+        statement = statement.where(
+            plate_search.plate_number_contains(session, Car.plate_number, plate_number)
+        )
     if status:
         statement = statement.where(Car.status == status)
+    if wav is not None:
+        statement = statement.where(Car.wav == wav)
+    if marker:
+        statement = statement.where(Car.marker == marker)
+    if color:
+        statement = statement.where(Car.color == color)
+    if state:
+        statement = statement.where(Car.state == state)
+    if vin_prefix:
+        statement = statement.where(*listing.prefix_filter(Car.vin_number, vin_prefix))
+    statement = statement.where(
+        *listing.range_filters(Car, year=(year_min, year_max), price=(price_min, price_max))
+    )
     
     count_statement = select(func.count()).select_from(statement.subquery())
     count = session.exec(count_statement).one()
+    facet_counts = listing.facet_counts(session=session, statement=statement, facets=facet_names)
     
+    statement = statement.order_by(
+        *listing.order_by_clauses(order_by, source=Car, allowed=CAR_SORTS)
+    )
     statement = statement.offset(skip).limit(limit)
+    cars = [
+        CarPublic.model_validate(
+            car,
+            update={
+                "current_renter_id": renter_id,
+                "current_renter_name": renter_name,
+                "current_remaining_amount": remaining_amount,
+            },
+        )
+        for car, renter_id, renter_name, remaining_amount in session.exec(statement).all()
+    ]
+    return cache.store(CarsPublic(data=cars, count=count, facets=facet_counts))
+
+
+@router.get("/expiring", response_model=CarsPublic)
+def read_expiring_cars(
+    session: SessionDep,
+    current_user: CurrentUser,
+    within_days: int = 30,
+    include_expired: bool = True,
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
+    """
+    Retrieve cars whose registration or insurance expires within the given
+    number of days, soonest first.
+    """
+    _ = current_user
+    statement = reports.expiring_cars_statement(
+        now=get_ny_time(), within_days=within_days, include_expired=include_expired
+    )
+
+    count_statement = select(func.count()).select_from(statement.subquery())
+    count = session.exec(count_statement).one()
+
+    registration, insurance = reports.expiry_columns().values()
+    next_expiry = case(
+        (insurance.is_(None), registration),
+        (registration.is_(None), insurance),
+        (registration <= insurance, registration),
+        else_=insurance,
+    )
+    statement = statement.order_by(next_expiry, Car.id).offset(skip).limit(limit)
     cars = session.exec(statement).all()
     return CarsPublic(data=cars, count=count)
 
 
-@router.get("/{id}", response_model=CarPublic)
-def read_car(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+@router.get("/expiry-digest", response_model=ExpiryDigestsPublic)
+def read_expiry_digest(
+    session: SessionDep,
+    current_user: CurrentUser,
+    digest_date: date | None = None,
+) -> Any:
     """
-    Get car by ID.
+    Get the daily registration/insurance expiry digest (today by default).
     """
     _ = current_user
-    car = session.get(Car, id)
-    if not car:
+    digest_date = digest_date or get_ny_time().date()
+    statement = (
+        select(ExpiryDigest)
+        .where(ExpiryDigest.digest_date == digest_date)
+        .order_by(ExpiryDigest.expires_at)
+    )
+    digests = session.exec(statement).all()
+
+    public_digests = []
+    for digest in digests:
+        public_digest = ExpiryDigestPublic.model_validate(digest)
+        if digest.car:
+            public_digest.car_short_id = digest.car.car_id
+            public_digest.car_model = digest.car.model
+            public_digest.plate_number = digest.car.plate_number
+        public_digests.append(public_digest)
+
+    return ExpiryDigestsPublic(data=public_digests, count=len(public_digests))
+
+
+@router.get("/{id}", response_model=CarDetailPublic)
+def read_car(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    cache: Annotated[CachedResponse, Depends(cached("car", "rental", "renter", "plate", "lease"))],
+) -> Any:
+    """
+    Get car by ID, with its current renter and its license plate lease state.
+    """
+    _ = current_user
+    if response := cache.hit():
+        return response
+    plate_renter = aliased(Renter)
+    statement = (
+        select(
+            Car,
+            CarRental.renter_id,
+            Renter.full_name,
+            CarRental.remaining_amount,
+            LicensePlate,
+            PlateLease.renter_id,
+            plate_renter.full_name,
+            PlateLease.remaining_amount,
+        )
+        .outerjoin(CarRental, Car.current_rental_id == CarRental.id)
+        .outerjoin(Renter, CarRental.renter_id == Renter.id)
+        .outerjoin(LicensePlate, Car.plate_id == LicensePlate.id)
+        .outerjoin(PlateLease, LicensePlate.current_lease_id == PlateLease.id)
+        .outerjoin(plate_renter, PlateLease.renter_id == plate_renter.id)
+        .where(Car.id == id)
+    )
+    row = session.exec(statement).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Car not found")
-    return car
+    car, renter_id, renter_name, remaining_amount, plate, *plate_lease = row
+
+    public_car = CarDetailPublic.model_validate(
+        car,
+        update={
+            "current_renter_id": renter_id,
+            "current_renter_name": renter_name,
+            "current_remaining_amount": remaining_amount,
+        },
+    )
+    if plate:
+        lease_renter_id, lease_renter_name, lease_remaining_amount = plate_lease
+        public_car.plate = LicensePlatePublic.model_validate(
+            plate,
+            update={
+                "current_renter_id": lease_renter_id,
+                "current_renter_name": lease_renter_name,
+                "current_remaining_amount": lease_remaining_amount,
+            },
+        )
+    return cache.store(public_car)
 
 
 @router.post("/", response_model=CarPublic)
@@ -72,45 +279,32 @@ def create_car(*, session: SessionDep, current_user: CurrentUser, car_in: CarCre
     if car_in.plate_number == "":
         car_in.plate_number = None
 
-    # Check if plate number already exists
-    if car_in.plate_number:
-        existing_car = session.exec(select(Car).where(Car.plate_number == car_in.plate_number)).first()
-        if existing_car:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A car with plate number '{car_in.plate_number}' already exists."
-            )
+    for attempt in range(2):
+        car = Car.model_validate(car_in)
 
-    car = Car.model_validate(car_in)
-    
-    # Set audit fields
-    car.create_by = current_user.email  # Use email as username
-    car.create_time = datetime.utcnow()
-    car.update_time = datetime.utcnow()
-    
-    # Manually handle autoincrement logic if car_id is provided or not
-    if car_in.car_id is not None:
-        # User provided a specific ID, check if it exists
-        existing_id_car = session.exec(select(Car).where(Car.car_id == car_in.car_id)).first()
-        if existing_id_car:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A car with ID '{car_in.car_id}' already exists."
-            )
-        car.car_id = car_in.car_id
-    else:
-        # Auto-increment logic
-        # We find the max car_id and add 1
-        # Note: This is not race-condition safe in high concurrency, but fine for this scale/SQLite
+        # Set audit fields
+        car.create_by = current_user.email  # Use email as username
+        car.create_time = datetime.utcnow()
+        car.update_time = datetime.utcnow()
+
+        crud.link_car_plate(car=car)
+        if car.car_id is None:
+            # Auto-increment inside the INSERT itself instead of a separate MAX() query
+            car.car_id = select(func.coalesce(func.max(Car.car_id), 0) + 1).scalar_subquery()
+
+        # Uniqueness of plate_number and car_id is enforced by their unique indexes
+        session.add(car)
         try:
-            max_id = session.exec(select(func.max(Car.car_id))).one()
-            car.car_id = (max_id or 0) + 1
-        except Exception:
-            # Fallback or if table is empty
-            car.car_id = 1
-        
-    session.add(car)
-    session.commit()
+            session.commit()
+            break
+        except IntegrityError as e:
+            session.rollback()
+            # A concurrent create can take the generated car_id: allocate again once
+            if attempt == 0 and car_in.car_id is None and crud.is_unique_violation(
+                e, table="car", column="car_id", constraint="uq_car_car_id"
+            ):
+                continue
+            raise _car_conflict(e, car_in.plate_number, car_in.car_id)
     session.refresh(car)
     return car
 
@@ -135,23 +329,20 @@ def update_car(
     if car_in.plate_number == "":
         car_in.plate_number = None
 
-    # Check uniqueness of plate_number if it's being updated
-    if car_in.plate_number and car_in.plate_number != car.plate_number:
-        existing_car = session.exec(select(Car).where(Car.plate_number == car_in.plate_number)).first()
-        if existing_car:
-            raise HTTPException(
-                status_code=400,
-                detail=f"A car with plate number '{car_in.plate_number}' already exists."
-            )
-            
     update_dict = car_in.model_dump(exclude_unset=True)
     car.sqlmodel_update(update_dict)
+    if "plate_number" in update_dict:
+        crud.link_car_plate(car=car)
     
     # Update audit fields
     car.update_time = datetime.utcnow()
     
     session.add(car)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise _car_conflict(e, car_in.plate_number, car.car_id)
     session.refresh(car)
     return car
 
@@ -165,6 +356,13 @@ def delete_car(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) ->
     car = session.get(Car, id)
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
+    # Rentals, payments and installments go with ON DELETE CASCADE in the
+    # database, so only the affected renters are read, not the rows themselves
+    renter_ids = session.exec(
+        select(CarRental.renter_id).where(CarRental.car_id == id).distinct()
+    ).all()
     session.delete(car)
+    for renter_id in renter_ids:
+        reports.refresh_aging_snapshot(session=session, renter_id=renter_id)
     session.commit()
     return Message(message="Car deleted successfully")
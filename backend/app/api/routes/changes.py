@@ -0,0 +1,55 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from sqlmodel import func, select
+
+from app.api.deps import CurrentUser, SessionDep
+from app.models import ChangeLog, ChangePublic, ChangesPublic
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+
+@router.get("/", response_model=ChangesPublic)
+def read_changes(
+    session: SessionDep,
+    current_user: CurrentUser,
+    since: int | None = None,
+    limit: int = 100,
+) -> Any:
+    """
+    Writes to cars, plates, renters, rentals, leases and payments after
+    sequence number since, oldest first: entity, id, op
+    (insert/update/delete) and the row after the write. Pass next_since back as since to continue.
+
+    Without since, nothing is returned and next_since is the current end of
+    the feed: read it before a full download of the lists, then sync from it.
+    Answers 410 when changes after since have already been pruned, so the
+    client has to download the lists again.
+    """
+    _ = current_user
+    if since is None:
+        last_seq = session.exec(select(func.max(ChangeLog.seq))).one()
+        return ChangesPublic(data=[], next_since=last_seq or 0)
+    first_seq = session.exec(select(func.min(ChangeLog.seq))).one()
+    if first_seq is not None and since < first_seq - 1:
+        raise HTTPException(
+            status_code=410,
+            detail="Changes after this sequence number were pruned; download the lists again",
+        )
+    changes = session.exec(
+        select(ChangeLog).where(ChangeLog.seq > since).order_by(ChangeLog.seq).limit(limit)
+    ).all()
+    return ChangesPublic(
+        data=[
+            ChangePublic(
+                seq=change.seq,
+                entity=change.entity,
+                id=change.ref_id,
+                op=change.op,
+                snapshot=change.snapshot,
+                create_time=change.create_time,
+            )
+            for change in changes
+        ],
+        next_since=changes[-1].seq if changes else since,
+    )
@@ -0,0 +1,46 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app import events
+from app.api.deps import CurrentUser
+from app.core.db import engine
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_events(
+    request: Request,
+    current_user: CurrentUser,
+    topics: str | None = None,
+    last_event_id: Annotated[int | None, Header()] = None,
+) -> StreamingResponse:
+    """
+    Server-sent events for writes to the comma-separated topics (cars, plates,
+    renters, rentals, leases, payments; all when omitted), published once
+    the write commits in any worker.
+
+    Each event is named after its topic, its id is the change feed sequence
+    number and its data is the change as GET /changes/ returns it. A client
+    that reconnects with Last-Event-ID first receives the changes it missed.
+    """
+    _ = current_user
+    names = list(dict.fromkeys(name.strip() for name in (topics or "").split(",") if name.strip()))
+    unknown = [name for name in names if name not in events.TOPICS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown topic(s): {', '.join(unknown)}. Allowed: {', '.join(events.TOPICS)}",
+        )
+    return StreamingResponse(
+        events.stream(
+            engine=engine,
+            topics=names or events.TOPICS,
+            last_event_id=last_event_id,
+            is_disconnected=request.is_disconnected,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,106 @@
+import uuid
+from datetime import date, timedelta
+from typing import Any
+
+from fastapi import APIRouter
+from sqlmodel import col, func, select
+
+from app.api.deps import CurrentUser, SessionDep
+from app.models import (
+    Installment,
+    InstallmentPublic,
+    InstallmentsPublic,
+    get_ny_time,
+)
+
+router = APIRouter(prefix="/installments", tags=["installments"])
+
+# Installments that still expect money
+OPEN_STATUSES = ("unpaid", "partial")
+
+
+@router.get("/", response_model=InstallmentsPublic)
+def read_installments(
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    status: str | None = None,
+    due_from: date | None = None,
+    due_to: date | None = None,
+    renter_id: uuid.UUID | None = None,
+) -> Any:
+    """
+    Retrieve installments by due date range, ordered by due date.
+    """
+    _ = current_user
+    statement = select(Installment)
+    if due_from:
+        statement = statement.where(Installment.due_date >= due_from)
+    if due_to:
+        statement = statement.where(Installment.due_date <= due_to)
+    if status:
+        statement = statement.where(Installment.status == status)
+    if renter_id:
+        statement = statement.where(Installment.renter_id == renter_id)
+
+    return _installments_page(session, statement, skip=skip, limit=limit)
+
+
+@router.get("/overdue", response_model=InstallmentsPublic)
+def read_overdue_installments(
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
+    """
+    Retrieve open installments whose due date has passed.
+    """
+    _ = current_user
+    today = get_ny_time().date()
+    statement = select(Installment).where(
+        Installment.due_date < today,
+        col(Installment.status).in_(OPEN_STATUSES),
+    )
+    return _installments_page(session, statement, skip=skip, limit=limit)
+
+
+@router.get("/upcoming", response_model=InstallmentsPublic)
+def read_upcoming_installments(
+    session: SessionDep,
+    current_user: CurrentUser,
+    within_days: int = 7,
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
+    """
+    Retrieve open installments due between today and within_days from now.
+    """
+    _ = current_user
+    today = get_ny_time().date()
+    statement = select(Installment).where(
+        Installment.due_date >= today,
+        Installment.due_date <= today + timedelta(days=within_days),
+        col(Installment.status).in_(OPEN_STATUSES),
+    )
+    return _installments_page(session, statement, skip=skip, limit=limit)
+
+
+def _installments_page(
+    session: SessionDep, statement: Any, *, skip: int, limit: int
+) -> InstallmentsPublic:
+    count_statement = select(func.count()).select_from(statement.subquery())
+    count = session.exec(count_statement).one()
+
+    statement = statement.order_by(Installment.due_date, Installment.id).offset(skip).limit(limit)
+    installments = session.exec(statement).all()
+
+    public_installments = []
+    for installment in installments:
+        public_installment = InstallmentPublic.model_validate(installment)
+        if installment.renter:
+            public_installment.renter_name = installment.renter.full_name
+        public_installments.append(public_installment)
+
+    return InstallmentsPublic(data=public_installments, count=count)
@@ -1,12 +1,22 @@
 from datetime import datetime, date
+from decimal import Decimal
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, Body
-from sqlmodel import func, select
+from fastapi import APIRouter, Body, Depends, HTTPException
+from sqlalchemy import literal
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import func, select, update
 
+from app import archive, changelog, crud, plate_search, reports, webhooks
+from app.api import listing
+from app.api.caching import CachedResponse, cached
 from app.api.deps import CurrentUser, SessionDep
 from app.models import (
+    Cents,
+    Installment,
+    InstallmentPublic,
+    InstallmentsPublic,
     LicensePlate,
     Message,
     Renter,
@@ -24,33 +34,79 @@ from app.models import (
 
 router = APIRouter(prefix="/leases", tags=["leases"])
 
+# Fields the list endpoint can return facet counts for
+LEASE_FACETS = ("status", "payment_status", "rental_type", "frequency")
+# Fields the list endpoint can sort by (each backed by an index on (field, id))
+LEASE_SORTS = ("start_date", "end_date", "create_time", "remaining_amount")
+
+
+def _lease_conflict(error: IntegrityError) -> Exception:
+    """Map the active-lease unique violation to the API error, re-raising anything else."""
+    if crud.is_unique_violation(
+        error, table="platelease", column="plate_id", constraint="ux_platelease_active_plate_id"
+    ):
+        return HTTPException(status_code=400, detail="Plate already has an active lease")
+    return error
+
 
 @router.get("/", response_model=PlateLeasesPublic)
 def read_leases(
     session: SessionDep,
     current_user: CurrentUser,
+    cache: Annotated[CachedResponse, Depends(cached("lease", "plate", "renter"))],
     skip: int = 0,
     limit: int = 100,
     plate_number: str | None = None,
     renter_name: str | None = None,
     status: str | None = None,
+    include_archived: bool = False,
+    start_date_from: date | None = None,
+    start_date_to: date | None = None,
+    end_date_from: date | None = None,
+    end_date_to: date | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    total_amount_min: Decimal | None = None,
+    total_amount_max: Decimal | None = None,
+    remaining_amount_min: Decimal | None = None,
+    remaining_amount_max: Decimal | None = None,
+    facets: str | None = None,
+    order_by: str | None = None,
 ) -> Any:
     _ = current_user
-    statement = select(PlateLease)
+    if response := cache.hit():
+        return response
+    facet_names = listing.parse_facets(facets, LEASE_FACETS)
+    leases_source = archive.with_archive(PlateLease, include_archived)
+    statement = select(leases_source)
     if plate_number:
         statement = statement.join(
-            LicensePlate, PlateLease.plate_id == LicensePlate.id
-        ).where(LicensePlate.plate_number.contains(plate_number))
+            LicensePlate, leases_source.plate_id == LicensePlate.id
+        ).where(plate_search.plate_number_contains(session, LicensePlate.plate_number, plate_number))
     if renter_name:
-        statement = statement.join(Renter, PlateLease.renter_id == Renter.id).where(
+        statement = statement.join(Renter, leases_source.renter_id == Renter.id).where(
             Renter.full_name.contains(renter_name)
         )
     if status:
-        statement = statement.where(PlateLease.status == status)
+        statement = statement.where(leases_source.status == status)
+    statement = statement.where(
+        *listing.range_filters(
+            leases_source,
+            start_date=(start_date_from, start_date_to),
+            end_date=(end_date_from, end_date_to),
+            create_time=(created_from, created_to),
+            total_amount=(total_amount_min, total_amount_max),
+            remaining_amount=(remaining_amount_min, remaining_amount_max),
+        )
+    )
 
     count_statement = select(func.count()).select_from(statement.subquery())
     count = session.exec(count_statement).one()
+    facet_counts = listing.facet_counts(session=session, statement=statement, facets=facet_names)
     
+    statement = statement.order_by(
+        *listing.order_by_clauses(order_by, source=leases_source, allowed=LEASE_SORTS)
+    )
     statement = statement.offset(skip).limit(limit)
     leases = session.exec(statement).all()
     
@@ -63,33 +119,40 @@ def read_leases(
             public_lease.renter_name = lease.renter.full_name
         public_leases.append(public_lease)
         
-    return PlateLeasesPublic(data=public_leases, count=count)
+    return cache.store(PlateLeasesPublic(data=public_leases, count=count, facets=facet_counts))
 
 
 @router.get("/{id}", response_model=PlateLeasePublic)
-def read_lease(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+def read_lease(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    cache: Annotated[CachedResponse, Depends(cached("lease", "plate", "renter"))],
+) -> Any:
+    """
+    Get lease by ID, including archived leases.
+    """
     _ = current_user
-    lease = session.get(PlateLease, id)
+    if response := cache.hit():
+        return response
+    lease = archive.get_with_archive(session, PlateLease, id)
     if not lease:
         raise HTTPException(status_code=404, detail="Lease not found")
         
     public_lease = PlateLeasePublic.model_validate(lease)
-    if lease.plate:
-        public_lease.plate_number = lease.plate.plate_number
-    if lease.renter:
-        public_lease.renter_name = lease.renter.full_name
+    plate = session.get(LicensePlate, lease.plate_id)
+    if plate:
+        public_lease.plate_number = plate.plate_number
+    renter = session.get(Renter, lease.renter_id)
+    if renter:
+        public_lease.renter_name = renter.full_name
         
-    return public_lease
+    return cache.store(public_lease)
 
 
 @router.post("/", response_model=PlateLeasePublic)
 def create_lease(*, session: SessionDep, current_user: CurrentUser, lease_in: PlateLeaseCreate) -> Any:
     _ = current_user
-    active_statement = select(PlateLease).where(PlateLease.plate_id == lease_in.plate_id, PlateLease.status == "active")
-    active = session.exec(active_statement).first()
-    if active:
-        raise HTTPException(status_code=400, detail="Plate already has an active lease")
-        
     lease = PlateLease.model_validate(lease_in)
     
     # Set audit fields
@@ -97,17 +160,23 @@ def create_lease(*, session: SessionDep, current_user: CurrentUser, lease_in: Pl
     lease.create_time = get_ny_time()
     lease.update_time = get_ny_time()
     lease.payment_status = "unpaid"
-    lease.paid_amount = 0.0
+    lease.paid_amount = Decimal("0.00")
     lease.remaining_amount = lease.total_amount
     
     plate = session.get(LicensePlate, lease.plate_id)
     if not plate:
         raise HTTPException(status_code=404, detail="License plate not found")
         
-    session.add(lease)
-    plate.status = "rented"
-    session.add(plate)
-    session.commit()
+    # "One active lease per plate" is enforced by a partial unique index
+    try:
+        session.add(lease)
+        crud.sync_installments(session=session, contract=lease, regenerate=True)
+        reports.refresh_aging_snapshot(session=session, renter_id=lease.renter_id)
+        crud.sync_current_contract(session=session, contract=lease)
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise _lease_conflict(e)
     session.refresh(lease)
     
     public_lease = PlateLeasePublic.model_validate(lease)
@@ -132,24 +201,28 @@ def update_lease(
     if not lease:
         raise HTTPException(status_code=404, detail="Lease not found")
         
-    prev_status = lease.status
     update_dict = lease_in.model_dump(exclude_unset=True)
     lease.sqlmodel_update(update_dict)
     
     # Recalculate remaining if total_amount changed
     if lease_in.total_amount is not None:
         lease.remaining_amount = lease.total_amount - lease.paid_amount
-        
-    lease.update_time = get_ny_time()
-    
-    session.add(lease)
-    if prev_status == "active" and lease.status != "active":
-        plate = session.get(LicensePlate, lease.plate_id)
-        if plate:
-            plate.status = "available"
-            session.add(plate)
+    try:
+        crud.sync_installments(
+            session=session,
+            contract=lease,
+            regenerate=not crud.SCHEDULE_FIELDS.isdisjoint(update_dict),
+        )
+        reports.refresh_aging_snapshot(session=session, renter_id=lease.renter_id)
             
-    session.commit()
+        lease.update_time = get_ny_time()
+        
+        session.add(lease)
+        crud.sync_current_contract(session=session, contract=lease)
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise _lease_conflict(e)
     session.refresh(lease)
     
     public_lease = PlateLeasePublic.model_validate(lease)
@@ -167,7 +240,7 @@ def pay_lease(
     session: SessionDep,
     current_user: CurrentUser,
     id: uuid.UUID,
-    amount: float = Body(..., embed=True),
+    amount: Decimal = Body(..., embed=True, decimal_places=2),
     payment_date: date = Body(..., embed=True),
     note: str | None = Body(None, embed=True),
 ) -> Any:
@@ -197,28 +270,49 @@ def pay_lease(
     )
     session.add(payment)
 
-    # Update lease aggregate info
-    lease.paid_amount += amount
-    lease.remaining_amount = lease.total_amount - lease.paid_amount
-    lease.update_time = get_ny_time()
-    
-    # Precision fix
-    if lease.remaining_amount < 0.01:
-        lease.remaining_amount = 0.0
+    # Update lease aggregate info in SQL (exact integer cents, guarded
+    # against concurrent payments overshooting the total)
+    # Bind the amount as Cents: column-minus-column expressions lose the type.
+    amount_cents = literal(amount, Cents())
+    result = session.execute(
+        update(PlateLease)
+        .where(
+            PlateLease.id == lease.id,
+            PlateLease.total_amount - PlateLease.paid_amount >= amount_cents,
+        )
+        .values(
+            paid_amount=PlateLease.paid_amount + amount_cents,
+            remaining_amount=PlateLease.total_amount - PlateLease.paid_amount - amount_cents,
+            update_time=get_ny_time(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail=f"Payment amount cannot exceed remaining amount ({remaining})")
+    # The SQL update bypasses the flush, so the change feed is written here
+    changelog.record_rows(session.connection(), "lease", [lease.id])
+    session.refresh(lease)
     
-    if lease.paid_amount >= lease.total_amount - 0.01:
+    if lease.remaining_amount == 0:
         lease.payment_status = "paid"
-        lease.paid_amount = lease.total_amount
-        lease.remaining_amount = 0.0
-        
-        # If fully paid, set plate status back to available?
-        if lease.plate_id:
-            plate = session.get(LicensePlate, lease.plate_id)
-            if plate:
-                plate.status = "available"
-                session.add(plate)
         
+    # A fully paid lease frees the plate
+    crud.sync_current_contract(session=session, contract=lease)
+    crud.sync_installments(session=session, contract=lease)
+    reports.refresh_aging_snapshot(session=session, renter_id=lease.renter_id)
     session.add(lease)
+    # Queued in this transaction and sent by the webhook dispatcher
+    lease_data = PlateLeasePublic.model_validate(lease).model_dump(mode="json")
+    webhooks.enqueue(
+        session,
+        "payment.posted",
+        {
+            "lease": lease_data,
+            "payment": PlatePaymentPublic.model_validate(payment).model_dump(mode="json"),
+        },
+    )
+    if lease.payment_status == "paid":
+        webhooks.enqueue(session, "lease.paid_off", {"lease": lease_data})
     session.commit()
     session.refresh(lease)
     
@@ -238,20 +332,58 @@ def read_lease_payments(
     id: uuid.UUID,
     skip: int = 0,
     limit: int = 100,
+    include_archived: bool = False,
+    payment_date_from: date | None = None,
+    payment_date_to: date | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    amount_min: Decimal | None = None,
+    amount_max: Decimal | None = None,
 ) -> Any:
     """
     Get payments for a lease.
     """
     _ = current_user
-    count_statement = select(func.count()).select_from(PlatePayment).where(PlatePayment.lease_id == id)
+    payments_source = archive.with_archive(PlatePayment, include_archived)
+    conditions = [
+        payments_source.lease_id == id,
+        *listing.range_filters(
+            payments_source,
+            payment_date=(payment_date_from, payment_date_to),
+            create_time=(created_from, created_to),
+            amount=(amount_min, amount_max),
+        ),
+    ]
+    count_statement = select(func.count()).select_from(payments_source).where(*conditions)
     count = session.exec(count_statement).one()
     
-    statement = select(PlatePayment).where(PlatePayment.lease_id == id).order_by(PlatePayment.payment_date.desc(), PlatePayment.create_time.desc()).offset(skip).limit(limit)
+    statement = select(payments_source).where(*conditions).order_by(payments_source.payment_date.desc(), payments_source.create_time.desc()).offset(skip).limit(limit)
     payments = session.exec(statement).all()
     
     return PlatePaymentsPublic(data=payments, count=count)
 
 
+@router.get("/{id}/installments", response_model=InstallmentsPublic)
+def read_lease_installments(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+) -> Any:
+    """
+    Get the installment schedule for a lease.
+    """
+    _ = current_user
+    if not session.get(PlateLease, id):
+        raise HTTPException(status_code=404, detail="Lease not found")
+    statement = select(Installment).where(Installment.lease_id == id).order_by(Installment.sequence)
+    installments = session.exec(statement).all()
+
+    return InstallmentsPublic(
+        data=[InstallmentPublic.model_validate(installment) for installment in installments],
+        count=len(installments),
+    )
+
+
 @router.post("/{id}/freeze", response_model=PlateLeasePublic)
 def freeze_lease(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
     """
@@ -267,13 +399,15 @@ def freeze_lease(session: SessionDep, current_user: CurrentUser, id: uuid.UUID)
     lease.update_time = get_ny_time()
     
     # Free the plate
-    if lease.plate_id:
-        plate = session.get(LicensePlate, lease.plate_id)
-        if plate:
-            plate.status = "available"
-            session.add(plate)
-            
+    crud.sync_current_contract(session=session, contract=lease)
+    crud.sync_installments(session=session, contract=lease)
+    reports.refresh_aging_snapshot(session=session, renter_id=lease.renter_id)
     session.add(lease)
+    webhooks.enqueue(
+        session,
+        "lease.frozen",
+        {"lease": PlateLeasePublic.model_validate(lease).model_dump(mode="json")},
+    )
     session.commit()
     session.refresh(lease)
     
@@ -292,10 +426,8 @@ def delete_lease(session: SessionDep, current_user: CurrentUser, id: uuid.UUID)
     lease = session.get(PlateLease, id)
     if not lease:
         raise HTTPException(status_code=404, detail="Lease not found")
+    crud.sync_current_contract(session=session, contract=lease, deleted=True)
     session.delete(lease)
-    plate = session.get(LicensePlate, lease.plate_id)
-    if plate and plate.status == "rented":
-        plate.status = "available"
-        session.add(plate)
+    reports.refresh_aging_snapshot(session=session, renter_id=lease.renter_id)
     session.commit()
     return Message(message="Lease deleted successfully")
@@ -0,0 +1,127 @@
+import base64
+import uuid
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from sqlmodel import and_, literal, or_, select, union_all
+
+from app.api import listing
+from app.api.deps import CurrentUser, SessionDep
+from app.models import (
+    CarRental,
+    PaymentJournalEntry,
+    PaymentJournalPublic,
+    PlateLease,
+    PlatePayment,
+    RentalPayment,
+)
+
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+# contract type -> (payment model, payment foreign key, contract model)
+JOURNAL_SOURCES: dict[str, tuple[Any, Any, Any]] = {
+    "rental": (RentalPayment, RentalPayment.rental_id, CarRental),
+    "lease": (PlatePayment, PlatePayment.lease_id, PlateLease),
+}
+
+
+def _encode_cursor(payment_date: date, id: uuid.UUID, running_total: Decimal) -> str:
+    raw = f"{payment_date.isoformat()}|{id}|{running_total}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[date, uuid.UUID, Decimal]:
+    try:
+        payment_date, id, running_total = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return date.fromisoformat(payment_date), uuid.UUID(id), Decimal(running_total)
+    except (ValueError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/", response_model=PaymentJournalPublic)
+def read_payment_journal(
+    session: SessionDep,
+    current_user: CurrentUser,
+    limit: int = 100,
+    cursor: str | None = None,
+    contract_type: str | None = None,
+    renter_id: uuid.UUID | None = None,
+    payment_date_from: date | None = None,
+    payment_date_to: date | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    amount_min: Decimal | None = None,
+    amount_max: Decimal | None = None,
+) -> Any:
+    """
+    Rental and lease payments in one journal, oldest first, with a running total.
+
+    Pages are keyset-paginated on (payment_date, id): pass next_cursor back
+    as cursor. The cursor carries the running total, so no page re-reads
+    the rows before it.
+    """
+    _ = current_user
+    if contract_type is not None and contract_type not in JOURNAL_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown contract type '{contract_type}'")
+    after = _decode_cursor(cursor) if cursor else None
+    running_total = after[2] if after else Decimal("0.00")
+
+    # Each payment table is read in (payment_date, id) index order and cut
+    # at the page size before the UNION ALL, so only the page is merged
+    branches = []
+    for source_type, (payment, payment_fk, contract) in JOURNAL_SOURCES.items():
+        if contract_type is not None and source_type != contract_type:
+            continue
+        branch = (
+            select(
+                payment.id,
+                literal(source_type).label("contract_type"),
+                payment_fk.label("contract_id"),
+                contract.renter_id,
+                payment.amount,
+                payment.payment_date,
+                payment.note,
+                payment.create_by,
+                payment.create_time,
+            )
+            .join(contract, payment_fk == contract.id)
+            .where(
+                *listing.range_filters(
+                    payment,
+                    payment_date=(payment_date_from, payment_date_to),
+                    create_time=(created_from, created_to),
+                    amount=(amount_min, amount_max),
+                )
+            )
+        )
+        if renter_id is not None:
+            branch = branch.where(contract.renter_id == renter_id)
+        if after:
+            after_date, after_id, _ = after
+            branch = branch.where(
+                or_(
+                    payment.payment_date > after_date,
+                    and_(payment.payment_date == after_date, payment.id > after_id),
+                )
+            )
+        page = branch.order_by(payment.payment_date, payment.id).limit(limit + 1).subquery()
+        branches.append(select(*page.c))
+
+    journal = union_all(*branches).subquery()
+    rows = session.exec(
+        select(*journal.c).order_by(journal.c.payment_date, journal.c.id).limit(limit + 1)
+    ).all()
+
+    entries = []
+    for row in rows[:limit]:
+        running_total += row.amount
+        entries.append(PaymentJournalEntry.model_validate(row, update={"running_total": running_total}))
+    next_cursor = None
+    if len(rows) > limit and entries:
+        last = entries[-1]
+        next_cursor = _encode_cursor(last.payment_date, last.id, last.running_total)
+    return PaymentJournalPublic(data=entries, next_cursor=next_cursor)
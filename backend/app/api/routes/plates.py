@@ -1,55 +1,119 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import func, select
 
+from app import crud, plate_search, reports
+from app.api import listing
+from app.api.caching import CachedResponse, cached
 from app.api.deps import CurrentUser, SessionDep
 from app.models import (
+    Car,
+    CarPublic,
     LicensePlate,
     LicensePlateCreate,
+    LicensePlateDetailPublic,
     LicensePlatePublic,
     LicensePlateUpdate,
     LicensePlatesPublic,
     Message,
     PlateLease,
+    Renter,
 )
 
 
 router = APIRouter(prefix="/plates", tags=["plates"])
 
+# Fields the list endpoint can return facet counts for
+PLATE_FACETS = ("status", "plate_state")
+# Fields the list endpoint can sort by (each backed by an index on (field, id))
+PLATE_SORTS = ("plate_number", "purchase_date", "purchase_amount")
+
 
 @router.get("/", response_model=LicensePlatesPublic)
 def read_plates(
     session: SessionDep,
     current_user: CurrentUser,
+    cache: Annotated[CachedResponse, Depends(cached("plate", "lease", "renter"))],
     skip: int = 0,
     limit: int = 100,
     plate_number: str | None = None,
     status: str | None = None,
+    facets: str | None = None,
+    order_by: str | None = None,
 ) -> Any:
     _ = current_user
-    statement = select(LicensePlate)
+    if response := cache.hit():
+        return response
+    facet_names = listing.parse_facets(facets, PLATE_FACETS)
+    # Current renter and balance come from the lease the plate points at
+    statement = (
+        select(LicensePlate, PlateLease.renter_id, Renter.full_name, PlateLease.remaining_amount)
+        .outerjoin(PlateLease, LicensePlate.current_lease_id == PlateLease.id)
+        .outerjoin(Renter, PlateLease.renter_id == Renter.id)
+    )
     if plate_number:
-        statement = statement.where(LicensePlate.plate_number.contains(plate_number))
+        statement = statement.where(
+            plate_search.plate_number_contains(session, LicensePlate.plate_number, plate_number)
+        )
     if status:
         statement = statement.where(LicensePlate.status == status)
     
     count_statement = select(func.count()).select_from(statement.subquery())
     count = session.exec(count_statement).one()
+    facet_counts = listing.facet_counts(session=session, statement=statement, facets=facet_names)
     
+    statement = statement.order_by(
+        *listing.order_by_clauses(order_by, source=LicensePlate, allowed=PLATE_SORTS)
+    )
     statement = statement.offset(skip).limit(limit)
-    plates = session.exec(statement).all()
-    return LicensePlatesPublic(data=plates, count=count)
+    plates = [
+        LicensePlatePublic.model_validate(
+            plate,
+            update={
+                "current_renter_id": renter_id,
+                "current_renter_name": renter_name,
+                "current_remaining_amount": remaining_amount,
+            },
+        )
+        for plate, renter_id, renter_name, remaining_amount in session.exec(statement).all()
+    ]
+    return cache.store(LicensePlatesPublic(data=plates, count=count, facets=facet_counts))
 
 
-@router.get("/{id}", response_model=LicensePlatePublic)
-def read_plate(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+@router.get("/{id}", response_model=LicensePlateDetailPublic)
+def read_plate(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    cache: Annotated[CachedResponse, Depends(cached("plate", "lease", "renter", "car"))],
+) -> Any:
     _ = current_user
-    plate = session.get(LicensePlate, id)
-    if not plate:
+    if response := cache.hit():
+        return response
+    statement = (
+        select(LicensePlate, PlateLease.renter_id, Renter.full_name, PlateLease.remaining_amount, Car)
+        .outerjoin(PlateLease, LicensePlate.current_lease_id == PlateLease.id)
+        .outerjoin(Renter, PlateLease.renter_id == Renter.id)
+        .outerjoin(Car, Car.plate_id == LicensePlate.id)
+        .where(LicensePlate.id == id)
+    )
+    row = session.exec(statement).first()
+    if not row:
         raise HTTPException(status_code=404, detail="License plate not found")
-    return plate
+    plate, renter_id, renter_name, remaining_amount, car = row
+    return cache.store(
+        LicensePlateDetailPublic.model_validate(
+            plate,
+            update={
+                "current_renter_id": renter_id,
+                "current_renter_name": renter_name,
+                "current_remaining_amount": remaining_amount,
+                "car": CarPublic.model_validate(car) if car else None,
+            },
+        )
+    )
 
 
 @router.post("/", response_model=LicensePlatePublic)
@@ -57,6 +121,8 @@ def create_license_plate(*, session: SessionDep, current_user: CurrentUser, plat
     _ = current_user
     plate = LicensePlate.model_validate(plate_in)
     session.add(plate)
+    session.flush()
+    crud.link_plate_cars(session=session, plate=plate)
     session.commit()
     session.refresh(plate)
     return plate
@@ -94,6 +160,8 @@ def update_license_plate(
     update_dict = plate_in.model_dump(exclude_unset=True)
     plate.sqlmodel_update(update_dict)
     session.add(plate)
+    if "plate_number" in update_dict:
+        crud.link_plate_cars(session=session, plate=plate)
     session.commit()
     session.refresh(plate)
     return plate
@@ -120,6 +188,12 @@ def delete_license_plate(session: SessionDep, current_user: CurrentUser, id: uui
             detail="Cannot delete plate: Plate has unpaid rentals"
         )
         
+    # Leases and their payments go with ON DELETE CASCADE in the database
+    renter_ids = session.exec(
+        select(PlateLease.renter_id).where(PlateLease.plate_id == id).distinct()
+    ).all()
     session.delete(plate)
+    for renter_id in renter_ids:
+        reports.refresh_aging_snapshot(session=session, renter_id=renter_id)
     session.commit()
     return Message(message="License plate deleted successfully")
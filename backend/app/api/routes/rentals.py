@@ -1,12 +1,22 @@
 from datetime import date, datetime
+from decimal import Decimal
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, Body
-from sqlmodel import func, select
+from fastapi import APIRouter, Body, Depends, HTTPException
+from sqlalchemy import literal
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import func, select, update
 
+from app import archive, changelog, crud, reports, webhooks
+from app.api import listing
+from app.api.caching import CachedResponse, cached
 from app.api.deps import CurrentUser, SessionDep
 from app.models import (
+    Cents,
+    Installment,
+    InstallmentPublic,
+    InstallmentsPublic,
     Car,
     CarRental,
     CarRentalCreate,
@@ -15,44 +25,93 @@ from app.models import (
     CarRentalUpdate,
     Message,
     RentalPayment,
+    RentalPaymentPublic,
     RentalPaymentsPublic,
+    Renter,
     get_ny_time,
 )
 
 router = APIRouter(prefix="/rentals", tags=["rentals"])
 
+# Fields the list endpoint can return facet counts for
+RENTAL_FACETS = ("status", "payment_status", "rental_type", "frequency")
+# Fields the list endpoint can sort by (each backed by an index on (field, id))
+RENTAL_SORTS = ("start_date", "end_date", "create_time", "remaining_amount")
+
+
+def _rental_conflict(error: IntegrityError) -> Exception:
+    """Map the active-rental unique violation to the API error, re-raising anything else."""
+    if crud.is_unique_violation(
+        error, table="carrental", column="car_id", constraint="ux_carrental_active_car_id"
+    ):
+        return HTTPException(status_code=400, detail="Car already has an active rental")
+    return error
+
 
 @router.get("/", response_model=CarRentalsPublic)
 def read_rentals(
     session: SessionDep,
     current_user: CurrentUser,
+    cache: Annotated[CachedResponse, Depends(cached("rental", "car", "renter"))],
     skip: int = 0,
     limit: int = 100,
     car_id: int | None = None,
     payment_status: str | None = None,
     rental_type: str | None = None,
+    include_archived: bool = False,
+    start_date_from: date | None = None,
+    start_date_to: date | None = None,
+    end_date_from: date | None = None,
+    end_date_to: date | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    total_amount_min: Decimal | None = None,
+    total_amount_max: Decimal | None = None,
+    remaining_amount_min: Decimal | None = None,
+    remaining_amount_max: Decimal | None = None,
+    facets: str | None = None,
+    order_by: str | None = None,
 ) -> Any:
     """
-    Retrieve rentals.
+    Retrieve rentals. Archived (closed, old) rentals are only included on request.
     """
     _ = current_user
+    if response := cache.hit():
+        return response
+    facet_names = listing.parse_facets(facets, RENTAL_FACETS)
+    rentals_source = archive.with_archive(CarRental, include_archived)
     
-    statement = select(CarRental)
-    count_statement = select(func.count()).select_from(CarRental)
+    statement = select(rentals_source)
+    count_statement = select(func.count()).select_from(rentals_source)
     
     if car_id is not None:
-        statement = statement.join(Car).where(Car.car_id == car_id)
-        count_statement = count_statement.join(Car).where(Car.car_id == car_id)
+        statement = statement.join(Car, rentals_source.car_id == Car.id).where(Car.car_id == car_id)
+        count_statement = count_statement.join(Car, rentals_source.car_id == Car.id).where(Car.car_id == car_id)
         
     if payment_status:
-        statement = statement.where(CarRental.payment_status == payment_status)
-        count_statement = count_statement.where(CarRental.payment_status == payment_status)
+        statement = statement.where(rentals_source.payment_status == payment_status)
+        count_statement = count_statement.where(rentals_source.payment_status == payment_status)
 
     if rental_type:
-        statement = statement.where(CarRental.rental_type == rental_type)
-        count_statement = count_statement.where(CarRental.rental_type == rental_type)
+        statement = statement.where(rentals_source.rental_type == rental_type)
+        count_statement = count_statement.where(rentals_source.rental_type == rental_type)
+
+    ranges = listing.range_filters(
+        rentals_source,
+        start_date=(start_date_from, start_date_to),
+        end_date=(end_date_from, end_date_to),
+        create_time=(created_from, created_to),
+        total_amount=(total_amount_min, total_amount_max),
+        remaining_amount=(remaining_amount_min, remaining_amount_max),
+    )
+    statement = statement.where(*ranges)
+    count_statement = count_statement.where(*ranges)
 
     count = session.exec(count_statement).one()
+    facet_counts = listing.facet_counts(session=session, statement=statement, facets=facet_names)
+    statement = statement.order_by(
+        *listing.order_by_clauses(order_by, source=rentals_source, allowed=RENTAL_SORTS)
+    )
     statement = statement.offset(skip).limit(limit)
     rentals = session.exec(statement).all()
     
@@ -69,27 +128,36 @@ def read_rentals(
             public_rental.renter_name = rental.renter.full_name
         public_rentals.append(public_rental)
         
-    return CarRentalsPublic(data=public_rentals, count=count)
+    return cache.store(CarRentalsPublic(data=public_rentals, count=count, facets=facet_counts))
 
 
 @router.get("/{id}", response_model=CarRentalPublic)
-def read_rental(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+def read_rental(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    cache: Annotated[CachedResponse, Depends(cached("rental", "car", "renter"))],
+) -> Any:
     """
-    Get rental by ID.
+    Get rental by ID, including archived rentals.
     """
     _ = current_user
-    rental = session.get(CarRental, id)
+    if response := cache.hit():
+        return response
+    rental = archive.get_with_archive(session, CarRental, id)
     if not rental:
         raise HTTPException(status_code=404, detail="Rental not found")
         
     public_rental = CarRentalPublic.model_validate(rental)
-    if rental.car:
-        public_rental.car_model = rental.car.model
-        public_rental.car_short_id = rental.car.car_id
-    if rental.renter:
-        public_rental.renter_name = rental.renter.full_name
+    car = session.get(Car, rental.car_id)
+    if car:
+        public_rental.car_model = car.model
+        public_rental.car_short_id = car.car_id
+    renter = session.get(Renter, rental.renter_id)
+    if renter:
+        public_rental.renter_name = renter.full_name
         
-    return public_rental
+    return cache.store(public_rental)
 
 
 @router.post("/", response_model=CarRentalPublic)
@@ -107,18 +175,20 @@ def create_rental(
     rental.create_time = get_ny_time()
     rental.update_time = get_ny_time()
     rental.payment_status = "unpaid"
-    rental.paid_amount = 0.0
+    rental.paid_amount = Decimal("0.00")
     rental.remaining_amount = rental.total_amount
     
-    session.add(rental)
-    
-    # Update car status to 'rented'
-    car = session.get(Car, rental_in.car_id)
-    if car:
-        car.status = "rented"
-        session.add(car)
-        
-    session.commit()
+    # "One active rental per car" is enforced by a partial unique index
+    try:
+        session.add(rental)
+        crud.sync_installments(session=session, contract=rental, regenerate=True)
+        reports.refresh_aging_snapshot(session=session, renter_id=rental.renter_id)
+        # Point the car at its new rental and mark it rented
+        crud.sync_current_contract(session=session, contract=rental)
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise _rental_conflict(e)
     session.refresh(rental)
     
     # Prepare response
@@ -154,6 +224,17 @@ def update_rental(
     # Recalculate remaining amount if total_amount changed
     if rental_in.total_amount is not None:
         rental.remaining_amount = rental.total_amount - rental.paid_amount
+    try:
+        crud.sync_installments(
+            session=session,
+            contract=rental,
+            regenerate=not crud.SCHEDULE_FIELDS.isdisjoint(update_dict),
+        )
+        reports.refresh_aging_snapshot(session=session, renter_id=rental.renter_id)
+        crud.sync_current_contract(session=session, contract=rental)
+    except IntegrityError as e:
+        session.rollback()
+        raise _rental_conflict(e)
 
     # Update audit fields
     rental.update_time = get_ny_time()
@@ -171,7 +252,11 @@ def update_rental(
     # I will stick to what I have to avoid breaking flow.
     
     session.add(rental)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError as e:
+        session.rollback()
+        raise _rental_conflict(e)
     session.refresh(rental)
     
     public_rental = CarRentalPublic.model_validate(rental)
@@ -190,7 +275,7 @@ def pay_rental(
     session: SessionDep,
     current_user: CurrentUser,
     id: uuid.UUID,
-    amount: float = Body(..., embed=True),
+    amount: Decimal = Body(..., embed=True, decimal_places=2),
     payment_date: date = Body(..., embed=True),
     note: str | None = Body(None, embed=True),
 ) -> Any:
@@ -220,32 +305,49 @@ def pay_rental(
     )
     session.add(payment)
 
-    # Update rental aggregate info
-    rental.paid_amount += amount
-    rental.remaining_amount = rental.total_amount - rental.paid_amount
-    rental.update_time = get_ny_time()
-    
-    # Precision fix for float arithmetic
-    if rental.remaining_amount < 0.01:
-        rental.remaining_amount = 0.0
+    # Update rental aggregate info in SQL. Amounts are integer cents, so this
+    # is exact, and the guard stops concurrent payments overshooting the total.
+    # Bind the amount as Cents: column-minus-column expressions lose the type.
+    amount_cents = literal(amount, Cents())
+    result = session.execute(
+        update(CarRental)
+        .where(
+            CarRental.id == rental.id,
+            CarRental.total_amount - CarRental.paid_amount >= amount_cents,
+        )
+        .values(
+            paid_amount=CarRental.paid_amount + amount_cents,
+            remaining_amount=CarRental.total_amount - CarRental.paid_amount - amount_cents,
+            update_time=get_ny_time(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=400, detail=f"Payment amount cannot exceed remaining amount ({remaining})")
+    # The SQL update bypasses the flush, so the change feed is written here
+    changelog.record_rows(session.connection(), "rental", [rental.id])
+    session.refresh(rental)
     
-    if rental.paid_amount >= rental.total_amount - 0.01: # allow small float error
+    if rental.remaining_amount == 0:
         rental.payment_status = "paid"
-        rental.paid_amount = rental.total_amount # Snap to total
-        rental.remaining_amount = 0.0
-        
-        # If fully paid, set car status back to available?
-        # User requirement: "remaining_amount 为 0时， 将Cars模块中该CAR的status设置为available"
-        if rental.car_id:
-            car = session.get(Car, rental.car_id)
-            if car:
-                car.status = "available"
-                session.add(car)
-    else:
-        # It remains unpaid (or partial if we had that status)
-        pass
         
+    # User requirement: "remaining_amount 为 0时， 将Cars模块中该CAR的status设置为available"
+    crud.sync_current_contract(session=session, contract=rental)
+    crud.sync_installments(session=session, contract=rental)
+    reports.refresh_aging_snapshot(session=session, renter_id=rental.renter_id)
     session.add(rental)
+    # Queued in this transaction and sent by the webhook dispatcher
+    rental_data = CarRentalPublic.model_validate(rental).model_dump(mode="json")
+    webhooks.enqueue(
+        session,
+        "payment.posted",
+        {
+            "rental": rental_data,
+            "payment": RentalPaymentPublic.model_validate(payment).model_dump(mode="json"),
+        },
+    )
+    if rental.payment_status == "paid":
+        webhooks.enqueue(session, "rental.paid_off", {"rental": rental_data})
     session.commit()
     session.refresh(rental)
     
@@ -266,20 +368,58 @@ def read_rental_payments(
     id: uuid.UUID,
     skip: int = 0,
     limit: int = 100,
+    include_archived: bool = False,
+    payment_date_from: date | None = None,
+    payment_date_to: date | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    amount_min: Decimal | None = None,
+    amount_max: Decimal | None = None,
 ) -> Any:
     """
     Get payments for a rental.
     """
     _ = current_user
-    count_statement = select(func.count()).select_from(RentalPayment).where(RentalPayment.rental_id == id)
+    payments_source = archive.with_archive(RentalPayment, include_archived)
+    conditions = [
+        payments_source.rental_id == id,
+        *listing.range_filters(
+            payments_source,
+            payment_date=(payment_date_from, payment_date_to),
+            create_time=(created_from, created_to),
+            amount=(amount_min, amount_max),
+        ),
+    ]
+    count_statement = select(func.count()).select_from(payments_source).where(*conditions)
     count = session.exec(count_statement).one()
     
-    statement = select(RentalPayment).where(RentalPayment.rental_id == id).order_by(RentalPayment.payment_date.desc(), RentalPayment.create_time.desc()).offset(skip).limit(limit)
+    statement = select(payments_source).where(*conditions).order_by(payments_source.payment_date.desc(), payments_source.create_time.desc()).offset(skip).limit(limit)
     payments = session.exec(statement).all()
     
     return RentalPaymentsPublic(data=payments, count=count)
 
 
+@router.get("/{id}/installments", response_model=InstallmentsPublic)
+def read_rental_installments(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+) -> Any:
+    """
+    Get the installment schedule for a rental.
+    """
+    _ = current_user
+    if not session.get(CarRental, id):
+        raise HTTPException(status_code=404, detail="Rental not found")
+    statement = select(Installment).where(Installment.rental_id == id).order_by(Installment.sequence)
+    installments = session.exec(statement).all()
+
+    return InstallmentsPublic(
+        data=[InstallmentPublic.model_validate(installment) for installment in installments],
+        count=len(installments),
+    )
+
+
 @router.post("/{id}/freeze", response_model=CarRentalPublic)
 def freeze_rental(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
     """
@@ -295,13 +435,15 @@ def freeze_rental(session: SessionDep, current_user: CurrentUser, id: uuid.UUID)
     rental.update_time = get_ny_time()
     
     # Free the car
-    if rental.car_id:
-        car = session.get(Car, rental.car_id)
-        if car:
-            car.status = "available"
-            session.add(car)
-            
+    crud.sync_current_contract(session=session, contract=rental)
+    crud.sync_installments(session=session, contract=rental)
+    reports.refresh_aging_snapshot(session=session, renter_id=rental.renter_id)
     session.add(rental)
+    webhooks.enqueue(
+        session,
+        "rental.frozen",
+        {"rental": CarRentalPublic.model_validate(rental).model_dump(mode="json")},
+    )
     session.commit()
     session.refresh(rental)
     
@@ -325,15 +467,9 @@ def delete_rental(session: SessionDep, current_user: CurrentUser, id: uuid.UUID)
     if not rental:
         raise HTTPException(status_code=404, detail="Rental not found")
         
-    # Optional: Should we set car status back to 'available' when rental is deleted?
-    # Usually yes, or if the rental was active.
-    # Let's check if it was active.
-    if rental.status == "active":
-        car = session.get(Car, rental.car_id)
-        if car:
-            car.status = "available"
-            session.add(car)
-            
+    # Free the car if this was its current rental
+    crud.sync_current_contract(session=session, contract=rental, deleted=True)
     session.delete(rental)
+    reports.refresh_aging_snapshot(session=session, renter_id=rental.renter_id)
     session.commit()
     return Message(message="Rental deleted successfully")
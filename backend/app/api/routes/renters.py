@@ -1,56 +1,99 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import func, or_, select
 
+from app import crud, reports
+from app.api import listing
+from app.api.caching import CachedResponse, cached
 from app.api.deps import CurrentUser, SessionDep
 from app.models import (
+    CarRental,
     Message,
+    PlateLease,
     Renter,
     RenterCreate,
     RenterPublic,
     RenterUpdate,
     RentersPublic,
+    normalize_license,
+    normalize_phone,
 )
 
 
 router = APIRouter(prefix="/renters", tags=["renters"])
 
+# Fields the list endpoint can sort by (each backed by an index on (field, id))
+RENTER_SORTS = ("full_name", "driver_license_number")
+
 
 @router.get("/", response_model=RentersPublic)
 def read_renters(
     session: SessionDep,
     current_user: CurrentUser,
+    cache: Annotated[CachedResponse, Depends(cached("renter"))],
     skip: int = 0,
     limit: int = 100,
     search: str | None = None,
+    phone: str | None = None,
+    driver_license_number: str | None = None,
+    order_by: str | None = None,
 ) -> Any:
+    """
+    Renters, optionally filtered by a free-text search, or by the start of a
+    phone or license number. Phone and license lookups ignore formatting
+    ("(718) 555" finds 7185550101) and are served by the indexes on the
+    normalized columns.
+    """
     _ = current_user
+    if response := cache.hit():
+        return response
     statement = select(Renter)
     if search:
+        matches = [
+            Renter.full_name.contains(search),
+            Renter.email.contains(search),
+            Renter.phone.contains(search),
+            Renter.driver_license_number.contains(search),
+        ]
+        if digits := normalize_phone(search):
+            matches.append(Renter.phone_normalized.contains(digits))
+        if license_key := normalize_license(search):
+            matches.append(Renter.driver_license_normalized.contains(license_key))
+        statement = statement.where(or_(*matches))
+    if phone_key := normalize_phone(phone):
+        statement = statement.where(*listing.prefix_filter(Renter.phone_normalized, phone_key))
+    if license_key := normalize_license(driver_license_number):
         statement = statement.where(
-            (Renter.full_name.contains(search))
-            | (Renter.email.contains(search))
-            | (Renter.phone.contains(search))
-            | (Renter.driver_license_number.contains(search))
+            *listing.prefix_filter(Renter.driver_license_normalized, license_key)
         )
     
     count_statement = select(func.count()).select_from(statement.subquery())
     count = session.exec(count_statement).one()
     
+    statement = statement.order_by(
+        *listing.order_by_clauses(order_by, source=Renter, allowed=RENTER_SORTS)
+    )
     statement = statement.offset(skip).limit(limit)
     renters = session.exec(statement).all()
-    return RentersPublic(data=renters, count=count)
+    return cache.store(RentersPublic(data=renters, count=count))
 
 
 @router.get("/{id}", response_model=RenterPublic)
-def read_renter(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+def read_renter(
+    session: SessionDep,
+    current_user: CurrentUser,
+    id: uuid.UUID,
+    cache: Annotated[CachedResponse, Depends(cached("renter"))],
+) -> Any:
     _ = current_user
+    if response := cache.hit():
+        return response
     renter = session.get(Renter, id)
     if not renter:
         raise HTTPException(status_code=404, detail="Renter not found")
-    return renter
+    return cache.store(RenterPublic.model_validate(renter))
 
 
 @router.post("/", response_model=RenterPublic)
@@ -89,6 +132,16 @@ def delete_renter(session: SessionDep, current_user: CurrentUser, id: uuid.UUID)
     renter = session.get(Renter, id)
     if not renter:
         raise HTTPException(status_code=404, detail="Renter not found")
+    # Contracts go with ON DELETE CASCADE; free the cars/plates they held first
+    for model in (CarRental, PlateLease):
+        contracts = session.exec(
+            select(model).where(
+                model.renter_id == id, model.status == "active", model.payment_status == "unpaid"
+            )
+        ).all()
+        for contract in contracts:
+            crud.sync_current_contract(session=session, contract=contract, deleted=True)
     session.delete(renter)
+    reports.refresh_aging_snapshot(session=session, renter_id=id)
     session.commit()
     return Message(message="Renter deleted successfully")
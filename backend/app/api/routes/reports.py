@@ -0,0 +1,57 @@
+from typing import Any
+
+from fastapi import APIRouter
+from sqlmodel import col, func, select
+
+from app.api.deps import CurrentUser, SessionDep
+from app.models import (
+    AgingReportPublic,
+    AgingSnapshot,
+    AgingSnapshotPublic,
+)
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+@router.get("/aging", response_model=AgingReportPublic)
+def read_aging_report(
+    session: SessionDep,
+    current_user: CurrentUser,
+    skip: int = 0,
+    limit: int = 100,
+    overdue_only: bool = False,
+) -> Any:
+    """
+    Receivables aging by renter, ranked by overdue exposure.
+
+    Served from the aging snapshot, rebuilt nightly and refreshed per renter
+    whenever a rental or lease is paid or changed.
+    """
+    _ = current_user
+    statement = select(AgingSnapshot)
+    if overdue_only:
+        statement = statement.where(AgingSnapshot.overdue_amount > 0)
+
+    count_statement = select(func.count()).select_from(statement.subquery())
+    count = session.exec(count_statement).one()
+
+    statement = (
+        statement.order_by(
+            col(AgingSnapshot.overdue_amount).desc(),
+            col(AgingSnapshot.total_amount).desc(),
+            AgingSnapshot.renter_id,
+        )
+        .offset(skip)
+        .limit(limit)
+    )
+    snapshots = session.exec(statement).all()
+
+    public_rows = []
+    for snapshot in snapshots:
+        public_row = AgingSnapshotPublic.model_validate(snapshot)
+        if snapshot.renter:
+            public_row.renter_name = snapshot.renter.full_name
+            public_row.renter_phone = snapshot.renter.phone
+        public_rows.append(public_row)
+
+    return AgingReportPublic(data=public_rows, count=count)
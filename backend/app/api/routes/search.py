@@ -0,0 +1,27 @@
+from typing import Any
+
+from fastapi import APIRouter
+
+from app import search_index
+from app.api.deps import CurrentUser, SessionDep
+from app.models import SearchResults
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/", response_model=SearchResults)
+def search(
+    session: SessionDep,
+    current_user: CurrentUser,
+    q: str,
+    limit: int = 20,
+) -> Any:
+    """
+    Renters, cars, plates, rentals and leases matching a plate number, VIN,
+    phone, license number or name, ranked, with the fields a result list shows.
+
+    Served from the search index, which every write keeps current.
+    """
+    _ = current_user
+    hits = search_index.search(session=session, q=q, limit=limit)
+    return SearchResults(data=hits, count=len(hits))
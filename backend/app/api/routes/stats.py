@@ -0,0 +1,34 @@
+from typing import Any
+
+from fastapi import APIRouter
+from sqlmodel import select
+
+from app.api.deps import CurrentUser, SessionDep
+from app.models import StatusCounter, StatusCounterPublic, StatusCountsPublic
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/counts", response_model=StatusCountsPublic)
+def read_status_counts(
+    session: SessionDep,
+    current_user: CurrentUser,
+    entity: str | None = None,
+) -> Any:
+    """
+    Number of cars, plates, rentals and leases per status/payment_status.
+
+    Served from the status counter, which every status change updates in
+    its own transaction, so no source table is scanned.
+    """
+    _ = current_user
+    statement = select(StatusCounter).where(StatusCounter.count != 0)
+    if entity:
+        statement = statement.where(StatusCounter.entity == entity)
+    counters = session.exec(
+        statement.order_by(StatusCounter.entity, StatusCounter.field, StatusCounter.value)
+    ).all()
+    return StatusCountsPublic(
+        data=[StatusCounterPublic.model_validate(counter) for counter in counters],
+        count=len(counters),
+    )
@@ -0,0 +1,34 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from app.api.deps import CurrentUser, SessionDep
+from app.models import SuggestionsPublic
+from app.suggest import SUGGEST_FIELDS, suggestions
+
+router = APIRouter(prefix="/suggest", tags=["suggest"])
+
+
+@router.get("/{field}", response_model=SuggestionsPublic)
+def suggest(
+    session: SessionDep,
+    current_user: CurrentUser,
+    field: str,
+    prefix: str = "",
+    limit: int = 10,
+) -> Any:
+    """
+    Distinct values of a car model, color, marker or renter name starting
+    with prefix (case-insensitive), for type-ahead.
+
+    Served from an in-memory sorted dictionary, without a database query.
+    """
+    _ = current_user
+    if field not in SUGGEST_FIELDS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No suggestions for '{field}'. Available: {', '.join(SUGGEST_FIELDS)}",
+        )
+    if not suggestions.loaded:
+        suggestions.load(session)
+    return SuggestionsPublic(data=suggestions.suggest(field, prefix, limit))
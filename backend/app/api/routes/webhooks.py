@@ -0,0 +1,122 @@
+import secrets
+import uuid
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import col, func, select
+
+from app import webhooks
+from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.models import (
+    Message,
+    Webhook,
+    WebhookCreate,
+    WebhookCreated,
+    WebhookDeliveriesPublic,
+    WebhookDelivery,
+    WebhookPublic,
+    WebhooksPublic,
+    WebhookUpdate,
+)
+
+router = APIRouter(
+    prefix="/webhooks",
+    tags=["webhooks"],
+    dependencies=[Depends(get_current_active_superuser)],
+)
+
+
+def _check_events(events: list[str] | None) -> None:
+    unknown = [name for name in events or () if name not in webhooks.WEBHOOK_EVENTS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown event(s): {', '.join(unknown)}. Allowed: {', '.join(webhooks.WEBHOOK_EVENTS)}",
+        )
+
+
+@router.get("/", response_model=WebhooksPublic)
+def read_webhooks(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+    """
+    Retrieve webhook subscriptions.
+    """
+    count = session.exec(select(func.count()).select_from(Webhook)).one()
+    webhook_list = session.exec(
+        select(Webhook).order_by(Webhook.create_time).offset(skip).limit(limit)
+    ).all()
+    return WebhooksPublic(data=webhook_list, count=count)
+
+
+@router.post("/", response_model=WebhookCreated)
+def create_webhook(
+    *, session: SessionDep, current_user: CurrentUser, webhook_in: WebhookCreate
+) -> Any:
+    """
+    Subscribe a URL to events (all of them when events is empty). Requests
+    are signed with the secret, which is only returned here.
+    """
+    _check_events(webhook_in.events)
+    webhook = Webhook.model_validate(
+        webhook_in,
+        update={
+            "secret": webhook_in.secret or secrets.token_urlsafe(32),
+            "create_by": current_user.email,
+        },
+    )
+    session.add(webhook)
+    session.commit()
+    session.refresh(webhook)
+    return webhook
+
+
+@router.put("/{id}", response_model=WebhookPublic)
+def update_webhook(*, session: SessionDep, id: uuid.UUID, webhook_in: WebhookUpdate) -> Any:
+    """
+    Update a webhook subscription.
+    """
+    webhook = session.get(Webhook, id)
+    if not webhook:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    _check_events(webhook_in.events)
+    webhook.sqlmodel_update(webhook_in.model_dump(exclude_unset=True))
+    session.add(webhook)
+    session.commit()
+    session.refresh(webhook)
+    return webhook
+
+
+@router.delete("/{id}")
+def delete_webhook(session: SessionDep, id: uuid.UUID) -> Message:
+    """
+    Delete a webhook subscription and its deliveries.
+    """
+    webhook = session.get(Webhook, id)
+    if not webhook:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    session.delete(webhook)
+    session.commit()
+    return Message(message="Webhook deleted successfully")
+
+
+@router.get("/{id}/deliveries", response_model=WebhookDeliveriesPublic)
+def read_webhook_deliveries(
+    session: SessionDep,
+    id: uuid.UUID,
+    status: str | None = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> Any:
+    """
+    Deliveries of a webhook, newest first, optionally by status (pending,
+    delivered, failed).
+    """
+    if not session.get(Webhook, id):
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    statement = select(WebhookDelivery).where(WebhookDelivery.webhook_id == id)
+    if status:
+        statement = statement.where(WebhookDelivery.status == status)
+    count = session.exec(select(func.count()).select_from(statement.subquery())).one()
+    deliveries = session.exec(
+        statement.order_by(col(WebhookDelivery.id).desc()).offset(skip).limit(limit)
+    ).all()
+    return WebhookDeliveriesPublic(data=deliveries, count=count)
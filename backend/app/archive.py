@@ -0,0 +1,150 @@
+import argparse
+import logging
+from datetime import datetime, time
+from typing import Any
+
+from sqlalchemy import DateTime, literal
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, delete, insert, select, union_all
+
+from app import changelog, crud, search_index, status_counts
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    CarRental,
+    CarRentalArchive,
+    Installment,
+    PlateLease,
+    PlateLeaseArchive,
+    PlatePayment,
+    PlatePaymentArchive,
+    RentalPayment,
+    RentalPaymentArchive,
+    get_ny_time,
+)
+
+logger = logging.getLogger(__name__)
+
+# Payment statuses of contracts that are closed and may be archived
+CLOSED_PAYMENT_STATUSES = ("paid", "cancel")
+
+# hot model -> archive model
+ARCHIVE_MODELS: dict[Any, Any] = {
+    CarRental: CarRentalArchive,
+    RentalPayment: RentalPaymentArchive,
+    PlateLease: PlateLeaseArchive,
+    PlatePayment: PlatePaymentArchive,
+}
+
+# (contract model, payment model, payment foreign key, installment foreign key)
+ARCHIVED_CONTRACTS: dict[str, tuple[Any, Any, Any, Any]] = {
+    "rental": (CarRental, RentalPayment, RentalPayment.rental_id, Installment.rental_id),
+    "lease": (PlateLease, PlatePayment, PlatePayment.lease_id, Installment.lease_id),
+}
+
+
+def _archive_columns(model: Any) -> list[str]:
+    return [column.name for column in model.__table__.columns]
+
+
+def with_archive(model: Any, include_archived: bool) -> Any:
+    """
+    Entity to query a hot table through: the model itself, or, with
+    include_archived, the model mapped over hot UNION ALL archive rows.
+    """
+    if not include_archived:
+        return model
+    archive_table = ARCHIVE_MODELS[model].__table__
+    columns = _archive_columns(model)
+    rows = union_all(
+        select(*[model.__table__.c[name] for name in columns]),
+        select(*[archive_table.c[name] for name in columns]),
+    ).subquery(f"{model.__tablename__}_all")
+    return aliased(model, rows)
+
+
+def get_with_archive(session: Session, model: Any, id: Any) -> Any:
+    """A hot table row by id, or its archived copy once it has been archived."""
+    return session.get(model, id) or session.get(ARCHIVE_MODELS[model], id)
+
+
+def _copy_rows(session: Session, model: Any, where: Any, archived_at: datetime | None) -> None:
+    archive_model = ARCHIVE_MODELS[model]
+    columns = _archive_columns(model)
+    values = [model.__table__.c[name] for name in columns]
+    if "archived_at" in archive_model.__table__.c:
+        columns = [*columns, "archived_at"]
+        values.append(literal(archived_at, DateTime()))
+    session.execute(
+        insert(archive_model).from_select(columns, select(*values).where(where))
+    )
+
+
+def archive_contracts(
+    *,
+    session: Session,
+    older_than_months: int | None = None,
+    chunk_size: int = 500,
+    now: datetime | None = None,
+) -> int:
+    """
+    Move paid/cancelled contracts last updated more than older_than_months
+    ago, and their payments, into the archive tables. Each chunk is copied
+    and deleted in its own transaction. Returns the number of contracts archived.
+    """
+    months = settings.ARCHIVE_AFTER_MONTHS if older_than_months is None else older_than_months
+    now = now or get_ny_time()
+    cutoff = datetime.combine(crud.add_months(now.date(), -months), time.min)
+
+    archived = 0
+    for entity, (model, payment_model, payment_fk, installment_fk) in ARCHIVED_CONTRACTS.items():
+        while True:
+            ids = session.exec(
+                select(model.id)
+                .where(
+                    col(model.payment_status).in_(CLOSED_PAYMENT_STATUSES),
+                    col(model.update_time) < cutoff,
+                )
+                .limit(chunk_size)
+            ).all()
+            if not ids:
+                break
+            _copy_rows(session, model, col(model.id).in_(ids), now)
+            _copy_rows(session, payment_model, col(payment_fk).in_(ids), None)
+            status_counts.remove_rows(session.connection(), model, col(model.id).in_(ids))
+            # Children are deleted explicitly so nothing is orphaned where
+            # foreign keys are not enforced. Settled installments are not archived.
+            session.execute(delete(Installment).where(col(installment_fk).in_(ids)))
+            session.execute(delete(payment_model).where(col(payment_fk).in_(ids)))
+            session.execute(delete(model).where(col(model.id).in_(ids)))
+            # Archived contracts are no longer search hits, and leave the change feed
+            search_index.index(session.connection(), entity, ids)
+            changelog.record_rows(session.connection(), entity, ids, "delete")
+            session.commit()
+            archived += len(ids)
+            logger.info("Archived %s %s rows", len(ids), model.__tablename__)
+    return archived
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Move closed rentals/leases and their payments to the archive tables"
+    )
+    parser.add_argument(
+        "--older-than-months", type=int, default=settings.ARCHIVE_AFTER_MONTHS
+    )
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        archived = archive_contracts(
+            session=session,
+            older_than_months=args.older_than_months,
+            chunk_size=args.chunk_size,
+        )
+    logger.info("Archived %s contracts", archived)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, col, delete, func, insert, select
+
+from app.core.config import settings
+from app.models import (
+    Car,
+    CarRental,
+    ChangeLog,
+    LicensePlate,
+    PlateLease,
+    PlatePayment,
+    RentalPayment,
+    Renter,
+    get_ny_time,
+)
+from app.status_counts import CASCADED_CONTRACTS
+
+# model -> entity name in the change feed
+TRACKED_MODELS: dict[Any, str] = {
+    Renter: "renter",
+    Car: "car",
+    LicensePlate: "plate",
+    CarRental: "rental",
+    PlateLease: "lease",
+    # Payments are recorded as they are made; they go away with their contract
+    RentalPayment: "rental_payment",
+    PlatePayment: "lease_payment",
+}
+MODEL_BY_ENTITY = {entity: model for model, entity in TRACKED_MODELS.items()}
+
+# session.info key of the contracts a flush deletes through ON DELETE CASCADE
+PENDING_CASCADES = "changelog_cascades"
+
+
+def record_rows(
+    connection: Connection, entity: str, ids: Iterable[uuid.UUID], op: str = "update"
+) -> None:
+    """
+    Append a change for each of the given rows of an entity, with the row
+    as it is now in the connection's transaction as the snapshot (none for
+    deletes). ORM flushes are recorded by the listeners; bulk statements
+    have to call this themselves.
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return
+    now = get_ny_time()
+    if op == "delete":
+        snapshots: dict[uuid.UUID, Any] = dict.fromkeys(ids)
+    else:
+        model = MODEL_BY_ENTITY[entity]
+        rows = connection.execute(select(model).where(col(model.id).in_(ids)))
+        snapshots = {row.id: jsonable_encoder(dict(row._mapping)) for row in rows}
+    connection.execute(
+        insert(ChangeLog),
+        [
+            {"entity": entity, "ref_id": id, "op": op, "snapshot": snapshot, "create_time": now}
+            for id, snapshot in snapshots.items()
+        ],
+    )
+
+
+def _collect_cascades(session: Session, _flush_context: Any, _instances: Any) -> None:
+    cascades: dict[str, set[uuid.UUID]] = session.info.setdefault(PENDING_CASCADES, defaultdict(set))
+    for obj in session.deleted:
+        for model, foreign_key in CASCADED_CONTRACTS.get(type(obj), ()):
+            cascades[TRACKED_MODELS[model]].update(
+                session.connection().execute(select(model.id).where(foreign_key == obj.id)).scalars()
+            )
+
+
+def _record_flush(session: Session, _flush_context: Any) -> None:
+    changes: dict[tuple[str, str], list[uuid.UUID]] = defaultdict(list)
+    for entity, ids in session.info.pop(PENDING_CASCADES, {}).items():
+        changes[(entity, "delete")].extend(ids)
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            entity = TRACKED_MODELS.get(type(obj))
+            if entity is None or (op == "update" and (obj in session.deleted or not session.is_modified(obj))):
+                continue
+            changes[(entity, op)].append(obj.id)
+    connection = session.connection()
+    for (entity, op), ids in changes.items():
+        record_rows(connection, entity, ids, op)
+
+
+def _discard_cascades(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop(PENDING_CASCADES, None)
+
+
+def register(session_class: type[Session]) -> None:
+    """Append the writes of every ORM flush to the change log, inside that flush."""
+    event.listen(session_class, "before_flush", _collect_cascades)
+    event.listen(session_class, "after_flush", _record_flush)
+    event.listen(session_class, "after_soft_rollback", _discard_cascades)
+
+
+def write_version(session: Session, entities: Iterable[str]) -> tuple[int, ...]:
+    """
+    Seq of the last change of each entity, which moves on with every write
+    to it in any worker. An entity whose changes were all pruned gets the
+    seq before the oldest change kept, which is past its last write too.
+    """
+    first_seq = select(func.min(ChangeLog.seq)).scalar_subquery()
+    versions = session.execute(
+        select(
+            *(
+                func.coalesce(
+                    select(func.max(ChangeLog.seq)).where(ChangeLog.entity == entity).scalar_subquery(),
+                    first_seq - 1,
+                    0,
+                )
+                for entity in entities
+            )
+        )
+    ).one()
+    return tuple(versions)
+
+
+def prune(*, session: Session, older_than_days: int | None = None, now: datetime | None = None) -> int:
+    """
+    Delete changes older than the retention period, always keeping the
+    newest so write versions never go back. Returns the number deleted.
+    """
+    days = settings.CHANGELOG_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or get_ny_time()) - timedelta(days=days)
+    last_seq = select(func.max(ChangeLog.seq)).scalar_subquery()
+    result = session.execute(
+        delete(ChangeLog).where(col(ChangeLog.create_time) < cutoff, col(ChangeLog.seq) < last_seq)
+    )
+    session.commit()
+    return result.rowcount
@@ -0,0 +1,392 @@
+import argparse
+import logging
+import re
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Engine, insert
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    STATUS_CODE_BY_VALUE,
+    STATUS_CODES,
+    UUID,
+    Car,
+    CarRental,
+    RentalPayment,
+    Renter,
+    StatusCode,
+    get_ny_time,
+    set_compact_storage,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _uuid_blob(value: Any) -> Any:
+    if value is None or isinstance(value, bytes):
+        return value
+    try:
+        return uuid.UUID(str(value)).bytes
+    except ValueError:
+        return value
+
+
+def _uuid_text(value: Any) -> Any:
+    if isinstance(value, bytes) and len(value) == 16:
+        return str(uuid.UUID(bytes=value))
+    return value
+
+
+def _status_code(value: Any) -> Any:
+    return STATUS_CODE_BY_VALUE.get(value, value)
+
+
+def _status_text(value: Any) -> Any:
+    if isinstance(value, int) and 0 <= value < len(STATUS_CODES):
+        return STATUS_CODES[value]
+    return value
+
+
+# SQL function used to convert a column, by (column kind, compact)
+CONVERTERS = {
+    ("uuid", True): "uuid_blob",
+    ("uuid", False): "uuid_text",
+    ("status", True): "status_code",
+    ("status", False): "status_text",
+}
+
+
+def _coded_columns(table: Any) -> dict[str, Any]:
+    return {
+        column.name: column
+        for column in table.columns
+        if isinstance(column.type, UUID | StatusCode)
+    }
+
+
+def _declared_type(column: Any, compact: bool) -> str:
+    if isinstance(column.type, UUID):
+        return "BLOB" if compact else "CHAR(36)"
+    if compact:
+        return "SMALLINT"
+    return f"VARCHAR({column.type.impl.length})"
+
+
+def _retype_table_sql(sql: str, columns: dict[str, Any], compact: bool) -> str:
+    """
+    Rewrite the declared type (and literal default) of the coded columns in
+    a CREATE TABLE statement, leaving constraints and everything else as is.
+    """
+
+    def retype(match: re.Match[str]) -> str:
+        column = columns[match.group("name")]
+        rest = match.group("rest")
+        if isinstance(column.type, StatusCode):
+            default = re.search(r"DEFAULT '([^']*)'|DEFAULT (\d+)", rest)
+            if default:
+                value = default.group(1) if default.group(1) is not None else int(default.group(2))
+                coded = _status_code(value) if compact else _status_text(value)
+                literal = str(coded) if isinstance(coded, int) else f"'{coded}'"
+                rest = rest[: default.start()] + f"DEFAULT {literal}" + rest[default.end() :]
+        return f"{match.group('lead')}{_declared_type(column, compact)}{rest}"
+
+    names = "|".join(re.escape(name) for name in columns)
+    pattern = rf'(?m)^(?P<lead>\s*"?(?P<name>{names})"?\s+)\w+(?:\(\d+\))?(?P<rest>[^\n]*)$'
+    return re.sub(pattern, retype, sql)
+
+
+def _retype_index_sql(sql: str, columns: dict[str, Any], compact: bool) -> str:
+    """Re-code status literals in the WHERE clause of a partial index."""
+    head, where, predicate = sql.partition(" WHERE ")
+    if not where:
+        return sql
+    names = "|".join(
+        re.escape(name) for name, column in columns.items() if isinstance(column.type, StatusCode)
+    )
+    if not names:
+        return sql
+    if compact:
+        predicate = re.sub(
+            rf"\b({names})(\s*=\s*)'([^']*)'",
+            lambda m: f"{m.group(1)}{m.group(2)}{_status_code(m.group(3))}"
+            if m.group(3) in STATUS_CODE_BY_VALUE
+            else m.group(0),
+            predicate,
+        )
+    else:
+        predicate = re.sub(
+            rf"\b({names})(\s*=\s*)(\d+)\b",
+            lambda m: f"{m.group(1)}{m.group(2)}'{_status_text(int(m.group(3)))}'",
+            predicate,
+        )
+    return f"{head}{where}{predicate}"
+
+
+def _convert_tables(connection: Any, compact: bool) -> list[str]:
+    """Rewrite each table not yet in the target encoding, with its indexes."""
+    converted = []
+    for table in SQLModel.metadata.sorted_tables:
+        columns = _coded_columns(table)
+        row = connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table.name,),
+        ).fetchone()
+        if not columns or row is None:
+            continue
+        table_sql = _retype_table_sql(row[0], columns, compact)
+        if table_sql == row[0]:
+            continue
+
+        new_name = f"{table.name}__converted"
+        index_sqls = [
+            _retype_index_sql(sql, columns, compact)
+            for (sql,) in connection.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                (table.name,),
+            )
+        ]
+        names = [name for (_, name, *_) in connection.execute(f'PRAGMA table_info("{table.name}")')]
+        selects = [
+            f'{CONVERTERS[("uuid" if isinstance(columns[name].type, UUID) else "status", compact)]}("{name}")'
+            if name in columns
+            else f'"{name}"'
+            for name in names
+        ]
+        quoted_names = ", ".join(f'"{name}"' for name in names)
+
+        connection.execute("BEGIN")
+        try:
+            connection.execute(
+                re.sub(
+                    r'^CREATE TABLE (IF NOT EXISTS )?"?\w+"?',
+                    f'CREATE TABLE "{new_name}"',
+                    table_sql,
+                )
+            )
+            connection.execute(
+                f'INSERT INTO "{new_name}" ({quoted_names}) '
+                f'SELECT {", ".join(selects)} FROM "{table.name}"'
+            )
+            connection.execute(f'DROP TABLE "{table.name}"')
+            connection.execute(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"')
+            for sql in index_sqls:
+                connection.execute(sql)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        converted.append(table.name)
+        logger.info("Converted %s", table.name)
+    return converted
+
+
+def convert(*, engine: Engine, compact: bool | None = None) -> list[str]:
+    """
+    Rewrite a SQLite database into the compact (or plain text) key and status
+    encoding, one table per transaction. Tables already in the target
+    encoding are skipped, so the conversion can be resumed. Returns the names
+    of the converted tables.
+
+    Writes from the application would mix encodings, so run it with the
+    application stopped, then restart with the matching COMPACT_STORAGE.
+    """
+    if engine.dialect.name != "sqlite":
+        raise ValueError("Compact storage only applies to SQLite databases")
+    compact = settings.COMPACT_STORAGE if compact is None else compact
+
+    raw_connection = engine.raw_connection()
+    try:
+        connection = raw_connection.driver_connection
+        isolation_level = connection.isolation_level
+        connection.isolation_level = None
+        connection.create_function("uuid_blob", 1, _uuid_blob, deterministic=True)
+        connection.create_function("uuid_text", 1, _uuid_text, deterministic=True)
+        connection.create_function("status_code", 1, _status_code, deterministic=True)
+        connection.create_function("status_text", 1, _status_text, deterministic=True)
+        # Keys are rewritten table by table, so references are briefly
+        # inconsistent, and dropping a table must not cascade to its children
+        (foreign_keys,) = connection.execute("PRAGMA foreign_keys").fetchone()
+        connection.execute("PRAGMA foreign_keys = OFF")
+        # Dropping a table drops its triggers, and renaming one re-parses
+        # every trigger body, so triggers are set aside for the rewrite and
+        # recreated once all tables are back under their own names
+        triggers = connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"
+        ).fetchall()
+        for name, _ in triggers:
+            connection.execute(f'DROP TRIGGER "{name}"')
+        try:
+            converted = _convert_tables(connection, compact)
+        finally:
+            for _, sql in triggers:
+                connection.execute(sql)
+
+        problems = connection.execute("PRAGMA foreign_key_check").fetchall()
+        if problems:
+            logger.warning("Foreign key check reported %s problems after conversion", len(problems))
+        connection.execute(f"PRAGMA foreign_keys = {foreign_keys}")
+        connection.isolation_level = isolation_level
+    finally:
+        raw_connection.close()
+    return converted
+
+
+def _seed(session: Session, *, payments: int, rentals: int, batch_size: int) -> None:
+    renters = [uuid.uuid4() for _ in range(max(rentals // 10, 1))]
+    cars = [uuid.uuid4() for _ in range(max(rentals // 10, 1))]
+    rental_ids = [uuid.uuid4() for _ in range(rentals)]
+    now = get_ny_time()
+    session.execute(
+        insert(Renter),
+        [
+            {
+                "id": renter_id,
+                "full_name": f"Renter {i}",
+                "phone": f"555{i:07d}",
+                "driver_license_number": f"D{i:07d}",
+                "driver_license_state": "NY",
+            }
+            for i, renter_id in enumerate(renters)
+        ],
+    )
+    session.execute(
+        insert(Car),
+        [
+            {"id": car_id, "car_id": i + 1, "model": "Sienna", "year": 2020, "wav": 0, "state": "NY", "status": "rented"}
+            for i, car_id in enumerate(cars)
+        ],
+    )
+    session.execute(
+        insert(CarRental),
+        [
+            {
+                "id": rental_id,
+                "car_id": cars[i % len(cars)],
+                "renter_id": renters[i % len(renters)],
+                "start_date": date(2024, 1, 1),
+                "frequency": "weekly",
+                # One active rental per car, as ux_carrental_active_car_id requires
+                "status": "active" if i < len(cars) else "completed",
+                "payment_status": "unpaid",
+                "rental_type": "lease",
+                "total_amount": Decimal("100000.00"),
+                "paid_amount": Decimal("0.00"),
+                "remaining_amount": Decimal("100000.00"),
+                "create_time": now,
+                "update_time": now,
+            }
+            for i, rental_id in enumerate(rental_ids)
+        ],
+    )
+    for start in range(0, payments, batch_size):
+        session.execute(
+            insert(RentalPayment),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "rental_id": rental_ids[i % rentals],
+                    "amount": Decimal("25.00"),
+                    "payment_date": date(2024, 1, 1) + timedelta(days=i % 700),
+                    "create_time": now,
+                }
+                for i in range(start, min(start + batch_size, payments))
+            ],
+        )
+    session.commit()
+
+
+JOIN_QUERY = (
+    "SELECT carrental.renter_id, SUM(rentalpayment.amount) FROM rentalpayment "
+    "JOIN carrental ON carrental.id = rentalpayment.rental_id GROUP BY carrental.renter_id"
+)
+
+
+def benchmark(
+    *, payments: int = 1_000_000, rentals: int = 10_000, directory: Path | None = None
+) -> dict[str, dict[str, float]]:
+    """
+    Seed identical databases in the text and compact encodings and compare
+    index/table size (from dbstat) and the payments-to-rentals join time.
+    """
+    compact_setting = settings.COMPACT_STORAGE
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        try:
+            for compact in (False, True):
+                mode = "compact" if compact else "text"
+                set_compact_storage(compact)
+                bench_engine = create_engine(f"sqlite:///{Path(tmp) / f'{mode}.db'}")
+                SQLModel.metadata.create_all(bench_engine)
+                with Session(bench_engine) as session:
+                    _seed(session, payments=payments, rentals=rentals, batch_size=50_000)
+                with bench_engine.connect() as connection:
+                    sizes = dict(
+                        connection.exec_driver_sql(
+                            "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"
+                        ).all()
+                    )
+                    index_names = connection.exec_driver_sql(
+                        "SELECT name FROM sqlite_master WHERE type = 'index' "
+                        "AND tbl_name IN ('carrental', 'rentalpayment')"
+                    ).scalars().all()
+                    timings = []
+                    for _ in range(3):
+                        started = time.perf_counter()
+                        connection.exec_driver_sql(JOIN_QUERY).all()
+                        timings.append(time.perf_counter() - started)
+                bench_engine.dispose()
+                results[mode] = {
+                    "index_bytes": sum(sizes.get(name, 0) for name in index_names),
+                    "table_bytes": sizes.get("carrental", 0) + sizes.get("rentalpayment", 0),
+                    "join_seconds": min(timings),
+                }
+                logger.info("%s: %s", mode, results[mode])
+        finally:
+            set_compact_storage(compact_setting)
+    return results
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Compact SQLite storage encoding")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    convert_parser = subparsers.add_parser(
+        "convert", help="convert the database to the COMPACT_STORAGE encoding"
+    )
+    convert_parser.add_argument(
+        "--to", choices=("compact", "text"), help="override COMPACT_STORAGE"
+    )
+    benchmark_parser = subparsers.add_parser(
+        "benchmark", help="compare index size and join speed of both encodings"
+    )
+    benchmark_parser.add_argument("--payments", type=int, default=1_000_000)
+    benchmark_parser.add_argument("--rentals", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        compact = None if args.to is None else args.to == "compact"
+        tables = convert(engine=engine, compact=compact)
+        logger.info("Converted %s tables", len(tables))
+    else:
+        results = benchmark(payments=args.payments, rentals=args.rentals)
+        text, compact = results["text"], results["compact"]
+        for key in ("index_bytes", "table_bytes", "join_seconds"):
+            logger.info(
+                "%s: text %s, compact %s (%.0f%%)",
+                key,
+                text[key],
+                compact[key],
+                100 * compact[key] / text[key] if text[key] else 0,
+            )
+
+
+if __name__ == "__main__":
+    main()
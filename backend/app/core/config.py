@@ -56,12 +56,14 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
 
+    SQLITE_FILE: str = "./car_rental.db"
+
     # 替换原有的SQLALCHEMY_DATABASE_URI配置
     @computed_field  # type: ignore[prop-decorator]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
         # 使用SQLite数据库文件
-        return "sqlite:///./car_rental.db"
+        return f"sqlite:///{self.SQLITE_FILE}"
 
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
@@ -86,6 +88,48 @@ class Settings(BaseSettings):
         return bool(self.SMTP_HOST and self.EMAILS_FROM_EMAIL)
 
     EMAIL_TEST_USER: EmailStr = "test@example.com"
+
+    # In-process scheduled jobs, run daily at NIGHTLY_JOBS_HOUR New York time
+    SCHEDULER_ENABLED: bool = True
+    NIGHTLY_JOBS_HOUR: int = 2
+    # Horizon of the daily registration/insurance expiry digest
+    EXPIRY_DIGEST_WITHIN_DAYS: int = 30
+    # Documents that lapsed longer ago than this drop out of the digest
+    EXPIRY_DIGEST_LOOKBACK_DAYS: int = 30
+    # Let the nightly reconciliation fix paid/remaining and status counter drift,
+    # not just report it
+    RECONCILE_AUTO_REPAIR: bool = False
+    # Paid/cancelled contracts untouched for this long move to the archive tables
+    ARCHIVE_AFTER_MONTHS: int = 12
+    # Changes older than this are pruned from the change feed; clients that
+    # fall further behind re-download instead
+    CHANGELOG_RETENTION_DAYS: int = 30
+    # Server-sent events: how often each worker reads changes committed by
+    # other workers, and the keepalive interval of idle streams
+    EVENTS_POLL_SECONDS: float = 1.0
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    # GET responses of the main lists and records kept per worker, served
+    # while the write versions of their entities are unchanged
+    RESPONSE_CACHE_SIZE: int = 500
+    # Responses at least this large are sent Brotli (when installed) or gzip
+    # compressed to clients that accept it
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    # Outbound webhooks: deliveries sent concurrently per batch, the request
+    # timeout, and how often each worker looks for deliveries due for retry.
+    # Failed deliveries are retried after WEBHOOK_RETRY_SECONDS, doubling up to
+    # WEBHOOK_RETRY_MAX_SECONDS, for WEBHOOK_MAX_ATTEMPTS attempts in all.
+    WEBHOOK_BATCH_SIZE: int = 50
+    WEBHOOK_TIMEOUT_SECONDS: float = 10.0
+    WEBHOOK_POLL_SECONDS: float = 5.0
+    WEBHOOK_RETRY_SECONDS: float = 30.0
+    WEBHOOK_RETRY_MAX_SECONDS: float = 6 * 3600
+    WEBHOOK_MAX_ATTEMPTS: int = 10
+    # Sent and failed deliveries older than this are pruned
+    WEBHOOK_RETENTION_DAYS: int = 30
+    # SQLite only: store UUID keys as 16-byte BLOBs and statuses as small-int
+    # codes. Convert an existing database with `python -m app.compact_storage convert`
+    COMPACT_STORAGE: bool = False
+
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
 
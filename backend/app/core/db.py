@@ -1,6 +1,22 @@
-from sqlmodel import Session, create_engine, select
+from pathlib import Path
 
-from app import crud
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import (
+    changelog,
+    crud,
+    events,
+    plate_search,
+    search_index,
+    status_counts,
+    suggest,
+    webhooks,
+)
 from app.core.config import settings
 from app.models import User, UserCreate
 
@@ -12,19 +28,62 @@ engine = create_engine(
 )
 
 
+@event.listens_for(engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, _connection_record):
+    # SQLite默认不检查外键：开启后ON DELETE CASCADE才会生效
+    if engine.dialect.name == "sqlite":
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+# The trigram indexes are not models: create_all makes them after the tables
+event.listen(SQLModel.metadata, "after_create", plate_search.create_index)
+event.listen(SQLModel.metadata, "after_create", search_index.create_index)
+
+# Status counter changes are written inside the flush that changes the status
+status_counts.register(Session)
+# Search entries are rewritten inside the flush that writes their rows
+search_index.register(Session)
+# Committed writes update the in-memory suggestion dictionary
+suggest.register(Session)
+# Every write is appended to the change feed in its own transaction
+changelog.register(Session)
+# Committed changes wake the event stream of this process
+events.register(Session)
+# Committed webhook deliveries wake the dispatcher of this process
+webhooks.register(Session)
+
+
 # make sure all SQLModel models are imported (app.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
 # for more details: https://github.com/fastapi/full-stack-fastapi-template/issues/28
 
 
+def upgrade_db() -> None:
+    """
+    Bring a database that carries an Alembic revision to head. Databases made
+    by create_all have no revision and are left to create_all.
+    """
+    config = Config(str(Path(__file__).parents[2] / "alembic.ini"))
+    config.set_main_option("script_location", str(Path(__file__).parents[1] / "alembic"))
+    # Keep the logging set up by the app
+    config.attributes["configure_logger"] = False
+    with engine.connect() as connection:
+        revision = MigrationContext.configure(connection).get_current_revision()
+    if revision is not None and revision != ScriptDirectory.from_config(config).get_current_head():
+        command.upgrade(config, "head")
+
+
 def init_db(session: Session) -> None:
     # Tables should be created with Alembic migrations
     # But if you don't want to use migrations, create
     # the tables un-commenting the next lines
-    from sqlmodel import SQLModel
-
     # This works because the models are already imported and registered from app.models
+    upgrade_db()
     SQLModel.metadata.create_all(engine)
+    # Contracts made before the installment table existed get their schedule
+    crud.backfill_installments(session=session)
 
     user = session.exec(
         select(User).where(User.email == settings.FIRST_SUPERUSER)
@@ -0,0 +1,69 @@
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.models import get_ny_time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DailyJob:
+    name: str
+    func: Callable[[], None]
+    hour: int
+    minute: int = 0
+
+    def next_run(self, now: datetime) -> datetime:
+        run = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if run <= now:
+            run += timedelta(days=1)
+        return run
+
+
+class Scheduler:
+    """
+    Minimal in-process scheduler running daily jobs (New York time) on a
+    background thread. Every worker process runs its own scheduler, so jobs
+    must be safe to run more than once per day.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: list[DailyJob] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add_daily_job(
+        self, name: str, func: Callable[[], None], *, hour: int, minute: int = 0
+    ) -> None:
+        self.jobs.append(DailyJob(name=name, func=func, hour=hour, minute=minute))
+
+    def start(self) -> None:
+        if self._thread is not None or not self.jobs:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        now = get_ny_time()
+        schedule = {job.name: job.next_run(now) for job in self.jobs}
+        while not self._stop.is_set():
+            job = min(self.jobs, key=lambda job: schedule[job.name])
+            delay = (schedule[job.name] - get_ny_time()).total_seconds()
+            if delay > 0 and self._stop.wait(delay):
+                return
+            logger.info("Running scheduled job %s", job.name)
+            try:
+                job.func()
+            except Exception:
+                logger.exception("Scheduled job %s failed", job.name)
+            schedule[job.name] = job.next_run(get_ny_time())
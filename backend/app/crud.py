@@ -1,10 +1,27 @@
+import calendar
 import uuid
+from datetime import date, timedelta
+from decimal import ROUND_DOWN, Decimal
 from typing import Any
 
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update
 
+from app import changelog
 from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.models import (
+    CENT,
+    Car,
+    CarRental,
+    Installment,
+    Item,
+    ItemCreate,
+    LicensePlate,
+    PlateLease,
+    User,
+    UserCreate,
+    UserUpdate,
+)
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -52,3 +69,215 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -
     session.commit()
     session.refresh(db_item)
     return db_item
+
+
+# Contract fields that change the shape of an installment schedule
+SCHEDULE_FIELDS = {"start_date", "end_date", "frequency", "total_amount"}
+
+INSTALLMENT_INTERVALS = {
+    "daily": timedelta(days=1),
+    "weekly": timedelta(weeks=1),
+    "biweekly": timedelta(weeks=2),
+}
+
+
+def add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year = day.year + month_index // 12
+    month = month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    return day.replace(year=year, month=month, day=min(day.day, last_day))
+
+
+def installment_due_dates(
+    *, start_date: date, end_date: date | None, frequency: str
+) -> list[date]:
+    """
+    Due dates from start_date (inclusive) up to end_date (exclusive).
+
+    Open-ended contracts and unknown frequencies get a single installment
+    due on the start date.
+    """
+    if end_date is None or end_date <= start_date:
+        return [start_date]
+    if frequency == "monthly":
+        dates = []
+        while (due := add_months(start_date, len(dates))) < end_date:
+            dates.append(due)
+        return dates
+    interval = INSTALLMENT_INTERVALS.get(frequency)
+    if interval is None:
+        return [start_date]
+    dates = []
+    due = start_date
+    while due < end_date:
+        dates.append(due)
+        due += interval
+    return dates
+
+
+def split_amount(total: Decimal, parts: int) -> list[Decimal]:
+    """Split total into parts, putting the rounding remainder on the last one."""
+    share = (total / parts).quantize(CENT, rounding=ROUND_DOWN)
+    amounts = [share] * (parts - 1)
+    amounts.append(total - sum(amounts, Decimal(0)))
+    return amounts
+
+
+def allocate_paid(amounts: list[Decimal], paid: Decimal) -> list[Decimal]:
+    """Allocate a paid total to installments, oldest first."""
+    allocated = []
+    for amount in amounts:
+        portion = min(amount, max(paid, Decimal(0)))
+        allocated.append(portion)
+        paid -= portion
+    return allocated
+
+
+def installment_status(*, amount: Decimal, paid_amount: Decimal, cancelled: bool) -> str:
+    if paid_amount >= amount:
+        return "paid"
+    if cancelled:
+        return "cancel"
+    if paid_amount > 0:
+        return "partial"
+    return "unpaid"
+
+
+def sync_installments(
+    *, session: Session, contract: CarRental | PlateLease, regenerate: bool = False
+) -> None:
+    """
+    Keep a rental/lease installment schedule in step with the contract.
+
+    The schedule is rebuilt when regenerate is set (new contract or a change
+    to SCHEDULE_FIELDS); the contract paid_amount is then allocated to it.
+    """
+    if regenerate or not contract.installments:
+        due_dates = installment_due_dates(
+            start_date=contract.start_date,
+            end_date=contract.end_date,
+            frequency=contract.frequency,
+        )
+        amounts = split_amount(contract.total_amount, len(due_dates))
+        contract_key = "rental_id" if isinstance(contract, CarRental) else "lease_id"
+        contract.installments = [
+            Installment(
+                sequence=sequence,
+                due_date=due_date,
+                amount=amount,
+                renter_id=contract.renter_id,
+                **{contract_key: contract.id},
+            )
+            for sequence, (due_date, amount) in enumerate(
+                zip(due_dates, amounts, strict=True), 1
+            )
+        ]
+
+    cancelled = contract.payment_status == "cancel"
+    allocated = allocate_paid(
+        [installment.amount for installment in contract.installments],
+        contract.paid_amount,
+    )
+    for installment, paid_amount in zip(contract.installments, allocated, strict=True):
+        installment.paid_amount = paid_amount
+        installment.status = installment_status(
+            amount=installment.amount, paid_amount=paid_amount, cancelled=cancelled
+        )
+        session.add(installment)
+
+
+def backfill_installments(*, session: Session) -> int:
+    """
+    Build the schedule of every rental and lease that has none, such as
+    contracts made before schedules existed. Returns the number of contracts
+    scheduled.
+    """
+    scheduled = 0
+    for model in (CarRental, PlateLease):
+        contracts = session.exec(select(model).where(~model.installments.any())).all()
+        for contract in contracts:
+            sync_installments(session=session, contract=contract, regenerate=True)
+        scheduled += len(contracts)
+    if scheduled:
+        session.commit()
+    return scheduled
+
+
+def is_open_contract(contract: CarRental | PlateLease) -> bool:
+    return contract.status == "active" and contract.payment_status == "unpaid"
+
+
+def sync_current_contract(
+    *, session: Session, contract: CarRental | PlateLease, deleted: bool = False
+) -> None:
+    """
+    Keep the car/plate current contract pointer and status in step with a
+    rental/lease, in the caller's transaction.
+
+    An open contract becomes the current one and marks its car/plate rented;
+    once it closes (paid, frozen, deactivated or deleted) the pointer is
+    cleared and the car/plate is available again.
+    """
+    if isinstance(contract, CarRental):
+        holder = session.get(Car, contract.car_id)
+        pointer = "current_rental_id"
+    else:
+        holder = session.get(LicensePlate, contract.plate_id)
+        pointer = "current_lease_id"
+    if holder is None:
+        return
+    if not deleted and is_open_contract(contract):
+        # The contract row has to exist before the car/plate can point at it
+        session.flush()
+        setattr(holder, pointer, contract.id)
+        holder.status = "rented"
+    elif getattr(holder, pointer) == contract.id:
+        setattr(holder, pointer, None)
+        holder.status = "available"
+    else:
+        return
+    session.add(holder)
+
+
+def link_car_plate(*, car: Car) -> None:
+    """Point a car at the license plate registered under its plate_number, if any."""
+    if car.plate_number is None:
+        car.plate_id = None
+    else:
+        car.plate_id = (
+            select(LicensePlate.id)
+            .where(LicensePlate.plate_number == car.plate_number)
+            .scalar_subquery()
+        )
+
+
+def link_plate_cars(*, session: Session, plate: LicensePlate) -> None:
+    """Re-link cars to a created/renumbered license plate by plate_number."""
+    unlinked = session.execute(
+        update(Car)
+        .where(Car.plate_id == plate.id, Car.plate_number != plate.plate_number)
+        .values(plate_id=None)
+        .returning(Car.id)
+    ).scalars().all()
+    linked = session.execute(
+        update(Car)
+        .where(Car.plate_number == plate.plate_number)
+        .values(plate_id=plate.id)
+        .returning(Car.id)
+    ).scalars().all()
+    changelog.record_rows(session.connection(), "car", [*unlinked, *linked])
+
+
+def is_unique_violation(
+    error: IntegrityError, *, table: str, column: str, constraint: str
+) -> bool:
+    """
+    Whether an IntegrityError was raised by the given unique index/constraint.
+
+    SQLite only reports the offending "table.column", PostgreSQL the constraint name.
+    """
+    diag = getattr(error.orig, "diag", None)
+    if diag is not None and getattr(diag, "constraint_name", None):
+        return diag.constraint_name == constraint
+    return f"UNIQUE constraint failed: {table}.{column}" in str(error.orig)
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import threading
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from anyio import to_thread
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Engine, event
+from sqlmodel import Session, col, func, select
+
+from app.changelog import TRACKED_MODELS
+from app.core.config import settings
+from app.models import ChangeLog
+
+logger = logging.getLogger(__name__)
+
+# topic -> change feed entities published on it
+TOPICS: dict[str, tuple[str, ...]] = {
+    "cars": ("car",),
+    "plates": ("plate",),
+    "renters": ("renter",),
+    "rentals": ("rental",),
+    "leases": ("lease",),
+    "payments": ("rental_payment", "lease_payment"),
+}
+TOPIC_BY_ENTITY = {entity: topic for topic, entities in TOPICS.items() for entity in entities}
+
+# Events queued per subscriber before it is cut off to resume from the log
+QUEUE_SIZE = 1000
+# Changes replayed at most for a reconnecting subscriber
+BACKLOG_LIMIT = 1000
+
+# session.info key set when a flush wrote to the change log
+CHANGES_WRITTEN = "events_changes_written"
+
+
+def format_event(change: ChangeLog) -> str:
+    """SSE message of a change: its seq is the event id a client resumes from."""
+    data = {
+        "seq": change.seq,
+        "entity": change.entity,
+        "id": change.ref_id,
+        "op": change.op,
+        "snapshot": change.snapshot,
+    }
+    return (
+        f"id: {change.seq}\n"
+        f"event: {TOPIC_BY_ENTITY[change.entity]}\n"
+        f"data: {json.dumps(jsonable_encoder(data))}\n\n"
+    )
+
+
+@dataclass(eq=False)
+class Subscription:
+    topics: frozenset[str]
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[tuple[int, str]]
+    overflowed: bool = False
+
+
+class EventBroker:
+    """
+    Fans change log entries out to the event stream subscribers of this
+    worker process. A tail thread reads the change log, which every worker
+    writes in the transaction of the change, so subscribers see commits of
+    all workers: at once for this process's own commits, which wake the
+    thread, and within EVENTS_POLL_SECONDS for the others.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._engine: Engine | None = None
+        self.last_seq = 0
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None:
+            return
+        self._engine = engine
+        with Session(engine) as session:
+            self.last_seq = session.exec(select(func.max(ChangeLog.seq))).one() or 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-broker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def notify(self) -> None:
+        """Read the change log now rather than at the next poll."""
+        self._wake.set()
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        subscription = Subscription(
+            topics=frozenset(topics),
+            loop=asyncio.get_running_loop(),
+            queue=asyncio.Queue(maxsize=QUEUE_SIZE),
+        )
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(settings.EVENTS_POLL_SECONDS)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self._publish_new_changes()
+            except Exception:
+                logger.exception("Reading the change log for the event stream failed")
+
+    def _publish_new_changes(self) -> None:
+        assert self._engine is not None
+        with Session(self._engine) as session:
+            last_seq = session.exec(select(func.max(ChangeLog.seq))).one() or 0
+            with self._lock:
+                idle = not self._subscribers
+            if idle or last_seq == self.last_seq:
+                # Nobody to tell: skip ahead instead of reading the changes
+                self.last_seq = last_seq
+                return
+            changes = session.exec(
+                select(ChangeLog)
+                .where(col(ChangeLog.seq) > self.last_seq)
+                .order_by(ChangeLog.seq)
+                .limit(BACKLOG_LIMIT)
+            ).all()
+        for change in changes:
+            self.last_seq = change.seq
+            topic = TOPIC_BY_ENTITY.get(change.entity)
+            if topic is None:
+                continue
+            message = format_event(change)
+            with self._lock:
+                subscribers = [s for s in self._subscribers if topic in s.topics]
+            for subscription in subscribers:
+                subscription.loop.call_soon_threadsafe(
+                    _deliver, subscription, change.seq, message
+                )
+        if len(changes) == BACKLOG_LIMIT:
+            self._wake.set()
+
+
+def _deliver(subscription: Subscription, seq: int, message: str) -> None:
+    try:
+        subscription.queue.put_nowait((seq, message))
+    except asyncio.QueueFull:
+        subscription.overflowed = True
+
+
+broker = EventBroker()
+
+
+def _backlog(engine: Engine, topics: Iterable[str], after: int) -> list[tuple[int, str]]:
+    entities = [entity for topic in topics for entity in TOPICS[topic]]
+    with Session(engine) as session:
+        changes = session.exec(
+            select(ChangeLog)
+            .where(col(ChangeLog.seq) > after, col(ChangeLog.entity).in_(entities))
+            .order_by(ChangeLog.seq)
+            .limit(BACKLOG_LIMIT)
+        ).all()
+    return [(change.seq, format_event(change)) for change in changes]
+
+
+async def stream(
+    *,
+    engine: Engine,
+    topics: Iterable[str],
+    last_event_id: int | None = None,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    """
+    SSE messages for the given topics until the client disconnects. With
+    last_event_id, changes after it are replayed from the change log first.
+    A subscriber that falls QUEUE_SIZE events behind is disconnected, to
+    resume from its last event id.
+    """
+    topics = frozenset(topics)
+    subscription = broker.subscribe(topics)
+    try:
+        yield "retry: 3000\n\n"
+        sent = 0
+        if last_event_id is not None:
+            for seq, message in await to_thread.run_sync(_backlog, engine, topics, last_event_id):
+                yield message
+                sent = seq
+        while not await is_disconnected():
+            try:
+                seq, message = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if seq <= sent:
+                continue
+            yield message
+            if subscription.overflowed and subscription.queue.empty():
+                break
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _mark_changes(session: Session, _flush_context: Any) -> None:
+    if any(type(obj) in TRACKED_MODELS for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[CHANGES_WRITTEN] = True
+
+
+def _notify_broker(session: Session) -> None:
+    if session.info.pop(CHANGES_WRITTEN, False):
+        broker.notify()
+
+
+def _forget_changes(session: Session) -> None:
+    session.info.pop(CHANGES_WRITTEN, None)
+
+
+def register(session_class: type[Session]) -> None:
+    """Wake this process's broker when a transaction that wrote changes commits."""
+    event.listen(session_class, "after_flush", _mark_changes)
+    event.listen(session_class, "after_commit", _notify_broker)
+    event.listen(session_class, "after_rollback", _forget_changes)
@@ -0,0 +1,77 @@
+from sqlmodel import Session
+
+from app import archive, changelog, reconcile, reports, status_counts, webhooks
+from app.core.config import settings
+from app.core.db import engine
+from app.core.scheduler import Scheduler
+from app.suggest import suggestions
+
+
+def rebuild_aging_snapshot() -> None:
+    with Session(engine) as session:
+        reports.rebuild_aging_snapshot(session=session)
+
+
+def write_expiry_digest() -> None:
+    with Session(engine) as session:
+        reports.write_expiry_digest(session=session)
+
+
+def archive_contracts() -> None:
+    with Session(engine) as session:
+        archive.archive_contracts(session=session)
+
+
+def reconcile_payments() -> None:
+    with Session(engine) as session:
+        reconcile.reconcile(session=session, repair=settings.RECONCILE_AUTO_REPAIR)
+
+
+def verify_status_counts() -> None:
+    with Session(engine) as session:
+        status_counts.verify(session=session, rebuild=settings.RECONCILE_AUTO_REPAIR)
+
+
+def prune_changelog() -> None:
+    with Session(engine) as session:
+        changelog.prune(session=session)
+
+
+def prune_webhook_deliveries() -> None:
+    with Session(engine) as session:
+        webhooks.prune(session=session)
+
+
+def reload_suggestions() -> None:
+    # Picks up writes made by other worker processes
+    with Session(engine) as session:
+        suggestions.load(session)
+
+
+scheduler = Scheduler()
+# Jobs due at the same time run in registration order: reconcile balances
+# before the aging snapshot is rebuilt from them
+scheduler.add_daily_job(
+    "reconcile_payments", reconcile_payments, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "aging_snapshot", rebuild_aging_snapshot, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "expiry_digest", write_expiry_digest, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "archive_contracts", archive_contracts, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "status_counts", verify_status_counts, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "suggestions", reload_suggestions, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "changelog_prune", prune_changelog, hour=settings.NIGHTLY_JOBS_HOUR
+)
+scheduler.add_daily_job(
+    "webhook_deliveries_prune", prune_webhook_deliveries, hour=settings.NIGHTLY_JOBS_HOUR
+)
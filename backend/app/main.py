@@ -1,9 +1,20 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from sqlmodel import Session
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.compression import CompressionMiddleware
 from app.api.main import api_router
+from app.api.responses import FastJSONResponse
 from app.core.config import settings
+from app.core.db import engine
+from app.events import broker
+from app.jobs import scheduler
+from app.suggest import suggestions
+from app.webhooks import dispatcher
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,12 +25,31 @@ if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     import sentry_sdk
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    with Session(engine) as session:
+        suggestions.load(session)
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+    broker.start(engine)
+    dispatcher.start(engine)
+    yield
+    dispatcher.stop()
+    broker.stop()
+    scheduler.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
+app.add_middleware(CompressionMiddleware)
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     app.add_middleware(
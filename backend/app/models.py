@@ -1,44 +1,167 @@
+import re
 import uuid
 from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
 from zoneinfo import ZoneInfo
 
+from sqlalchemy import JSON, BigInteger, ForeignKey, Index, LargeBinary, SmallInteger, String, event
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from sqlalchemy.types import CHAR, TypeDecorator
 from sqlmodel import Field, Relationship, SQLModel
 
-from pydantic import EmailStr
+from pydantic import EmailStr, field_serializer
+
+from app.core.config import settings
 
 def get_ny_time():
     """Get current time in New York timezone as naive datetime (local time)"""
     return datetime.now(ZoneInfo("America/New_York")).replace(tzinfo=None)
 
-class UUID(TypeDecorator):
+class CompactStorageType(TypeDecorator):
+    """
+    Type with a compact SQLite encoding. Subclasses take the encoding as the
+    constructor argument compact (COMPACT_STORAGE by default) and keep it in
+    self.compact, which makes it part of the type's cache key: statements
+    compiled for one encoding are never reused for the other.
+    """
+    cache_ok = True
+
+    def is_compact(self, dialect) -> bool:
+        return self.compact and dialect.name == "sqlite"
+
+
+class UUID(CompactStorageType):
     impl = CHAR
     cache_ok = True
 
+    def __init__(self, compact: bool | None = None):
+        super().__init__()
+        self.compact = settings.COMPACT_STORAGE if compact is None else compact
+
     def load_dialect_impl(self, dialect):
-        # PostgreSQL用原生UUID，SQLite转为CHAR(36)字符串存储
+        # PostgreSQL用原生UUID，SQLite转为CHAR(36)字符串存储，紧凑模式下为16字节BLOB
         if dialect.name == "postgresql":
             return dialect.type_descriptor(PG_UUID())
+        elif self.is_compact(dialect):
+            return dialect.type_descriptor(LargeBinary(16))
         else:
             return dialect.type_descriptor(CHAR(36))
 
     def process_bind_param(self, value, dialect):
-        # 存入数据库时：UUID对象转字符串
+        # 存入数据库时：UUID对象转字符串（紧凑模式下转16字节）
         if value is None:
             return value
+        if self.is_compact(dialect):
+            return (value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))).bytes
         return str(value) if isinstance(value, uuid.UUID) else value
 
     def process_result_value(self, value, dialect):
-        # 从数据库读取时：字符串转回UUID对象
+        # 从数据库读取时：字符串或16字节转回UUID对象（两种编码都能读）
         if value is None:
             return value
+        if isinstance(value, bytes):
+            return uuid.UUID(bytes=value)
         try:
             return uuid.UUID(value)
         except ValueError:
             return value
 
 
+# Dictionary for coded status columns. Codes are positions in this tuple, so
+# new values may only be appended.
+STATUS_CODES = (
+    "available",
+    "rented",
+    "maintenance",
+    "inactive",
+    "active",
+    "cancel",
+    "unpaid",
+    "partial",
+    "paid",
+    "lease",
+    "lease_to_own",
+    "daily",
+    "weekly",
+    "biweekly",
+    "monthly",
+)
+STATUS_CODE_BY_VALUE = {value: code for code, value in enumerate(STATUS_CODES)}
+
+
+class StatusCode(CompactStorageType):
+    """Status/enum-like text, stored as a small integer code in compact mode."""
+    impl = String
+    cache_ok = True
+
+    def __init__(self, length: int | None = None, compact: bool | None = None):
+        super().__init__(length)
+        self.compact = settings.COMPACT_STORAGE if compact is None else compact
+
+    def load_dialect_impl(self, dialect):
+        if self.is_compact(dialect):
+            return dialect.type_descriptor(SmallInteger())
+        return dialect.type_descriptor(self.impl)
+
+    def process_bind_param(self, value, dialect):
+        # 紧凑模式：已知状态存为编码，未知值原样存储（SQLite允许）
+        if value is None or not self.is_compact(dialect):
+            return value
+        return STATUS_CODE_BY_VALUE.get(value, value)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, int):
+            return STATUS_CODES[value]
+        return value
+
+
+def set_compact_storage(compact: bool) -> None:
+    """
+    Set COMPACT_STORAGE and switch the key and status columns of every table
+    to that encoding, for scripts and tests that use both encodings in one
+    process. Engines used before the switch must not be used after it.
+    """
+    settings.COMPACT_STORAGE = compact
+    for table in SQLModel.metadata.tables.values():
+        for column in table.columns:
+            if isinstance(column.type, CompactStorageType) and column.type.compact != compact:
+                column.type.compact = compact
+                # The cache key is memoized on first use
+                column.type.__dict__.pop("_static_cache_key", None)
+
+
+CENT = Decimal("0.01")
+
+
+class Cents(TypeDecorator):
+    """Money stored as an integer number of cents, exposed as a 2-place Decimal."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        # 存入数据库时：金额转为整数分
+        if value is None:
+            return value
+        if isinstance(value, float):
+            value = Decimal(str(value))
+        return int((Decimal(value) / CENT).to_integral_value(rounding=ROUND_HALF_UP))
+
+    def process_result_value(self, value, dialect):
+        # 从数据库读取时：整数分转回Decimal
+        if value is None:
+            return value
+        return (Decimal(value) * CENT).quantize(CENT)
+
+
+class MoneyModel(SQLModel):
+    """Base for models with Cents fields: amounts stay JSON numbers in API responses."""
+
+    @field_serializer("*", mode="wrap", when_used="json")
+    def _serialize_money(self, value, handler):
+        if isinstance(value, Decimal):
+            return float(value)
+        return handler(value)
+
 
 # Shared properties
 class UserBase(SQLModel):
@@ -171,10 +294,44 @@ class RenterUpdate(SQLModel):
     address: str | None = Field(default=None, max_length=255)
 
 
+def normalize_phone(phone: str | None) -> str | None:
+    """Digits of a phone number, without the US country code: "+1 (718) 555-0101" -> "7185550101"."""
+    if phone is None:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_license(license_number: str | None) -> str | None:
+    """License number upper-cased without separators: "d123-456 78" -> "D12345678"."""
+    if license_number is None:
+        return None
+    return re.sub(r"[^0-9A-Za-z]", "", license_number).upper()
+
+
 class Renter(RenterBase, table=True):
+    # Sort keys of the list endpoint, with id as the tiebreaker
+    __table_args__ = (
+        Index("ix_renter_full_name_id", "full_name", "id"),
+        Index("ix_renter_driver_license_number_id", "driver_license_number", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
-    leases: list["PlateLease"] = Relationship(back_populates="renter", cascade_delete=True)
-    car_rentals: list["CarRental"] = Relationship(back_populates="renter", cascade_delete=True)
+    # Lookup forms of phone and driver_license_number, set on every write
+    # by _normalize_renter
+    phone_normalized: str | None = Field(default=None, max_length=20, index=True)
+    driver_license_normalized: str | None = Field(default=None, max_length=64, index=True)
+    leases: list["PlateLease"] = Relationship(back_populates="renter", cascade_delete=True, passive_deletes=True)
+    car_rentals: list["CarRental"] = Relationship(back_populates="renter", cascade_delete=True, passive_deletes=True)
+
+
+@event.listens_for(Renter, "before_insert")
+@event.listens_for(Renter, "before_update")
+def _normalize_renter(_mapper, _connection, renter: Renter) -> None:
+    renter.phone_normalized = normalize_phone(renter.phone)
+    renter.driver_license_normalized = normalize_license(renter.driver_license_number)
 
 
 class RenterPublic(RenterBase):
@@ -186,12 +343,12 @@ class RentersPublic(SQLModel):
     count: int
 
 
-class LicensePlateBase(SQLModel):
+class LicensePlateBase(MoneyModel):
     plate_number: str = Field(unique=True, index=True, min_length=2, max_length=16)
     plate_state: str = Field(default="NY", max_length=2)
     purchase_date: date
-    purchase_amount: float
-    status: str = Field(default="available", max_length=32)
+    purchase_amount: Decimal = Field(decimal_places=2, sa_type=Cents())
+    status: str = Field(default="available", max_length=32, sa_type=StatusCode(32))
     notes: str | None = Field(default=None, max_length=255)
 
 
@@ -203,35 +360,66 @@ class LicensePlateUpdate(SQLModel):
     plate_number: str | None = Field(default=None, max_length=16)
     plate_state: str | None = Field(default=None, max_length=2)
     purchase_date: date | None = None
-    purchase_amount: float | None = None
+    purchase_amount: Decimal | None = Field(default=None, decimal_places=2)
     status: str | None = Field(default=None, max_length=32)
     notes: str | None = Field(default=None, max_length=255)
 
 
 class LicensePlate(LicensePlateBase, table=True):
+    # Sort keys of the list endpoint, with id as the tiebreaker
+    __table_args__ = (
+        Index("ix_licenseplate_purchase_date_id", "purchase_date", "id"),
+        Index("ix_licenseplate_purchase_amount_id", "purchase_amount", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
-    leases: list["PlateLease"] = Relationship(back_populates="plate", cascade_delete=True)
+    # Open lease of this plate, kept in step with status by crud.sync_current_contract
+    current_lease_id: uuid.UUID | None = Field(
+        default=None,
+        index=True,
+        sa_type=UUID(),
+        sa_column_args=[
+            ForeignKey(
+                "platelease.id",
+                name="fk_licenseplate_current_lease_id_platelease",
+                ondelete="SET NULL",
+                use_alter=True,
+            )
+        ],
+    )
+    leases: list["PlateLease"] = Relationship(
+        back_populates="plate",
+        cascade_delete=True,
+        passive_deletes=True,
+        sa_relationship_kwargs={"foreign_keys": "PlateLease.plate_id"},
+    )
+    cars: list["Car"] = Relationship(back_populates="plate")
 
 
 class LicensePlatePublic(LicensePlateBase):
     id: uuid.UUID
+    current_lease_id: uuid.UUID | None = None
+    current_renter_id: uuid.UUID | None = None
+    current_renter_name: str | None = None
+    current_remaining_amount: Decimal | None = None
 
 
 class LicensePlatesPublic(SQLModel):
     data: list[LicensePlatePublic]
     count: int
+    facets: dict[str, dict[str, int]] | None = None
 
 
-class PlateLeaseBase(SQLModel):
+class PlateLeaseBase(MoneyModel):
     start_date: date
     end_date: date | None = None
-    total_amount: float = Field(default=0.0)
-    frequency: str = Field(default="monthly", max_length=16)
-    status: str = Field(default="active", max_length=32)
-    payment_status: str = Field(default="unpaid", max_length=16) # paid, unpaid, cancel
-    paid_amount: float = Field(default=0.0)
-    remaining_amount: float = Field(default=0.0)
-    rental_type: str = Field(default="lease", max_length=32) # lease
+    total_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    frequency: str = Field(default="monthly", max_length=16, sa_type=StatusCode(16))
+    status: str = Field(default="active", max_length=32, sa_type=StatusCode(32))
+    payment_status: str = Field(default="unpaid", max_length=16, sa_type=StatusCode(16)) # paid, unpaid, cancel
+    paid_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    remaining_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    rental_type: str = Field(default="lease", max_length=32, sa_type=StatusCode(32)) # lease
     create_by: str | None = Field(default=None, max_length=255)
     create_time: datetime | None = Field(default_factory=get_ny_time)
     update_time: datetime | None = Field(default_factory=get_ny_time, sa_column_kwargs={"onupdate": get_ny_time})
@@ -240,23 +428,23 @@ class PlateLeaseBase(SQLModel):
 class PlateLeaseCreate(PlateLeaseBase):
     plate_id: uuid.UUID
     renter_id: uuid.UUID
-    total_amount: float # Override to make required
+    total_amount: Decimal = Field(decimal_places=2) # Override to make required
 
 
 class PlateLeaseUpdate(SQLModel):
     start_date: date | None = None
     end_date: date | None = None
-    total_amount: float | None = None
+    total_amount: Decimal | None = Field(default=None, decimal_places=2)
     frequency: str | None = Field(default=None, max_length=16)
     status: str | None = Field(default=None, max_length=32)
     payment_status: str | None = None
-    paid_amount: float | None = None
-    remaining_amount: float | None = None
+    paid_amount: Decimal | None = Field(default=None, decimal_places=2)
+    remaining_amount: Decimal | None = Field(default=None, decimal_places=2)
     rental_type: str | None = None
 
 
-class PlatePaymentBase(SQLModel):
-    amount: float
+class PlatePaymentBase(MoneyModel):
+    amount: Decimal = Field(decimal_places=2, sa_type=Cents())
     payment_date: date
     note: str | None = None
     create_by: str | None = Field(default=None, max_length=255)
@@ -264,6 +452,14 @@ class PlatePaymentBase(SQLModel):
 
 
 class PlatePayment(PlatePaymentBase, table=True):
+    # Per-lease and journal (payment_date, id) order, plus range filters
+    __table_args__ = (
+        Index("ix_platepayment_lease_id_payment_date", "lease_id", "payment_date"),
+        Index("ix_platepayment_payment_date_id", "payment_date", "id"),
+        Index("ix_platepayment_create_time", "create_time"),
+        Index("ix_platepayment_amount", "amount"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
     lease_id: uuid.UUID = Field(foreign_key="platelease.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
     lease: "PlateLease" = Relationship(back_populates="payments")
@@ -280,12 +476,39 @@ class PlatePaymentsPublic(SQLModel):
 
 
 class PlateLease(PlateLeaseBase, table=True):
+    # Sort keys of the list endpoint, with id as the tiebreaker
+    __table_args__ = (
+        Index("ix_platelease_start_date_id", "start_date", "id"),
+        Index("ix_platelease_end_date_id", "end_date", "id"),
+        Index("ix_platelease_create_time_id", "create_time", "id"),
+        Index("ix_platelease_remaining_amount_id", "remaining_amount", "id"),
+        Index("ix_platelease_total_amount_id", "total_amount", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
     plate_id: uuid.UUID = Field(foreign_key="licenseplate.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
     renter_id: uuid.UUID = Field(foreign_key="renter.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
-    plate: LicensePlate | None = Relationship(back_populates="leases")
+    plate: LicensePlate | None = Relationship(
+        back_populates="leases", sa_relationship_kwargs={"foreign_keys": "PlateLease.plate_id"}
+    )
     renter: Renter | None = Relationship(back_populates="leases")
-    payments: list["PlatePayment"] = Relationship(back_populates="lease", cascade_delete=True)
+    payments: list["PlatePayment"] = Relationship(back_populates="lease", cascade_delete=True, passive_deletes=True)
+    installments: list["Installment"] = Relationship(
+        back_populates="lease",
+        cascade_delete=True,
+        passive_deletes=True,
+        sa_relationship_kwargs={"order_by": "Installment.sequence"},
+    )
+
+
+# One active lease per plate
+Index(
+    "ux_platelease_active_plate_id",
+    PlateLease.plate_id,
+    unique=True,
+    sqlite_where=PlateLease.status == "active",
+    postgresql_where=PlateLease.status == "active",
+)
 
 
 class PlateLeasePublic(PlateLeaseBase):
@@ -299,10 +522,11 @@ class PlateLeasePublic(PlateLeaseBase):
 class PlateLeasesPublic(SQLModel):
     data: list[PlateLeasePublic]
     count: int
+    facets: dict[str, dict[str, int]] | None = None
 
 
 # Car Models
-class CarBase(SQLModel):
+class CarBase(MoneyModel):
     model: str = Field(min_length=1, max_length=255)
     wav: int = Field(default=0) # 0 or 1
     marker: str | None = Field(default="premium", max_length=64)
@@ -311,16 +535,16 @@ class CarBase(SQLModel):
     vin_number: str | None = Field(default=None, max_length=64)
     plate_number: str | None = Field(default=None, unique=True, index=True, max_length=16)
     state: str = Field(default="NY", max_length=2)
-    registration_expires_at: datetime | None = None
-    insurance_expires_at: datetime | None = None
-    price: float | None = None
-    installation_fee_for_safety_equipment: float | None = None
-    insurance_expenses: float | None = None
-    service_expenses: float | None = None
-    maintenance_costs: float | None = None
-    full_coverage_auto_insurance: float | None = None
-    other_expenses: float | None = None
-    status: str = Field(default="available", max_length=32)
+    registration_expires_at: datetime | None = Field(default=None, index=True)
+    insurance_expires_at: datetime | None = Field(default=None, index=True)
+    price: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    installation_fee_for_safety_equipment: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    insurance_expenses: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    service_expenses: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    maintenance_costs: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    full_coverage_auto_insurance: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    other_expenses: Decimal | None = Field(default=None, decimal_places=2, sa_type=Cents())
+    status: str = Field(default="available", max_length=32, sa_type=StatusCode(32))
     notes: str | None = Field(default=None, max_length=255)
 
 class CarCreate(CarBase):
@@ -337,23 +561,60 @@ class CarUpdate(SQLModel):
     state: str | None = Field(default=None, max_length=2)
     registration_expires_at: datetime | None = None
     insurance_expires_at: datetime | None = None
-    price: float | None = None
-    installation_fee_for_safety_equipment: float | None = None
-    insurance_expenses: float | None = None
-    service_expenses: float | None = None
-    maintenance_costs: float | None = None
-    full_coverage_auto_insurance: float | None = None
-    other_expenses: float | None = None
+    price: Decimal | None = Field(default=None, decimal_places=2)
+    installation_fee_for_safety_equipment: Decimal | None = Field(default=None, decimal_places=2)
+    insurance_expenses: Decimal | None = Field(default=None, decimal_places=2)
+    service_expenses: Decimal | None = Field(default=None, decimal_places=2)
+    maintenance_costs: Decimal | None = Field(default=None, decimal_places=2)
+    full_coverage_auto_insurance: Decimal | None = Field(default=None, decimal_places=2)
+    other_expenses: Decimal | None = Field(default=None, decimal_places=2)
     status: str | None = Field(default=None, max_length=32)
     notes: str | None = Field(default=None, max_length=255)
 
 class Car(CarBase, table=True):
+    # Sort keys of the list endpoint, with id as the tiebreaker
+    __table_args__ = (
+        Index("ix_car_create_time_id", "create_time", "id"),
+        Index("ix_car_year_id", "year", "id"),
+        Index("ix_car_model_id", "model", "id"),
+        Index("ix_car_price_id", "price", "id"),
+        # Fleet search: equality filters first, then the year range
+        Index("ix_car_status_wav_year", "status", "wav", "year"),
+        Index("ix_car_status_marker_color", "status", "marker", "color"),
+        Index("ix_car_vin_number", "vin_number"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
     car_id: int | None = Field(default=None, primary_key=False, sa_column_kwargs={"autoincrement": True, "unique": True})
     create_by: str | None = Field(default=None, max_length=255)
     create_time: datetime | None = Field(default_factory=get_ny_time)
     update_time: datetime | None = Field(default_factory=get_ny_time, sa_column_kwargs={"onupdate": get_ny_time})
-    rentals: list["CarRental"] = Relationship(back_populates="car", cascade_delete=True)
+    # Open rental of this car, kept in step with status by crud.sync_current_contract
+    current_rental_id: uuid.UUID | None = Field(
+        default=None,
+        index=True,
+        sa_type=UUID(),
+        sa_column_args=[
+            ForeignKey(
+                "carrental.id",
+                name="fk_car_current_rental_id_carrental",
+                ondelete="SET NULL",
+                use_alter=True,
+            )
+        ],
+    )
+    # Plate registered under plate_number, linked by crud.link_car_plate/link_plate_cars
+    plate_id: uuid.UUID | None = Field(
+        default=None, foreign_key="licenseplate.id", ondelete="SET NULL", index=True, sa_type=UUID()
+    )
+    plate: LicensePlate | None = Relationship(back_populates="cars")
+    rentals: list["CarRental"] = Relationship(
+        back_populates="car",
+        cascade_delete=True,
+        passive_deletes=True,
+        sa_relationship_kwargs={"foreign_keys": "CarRental.car_id"},
+    )
+    expiry_digests: list["ExpiryDigest"] = Relationship(back_populates="car", cascade_delete=True, passive_deletes=True)
 
 class CarPublic(CarBase):
     id: uuid.UUID
@@ -361,21 +622,33 @@ class CarPublic(CarBase):
     create_by: str | None
     create_time: datetime | None
     update_time: datetime | None
+    current_rental_id: uuid.UUID | None = None
+    current_renter_id: uuid.UUID | None = None
+    current_renter_name: str | None = None
+    current_remaining_amount: Decimal | None = None
+    plate_id: uuid.UUID | None = None
+
+class CarDetailPublic(CarPublic):
+    plate: LicensePlatePublic | None = None
 
 class CarsPublic(SQLModel):
     data: list[CarPublic]
     count: int
+    facets: dict[str, dict[str, int]] | None = None
+
+class LicensePlateDetailPublic(LicensePlatePublic):
+    car: CarPublic | None = None
 
-class CarRentalBase(SQLModel):
+class CarRentalBase(MoneyModel):
     start_date: date
     end_date: date | None = None
-    total_amount: float = Field(default=0.0)
-    frequency: str = Field(default="monthly", max_length=16)
-    status: str = Field(default="active", max_length=32)
-    payment_status: str = Field(default="unpaid", max_length=16) # paid, unpaid
-    paid_amount: float = Field(default=0.0)
-    remaining_amount: float = Field(default=0.0)
-    rental_type: str = Field(default="lease", max_length=32) # lease, lease_to_own
+    total_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    frequency: str = Field(default="monthly", max_length=16, sa_type=StatusCode(16))
+    status: str = Field(default="active", max_length=32, sa_type=StatusCode(32))
+    payment_status: str = Field(default="unpaid", max_length=16, sa_type=StatusCode(16)) # paid, unpaid
+    paid_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    remaining_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    rental_type: str = Field(default="lease", max_length=32, sa_type=StatusCode(32)) # lease, lease_to_own
     create_by: str | None = Field(default=None, max_length=255)
     create_time: datetime | None = Field(default_factory=get_ny_time)
     update_time: datetime | None = Field(default_factory=get_ny_time, sa_column_kwargs={"onupdate": get_ny_time})
@@ -385,28 +658,56 @@ class CarRentalCreate(SQLModel):
     renter_id: uuid.UUID
     start_date: date
     end_date: date | None = None
-    total_amount: float
+    total_amount: Decimal = Field(decimal_places=2)
     frequency: str = "monthly"
     rental_type: str = "lease"
 
 class CarRentalUpdate(SQLModel):
     start_date: date | None = None
     end_date: date | None = None
-    total_amount: float | None = None
+    total_amount: Decimal | None = Field(default=None, decimal_places=2)
     frequency: str | None = None
     status: str | None = None
     payment_status: str | None = None
-    paid_amount: float | None = None
-    remaining_amount: float | None = None
+    paid_amount: Decimal | None = Field(default=None, decimal_places=2)
+    remaining_amount: Decimal | None = Field(default=None, decimal_places=2)
     rental_type: str | None = None
 
 class CarRental(CarRentalBase, table=True):
+    # Sort keys of the list endpoint, with id as the tiebreaker
+    __table_args__ = (
+        Index("ix_carrental_start_date_id", "start_date", "id"),
+        Index("ix_carrental_end_date_id", "end_date", "id"),
+        Index("ix_carrental_create_time_id", "create_time", "id"),
+        Index("ix_carrental_remaining_amount_id", "remaining_amount", "id"),
+        Index("ix_carrental_total_amount_id", "total_amount", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
     car_id: uuid.UUID = Field(foreign_key="car.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
     renter_id: uuid.UUID = Field(foreign_key="renter.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
-    car: Car | None = Relationship(back_populates="rentals")
+    car: Car | None = Relationship(
+        back_populates="rentals", sa_relationship_kwargs={"foreign_keys": "CarRental.car_id"}
+    )
     renter: Renter | None = Relationship(back_populates="car_rentals")
-    payments: list["RentalPayment"] = Relationship(back_populates="rental", cascade_delete=True)
+    payments: list["RentalPayment"] = Relationship(back_populates="rental", cascade_delete=True, passive_deletes=True)
+    installments: list["Installment"] = Relationship(
+        back_populates="rental",
+        cascade_delete=True,
+        passive_deletes=True,
+        sa_relationship_kwargs={"order_by": "Installment.sequence"},
+    )
+
+
+# One active, unpaid rental per car
+Index(
+    "ux_carrental_active_car_id",
+    CarRental.car_id,
+    unique=True,
+    sqlite_where=(CarRental.status == "active") & (CarRental.payment_status == "unpaid"),
+    postgresql_where=(CarRental.status == "active") & (CarRental.payment_status == "unpaid"),
+)
+
 
 class CarRentalPublic(CarRentalBase):
     id: uuid.UUID
@@ -417,13 +718,21 @@ class CarRentalPublic(CarRentalBase):
     renter_name: str | None = None
 
 
-class RentalPaymentBase(SQLModel):
-    amount: float
+class RentalPaymentBase(MoneyModel):
+    amount: Decimal = Field(decimal_places=2, sa_type=Cents())
     payment_date: date = Field(default_factory=date.today)
     note: str | None = Field(default=None, max_length=255)
 
 
 class RentalPayment(RentalPaymentBase, table=True):
+    # Per-rental and journal (payment_date, id) order, plus range filters
+    __table_args__ = (
+        Index("ix_rentalpayment_rental_id_payment_date", "rental_id", "payment_date"),
+        Index("ix_rentalpayment_payment_date_id", "payment_date", "id"),
+        Index("ix_rentalpayment_create_time", "create_time"),
+        Index("ix_rentalpayment_amount", "amount"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
     rental_id: uuid.UUID = Field(foreign_key="carrental.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
     rental: CarRental = Relationship(back_populates="payments")
@@ -443,7 +752,327 @@ class RentalPaymentsPublic(SQLModel):
     count: int
 
 
+# Rental and lease payments in one journal, oldest first
+class PaymentJournalEntry(MoneyModel):
+    id: uuid.UUID
+    contract_type: str # rental, lease
+    contract_id: uuid.UUID
+    renter_id: uuid.UUID
+    amount: Decimal
+    payment_date: date
+    note: str | None = None
+    create_by: str | None = None
+    create_time: datetime | None = None
+    running_total: Decimal
+
+
+class PaymentJournalPublic(SQLModel):
+    data: list[PaymentJournalEntry]
+    next_cursor: str | None = None
+
+
 
 class CarRentalsPublic(SQLModel):
     data: list[CarRentalPublic]
     count: int
+    facets: dict[str, dict[str, int]] | None = None
+
+
+# Installment schedule generated from a rental/lease frequency
+class InstallmentBase(MoneyModel):
+    sequence: int
+    due_date: date
+    amount: Decimal = Field(decimal_places=2, sa_type=Cents())
+    paid_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    status: str = Field(default="unpaid", max_length=16, sa_type=StatusCode(16)) # unpaid, partial, paid, cancel
+
+
+class Installment(InstallmentBase, table=True):
+    __table_args__ = (Index("ix_installment_due_date_status", "due_date", "status"),)
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
+    rental_id: uuid.UUID | None = Field(default=None, foreign_key="carrental.id", ondelete="CASCADE", index=True, sa_type=UUID())
+    lease_id: uuid.UUID | None = Field(default=None, foreign_key="platelease.id", ondelete="CASCADE", index=True, sa_type=UUID())
+    renter_id: uuid.UUID = Field(foreign_key="renter.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+    rental: CarRental | None = Relationship(back_populates="installments")
+    lease: PlateLease | None = Relationship(back_populates="installments")
+    renter: Renter | None = Relationship()
+
+
+class InstallmentPublic(InstallmentBase):
+    id: uuid.UUID
+    rental_id: uuid.UUID | None
+    lease_id: uuid.UUID | None
+    renter_id: uuid.UUID
+    renter_name: str | None = None
+
+
+class InstallmentsPublic(SQLModel):
+    data: list[InstallmentPublic]
+    count: int
+
+
+# Receivables aging snapshot, one row per renter with an open balance
+class AgingSnapshotBase(MoneyModel):
+    as_of: date
+    current_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents()) # not yet past due
+    days_1_30: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    days_31_60: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    days_61_90: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    days_over_90: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    overdue_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    total_amount: Decimal = Field(default=Decimal("0.00"), decimal_places=2, sa_type=Cents())
+    oldest_due_date: date | None = None
+    update_time: datetime | None = Field(default_factory=get_ny_time, sa_column_kwargs={"onupdate": get_ny_time})
+
+
+class AgingSnapshot(AgingSnapshotBase, table=True):
+    __table_args__ = (Index("ix_agingsnapshot_overdue_amount_total_amount", "overdue_amount", "total_amount"),)
+
+    renter_id: uuid.UUID = Field(foreign_key="renter.id", primary_key=True, ondelete="CASCADE", sa_type=UUID())
+    renter: Renter | None = Relationship()
+
+
+class AgingSnapshotPublic(AgingSnapshotBase):
+    renter_id: uuid.UUID
+    renter_name: str | None = None
+    renter_phone: str | None = None
+
+
+class AgingReportPublic(SQLModel):
+    data: list[AgingSnapshotPublic]
+    count: int
+
+
+# Daily digest of car documents (registration, insurance) close to expiry
+class ExpiryDigestBase(SQLModel):
+    digest_date: date = Field(index=True)
+    document: str = Field(max_length=16) # registration, insurance
+    expires_at: datetime
+    days_left: int
+
+
+class ExpiryDigest(ExpiryDigestBase, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
+    car_id: uuid.UUID = Field(foreign_key="car.id", nullable=False, ondelete="CASCADE", sa_type=UUID())
+    car: Car | None = Relationship(back_populates="expiry_digests")
+
+
+class ExpiryDigestPublic(ExpiryDigestBase):
+    id: uuid.UUID
+    car_id: uuid.UUID
+    car_short_id: int | None = None
+    car_model: str | None = None
+    plate_number: str | None = None
+
+
+class ExpiryDigestsPublic(SQLModel):
+    data: list[ExpiryDigestPublic]
+    count: int
+
+
+# Archive of closed (paid/cancelled) contracts and their payments, moved out
+# of the hot tables by app.archive. Same columns as the hot tables.
+class CarRentalArchive(CarRentalBase, table=True):
+    id: uuid.UUID = Field(primary_key=True, sa_type=UUID())
+    car_id: uuid.UUID = Field(foreign_key="car.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+    renter_id: uuid.UUID = Field(foreign_key="renter.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+    archived_at: datetime = Field(default_factory=get_ny_time)
+
+
+class RentalPaymentArchive(RentalPaymentBase, table=True):
+    id: uuid.UUID = Field(primary_key=True, sa_type=UUID())
+    rental_id: uuid.UUID = Field(foreign_key="carrentalarchive.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+    create_by: str | None = Field(default=None, max_length=255)
+    create_time: datetime | None = Field(default_factory=get_ny_time)
+
+
+class PlateLeaseArchive(PlateLeaseBase, table=True):
+    id: uuid.UUID = Field(primary_key=True, sa_type=UUID())
+    plate_id: uuid.UUID = Field(foreign_key="licenseplate.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+    renter_id: uuid.UUID = Field(foreign_key="renter.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+    archived_at: datetime = Field(default_factory=get_ny_time)
+
+
+class PlatePaymentArchive(PlatePaymentBase, table=True):
+    id: uuid.UUID = Field(primary_key=True, sa_type=UUID())
+    lease_id: uuid.UUID = Field(foreign_key="plateleasearchive.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID())
+
+
+# Row counts per status value of cars, plates, rentals and leases, kept in
+# step with every status change by app.status_counts
+class StatusCounterBase(SQLModel):
+    entity: str = Field(primary_key=True, max_length=32) # table name
+    field: str = Field(primary_key=True, max_length=32) # status, payment_status
+    value: str = Field(primary_key=True, max_length=32)
+    count: int = 0
+
+
+class StatusCounter(StatusCounterBase, table=True):
+    pass
+
+
+class StatusCounterPublic(StatusCounterBase):
+    pass
+
+
+class StatusCountsPublic(SQLModel):
+    data: list[StatusCounterPublic]
+    count: int
+
+
+# One row per searchable key (plate, VIN, phone, name, ...) of a car, plate,
+# renter or contract, carrying the display fields of its search hit; kept in
+# step with writes by app.search_index
+class SearchEntryBase(SQLModel):
+    entity: str = Field(max_length=16) # renter, car, plate, rental, lease
+    ref_id: uuid.UUID = Field(sa_type=UUID())
+    title: str = Field(max_length=255)
+    subtitle: str | None = Field(default=None, max_length=255)
+    status: str | None = Field(default=None, max_length=32, sa_type=StatusCode(32))
+
+
+class SearchEntry(SearchEntryBase, table=True):
+    __table_args__ = (
+        Index("ix_searchentry_key", "key"),
+        Index("ix_searchentry_entity_ref_id", "entity", "ref_id"),
+    )
+
+    # Integer key, so the FTS5 table can index the rows by rowid
+    id: int | None = Field(default=None, primary_key=True)
+    key: str = Field(max_length=255) # normalized, see search_index.normalize
+
+
+class SearchHit(SQLModel):
+    type: str
+    id: uuid.UUID
+    title: str
+    subtitle: str | None = None
+    status: str | None = None
+    matched: str
+
+
+class SearchResults(SQLModel):
+    data: list[SearchHit]
+    count: int
+
+
+class SuggestionsPublic(SQLModel):
+    data: list[str]
+
+
+# Outbox of every write to cars, plates, renters, rentals, leases and
+# payments, in write order, for clients that sync incrementally and for the
+# event stream; written by app.changelog
+class ChangeLog(SQLModel, table=True):
+    # AUTOINCREMENT: sequence numbers are never reused after pruning.
+    # (entity, seq) serves the last change of an entity, see changelog.write_version
+    __table_args__ = (
+        Index("ix_changelog_entity_seq", "entity", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq: int | None = Field(default=None, primary_key=True)
+    entity: str = Field(max_length=16) # renter, car, plate, rental, lease, rental_payment, lease_payment
+    ref_id: uuid.UUID = Field(sa_type=UUID())
+    op: str = Field(max_length=8) # insert, update, delete
+    snapshot: dict | None = Field(default=None, sa_type=JSON) # row after the write
+    create_time: datetime = Field(default_factory=get_ny_time, index=True)
+
+
+class ChangePublic(SQLModel):
+    seq: int
+    entity: str
+    id: uuid.UUID
+    op: str
+    snapshot: dict | None = None
+    create_time: datetime
+
+
+class ChangesPublic(SQLModel):
+    data: list[ChangePublic]
+    # Pass back as since to read the next changes
+    next_since: int
+
+
+class WebhookBase(SQLModel):
+    url: str = Field(max_length=2048, schema_extra={"pattern": r"^https?://"})
+    # Event names from app.webhooks.WEBHOOK_EVENTS; empty for all of them
+    events: list[str] = Field(default_factory=list, sa_type=JSON)
+    description: str | None = Field(default=None, max_length=255)
+    is_active: bool = True
+
+
+class WebhookCreate(WebhookBase):
+    # Generated when omitted
+    secret: str | None = Field(default=None, min_length=16, max_length=255)
+
+
+class WebhookUpdate(SQLModel):
+    url: str | None = Field(default=None, max_length=2048, schema_extra={"pattern": r"^https?://"})
+    events: list[str] | None = None
+    description: str | None = Field(default=None, max_length=255)
+    is_active: bool | None = None
+
+
+class Webhook(WebhookBase, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, sa_type=UUID())
+    # HMAC key of the X-Webhook-Signature header, see app.webhooks.sign
+    secret: str = Field(max_length=255)
+    create_by: str | None = Field(default=None, max_length=255)
+    create_time: datetime | None = Field(default_factory=get_ny_time)
+    deliveries: list["WebhookDelivery"] = Relationship(cascade_delete=True, passive_deletes=True)
+
+
+class WebhookPublic(WebhookBase):
+    id: uuid.UUID
+    create_by: str | None
+    create_time: datetime | None
+
+
+# The secret is only returned when the webhook is created
+class WebhookCreated(WebhookPublic):
+    secret: str
+
+
+class WebhooksPublic(SQLModel):
+    data: list[WebhookPublic]
+    count: int
+
+
+class WebhookDeliveryBase(SQLModel):
+    event: str = Field(max_length=32)
+    payload: dict = Field(sa_type=JSON)
+    status: str = Field(default="pending", max_length=16) # pending, delivered, failed
+    attempts: int = 0
+    # Due time of the next attempt while pending
+    next_attempt_time: datetime = Field(default_factory=get_ny_time)
+    response_status: int | None = None
+    last_error: str | None = Field(default=None, max_length=255)
+    create_time: datetime = Field(default_factory=get_ny_time)
+    delivered_time: datetime | None = None
+
+
+# Durable queue of webhook requests, written in the transaction of the event
+# and sent by app.webhooks.dispatcher
+class WebhookDelivery(WebhookDeliveryBase, table=True):
+    # The dispatcher's scan for due deliveries
+    __table_args__ = (
+        Index("ix_webhookdelivery_status_next_attempt_time", "status", "next_attempt_time"),
+    )
+
+    # Integer key: the X-Webhook-Id receivers deduplicate retries by
+    id: int | None = Field(default=None, primary_key=True)
+    webhook_id: uuid.UUID = Field(
+        foreign_key="webhook.id", nullable=False, ondelete="CASCADE", index=True, sa_type=UUID()
+    )
+
+
+class WebhookDeliveryPublic(WebhookDeliveryBase):
+    id: int
+    webhook_id: uuid.UUID
+
+
+class WebhookDeliveriesPublic(SQLModel):
+    data: list[WebhookDeliveryPublic]
+    count: int
@@ -0,0 +1,113 @@
+from typing import Any
+
+from sqlalchemy import column, inspect, literal_column, table, text
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, select
+
+# FTS5 trigram table (SQLite) holding each distinct plate number of cars and
+# plates once, kept in step by triggers on car and licenseplate
+TRIGRAM_TABLE = "platenumbertrigram"
+
+# Trigrams need three characters; shorter plate numbers are not in the table
+# and shorter search terms match nothing
+MIN_TRIGRAM_LENGTH = 3
+
+trigram_table = table(TRIGRAM_TABLE, column("plate_number"))
+
+# tables whose plate_number values are indexed
+PLATE_TABLES = ("car", "licenseplate")
+
+# Plate numbers shorter than a trigram cannot be matched and are left out
+_ADD_NUMBER = f"""
+    INSERT INTO {TRIGRAM_TABLE} (plate_number)
+    SELECT NEW.plate_number
+    WHERE length(NEW.plate_number) >= {MIN_TRIGRAM_LENGTH} AND NOT EXISTS (
+        SELECT 1 FROM {TRIGRAM_TABLE}
+        WHERE {TRIGRAM_TABLE} MATCH '"' || replace(NEW.plate_number, '"', '""') || '"'
+        AND plate_number = NEW.plate_number
+    );
+"""
+
+# A number stays while any car or plate still carries it
+_DROP_NUMBER = f"""
+    DELETE FROM {TRIGRAM_TABLE}
+    WHERE {TRIGRAM_TABLE} MATCH '"' || replace(OLD.plate_number, '"', '""') || '"'
+    AND plate_number = OLD.plate_number
+    AND length(OLD.plate_number) >= {MIN_TRIGRAM_LENGTH}
+    AND NOT EXISTS (SELECT 1 FROM car WHERE plate_number = OLD.plate_number)
+    AND NOT EXISTS (SELECT 1 FROM licenseplate WHERE plate_number = OLD.plate_number);
+"""
+
+
+def match_phrase(value: str) -> str:
+    """FTS5 phrase matching value literally."""
+    return '"' + value.replace('"', '""') + '"'
+
+
+def plate_number_contains(session: Session, plate_number: Any, value: str) -> Any:
+    """
+    WHERE clause for plate numbers containing value.
+
+    On SQLite the trigram table finds the matching plate numbers and the
+    unique plate_number B-tree resolves them to rows, instead of a LIKE
+    scan of the whole table. Terms shorter than a trigram still use LIKE.
+    On Postgres the pg_trgm GIN index serves LIKE directly.
+    """
+    if session.get_bind().dialect.name != "sqlite" or len(value) < MIN_TRIGRAM_LENGTH:
+        return plate_number.contains(value)
+    matches = select(trigram_table.c.plate_number).where(
+        literal_column(TRIGRAM_TABLE).op("MATCH")(match_phrase(value))
+    )
+    return plate_number.in_(matches)
+
+
+def create_index(_target: Any, connection: Connection, **_kw: Any) -> None:
+    """
+    Create the trigram index over plate numbers when it does not exist yet:
+    the FTS5 table, its triggers and its rows on SQLite, the pg_trgm GIN
+    indexes on Postgres. Runs after metadata.create_all, as the index is
+    not a model.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for name in PLATE_TABLES:
+            connection.execute(
+                text(
+                    f"CREATE INDEX IF NOT EXISTS ix_{name}_plate_number_trgm "
+                    f"ON {name} USING gin (plate_number gin_trgm_ops)"
+                )
+            )
+        return
+    if connection.dialect.name != "sqlite" or inspect(connection).has_table(TRIGRAM_TABLE):
+        return
+
+    connection.execute(
+        text(f"CREATE VIRTUAL TABLE {TRIGRAM_TABLE} USING fts5(plate_number, tokenize = 'trigram')")
+    )
+    for name in PLATE_TABLES:
+        connection.execute(
+            text(
+                f"CREATE TRIGGER {name}_plate_number_trigram_insert AFTER INSERT ON {name} "
+                f"WHEN NEW.plate_number IS NOT NULL BEGIN {_ADD_NUMBER} END"
+            )
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER {name}_plate_number_trigram_update "
+                f"AFTER UPDATE OF plate_number ON {name} BEGIN {_ADD_NUMBER} {_DROP_NUMBER} END"
+            )
+        )
+        connection.execute(
+            text(
+                f"CREATE TRIGGER {name}_plate_number_trigram_delete AFTER DELETE ON {name} "
+                f"BEGIN {_DROP_NUMBER} END"
+            )
+        )
+    connection.execute(
+        text(
+            f"INSERT INTO {TRIGRAM_TABLE} (plate_number) "
+            f"SELECT plate_number FROM car WHERE length(plate_number) >= {MIN_TRIGRAM_LENGTH} "
+            f"UNION SELECT plate_number FROM licenseplate "
+            f"WHERE length(plate_number) >= {MIN_TRIGRAM_LENGTH}"
+        )
+    )
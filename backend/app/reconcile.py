@@ -0,0 +1,203 @@
+import argparse
+import logging
+import uuid
+from collections import Counter
+from collections.abc import Iterator
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from sqlmodel import Session, and_, case, col, func, or_, select, update
+
+from app import changelog, crud, reports, status_counts
+from app.core.db import engine
+from app.models import CarRental, PlateLease, PlatePayment, RentalPayment
+
+logger = logging.getLogger(__name__)
+
+# (contract model, payment model, payment foreign key)
+CONTRACT_PAYMENTS: dict[str, tuple[Any, Any, Any]] = {
+    "rental": (CarRental, RentalPayment, RentalPayment.rental_id),
+    "lease": (PlateLease, PlatePayment, PlatePayment.lease_id),
+}
+
+
+@dataclass
+class Drift:
+    contract_type: str
+    id: uuid.UUID
+    renter_id: uuid.UUID
+    total_amount: Decimal
+    recorded_paid: Decimal
+    actual_paid: Decimal
+    recorded_remaining: Decimal
+    recorded_status: str
+
+    @property
+    def expected_remaining(self) -> Decimal:
+        return max(self.total_amount - self.actual_paid, Decimal(0))
+
+    @property
+    def expected_status(self) -> str:
+        if self.recorded_status == "cancel":
+            return "cancel"
+        if self.actual_paid >= self.total_amount:
+            return "paid"
+        return "unpaid"
+
+
+def find_drift(*, session: Session, contract_type: str) -> Iterator[Drift]:
+    """
+    Compare the denormalized paid/remaining/status columns of every contract
+    against SUM(amount) of its payments, in one grouped query.
+
+    The comparison runs in the database, so only drifted rows come back and
+    they are streamed rather than loaded at once.
+    """
+    model, payment_model, payment_fk = CONTRACT_PAYMENTS[contract_type]
+    payments = (
+        select(
+            payment_fk.label("contract_id"),
+            func.sum(payment_model.amount).label("paid"),
+        )
+        .group_by(payment_fk)
+        .subquery()
+    )
+    actual_paid = func.coalesce(payments.c.paid, 0)
+    fully_paid = actual_paid >= model.total_amount
+    expected_remaining = case(
+        (fully_paid, 0),
+        else_=model.total_amount - actual_paid,
+    )
+    statement = (
+        select(
+            model.id,
+            model.renter_id,
+            model.total_amount,
+            model.paid_amount,
+            model.remaining_amount,
+            model.payment_status,
+            actual_paid.label("actual_paid"),
+        )
+        .outerjoin(payments, payments.c.contract_id == model.id)
+        .where(
+            or_(
+                model.paid_amount != actual_paid,
+                model.remaining_amount != expected_remaining,
+                and_(model.payment_status == "unpaid", fully_paid),
+                and_(model.payment_status == "paid", ~fully_paid),
+            )
+        )
+        .execution_options(yield_per=1000)
+    )
+    for row in session.exec(statement):
+        yield Drift(
+            contract_type=contract_type,
+            id=row.id,
+            renter_id=row.renter_id,
+            total_amount=row.total_amount,
+            recorded_paid=row.paid_amount,
+            actual_paid=row.actual_paid,
+            recorded_remaining=row.remaining_amount,
+            recorded_status=row.payment_status,
+        )
+
+
+def repair_drift(*, session: Session, drifts: list[Drift]) -> None:
+    """
+    Reset one chunk of drifted contracts to the values implied by their
+    payments, in a single transaction.
+    """
+    for contract_type in CONTRACT_PAYMENTS:
+        chunk = [drift for drift in drifts if drift.contract_type == contract_type]
+        if not chunk:
+            continue
+        model = CONTRACT_PAYMENTS[contract_type][0]
+        session.execute(
+            update(model),
+            [
+                {
+                    "id": drift.id,
+                    "paid_amount": drift.actual_paid,
+                    "remaining_amount": drift.expected_remaining,
+                    "payment_status": drift.expected_status,
+                }
+                for drift in chunk
+            ],
+        )
+        # The bulk update bypasses the flush, so move the status counts here
+        deltas: status_counts.Deltas = Counter()
+        for drift in chunk:
+            deltas[(model.__tablename__, "payment_status", drift.recorded_status)] -= 1
+            deltas[(model.__tablename__, "payment_status", drift.expected_status)] += 1
+        status_counts.adjust(session.connection(), deltas)
+        changelog.record_rows(session.connection(), contract_type, [drift.id for drift in chunk])
+        contracts = session.exec(
+            select(model).where(col(model.id).in_([drift.id for drift in chunk]))
+        ).all()
+        for contract in contracts:
+            session.refresh(contract)
+            crud.sync_installments(session=session, contract=contract)
+            crud.sync_current_contract(session=session, contract=contract)
+    for renter_id in {drift.renter_id for drift in drifts}:
+        reports.refresh_aging_snapshot(session=session, renter_id=renter_id)
+    session.commit()
+
+
+def reconcile(*, session: Session, repair: bool = False, chunk_size: int = 1000) -> int:
+    """
+    Report (and optionally repair) paid/remaining drift. Returns the number
+    of drifted contracts found.
+    """
+    drifts = [
+        drift
+        for contract_type in CONTRACT_PAYMENTS
+        for drift in find_drift(session=session, contract_type=contract_type)
+    ]
+    for drift in drifts:
+        logger.warning(
+            "%s %s drift: paid %s (payments sum %s), remaining %s (expected %s), status %s (expected %s)",
+            drift.contract_type,
+            drift.id,
+            drift.recorded_paid,
+            drift.actual_paid,
+            drift.recorded_remaining,
+            drift.expected_remaining,
+            drift.recorded_status,
+            drift.expected_status,
+        )
+    if repair:
+        for start in range(0, len(drifts), chunk_size):
+            repair_drift(session=session, drifts=drifts[start : start + chunk_size])
+    return len(drifts)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Reconcile rental/lease paid and remaining amounts against payments"
+    )
+    parser.add_argument("--repair", action="store_true", help="fix drifted contracts")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--status-counts",
+        action="store_true",
+        help="check the status counter against the source tables instead (rebuilt with --repair)",
+    )
+    args = parser.parse_args()
+
+    if args.status_counts:
+        logger.info("Verifying status counter")
+        with Session(engine) as session:
+            found = status_counts.verify(session=session, rebuild=args.repair)
+        logger.info("Found %s drifted counters%s", found, " (rebuilt)" if args.repair and found else "")
+        return
+
+    logger.info("Reconciling contract payment aggregates")
+    with Session(engine) as session:
+        found = reconcile(session=session, repair=args.repair, chunk_size=args.chunk_size)
+    logger.info("Found %s drifted contracts%s", found, " (repaired)" if args.repair and found else "")
+
+
+if __name__ == "__main__":
+    main()
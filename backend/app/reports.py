@@ -0,0 +1,182 @@
+import logging
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Any
+
+from sqlmodel import Session, case, col, delete, func, or_, select, type_coerce
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import (
+    AgingSnapshot,
+    Car,
+    Cents,
+    ExpiryDigest,
+    Installment,
+    get_ny_time,
+)
+
+logger = logging.getLogger(__name__)
+
+# Installments that still expect money
+OPEN_INSTALLMENT_STATUSES = ("unpaid", "partial")
+
+
+def _aging_statement(as_of: date) -> Any:
+    """
+    One grouped pass over open installments, bucketed by days past due.
+    """
+    outstanding = Installment.amount - Installment.paid_amount
+
+    def bucket(condition: Any) -> Any:
+        # Arithmetic on Cents columns yields plain integers, so read the sum back as Cents
+        return type_coerce(
+            func.coalesce(func.sum(case((condition, outstanding), else_=0)), 0), Cents()
+        )
+
+    due = col(Installment.due_date)
+    return (
+        select(
+            Installment.renter_id,
+            bucket(due >= as_of).label("current_amount"),
+            bucket((due < as_of) & (due >= as_of - timedelta(days=30))).label("days_1_30"),
+            bucket((due < as_of - timedelta(days=30)) & (due >= as_of - timedelta(days=60))).label("days_31_60"),
+            bucket((due < as_of - timedelta(days=60)) & (due >= as_of - timedelta(days=90))).label("days_61_90"),
+            bucket(due < as_of - timedelta(days=90)).label("days_over_90"),
+            func.min(Installment.due_date).label("oldest_due_date"),
+        )
+        .where(col(Installment.status).in_(OPEN_INSTALLMENT_STATUSES))
+        .group_by(Installment.renter_id)
+    )
+
+
+def _snapshot_values(row: Any, as_of: date) -> dict[str, Any]:
+    buckets = {
+        name: getattr(row, name)
+        for name in ("current_amount", "days_1_30", "days_31_60", "days_61_90", "days_over_90")
+    }
+    overdue_amount = sum(buckets.values()) - buckets["current_amount"]
+    return {
+        "renter_id": row.renter_id,
+        "as_of": as_of,
+        **buckets,
+        "overdue_amount": overdue_amount,
+        "total_amount": overdue_amount + buckets["current_amount"],
+        "oldest_due_date": row.oldest_due_date,
+        "update_time": get_ny_time(),
+    }
+
+
+def rebuild_aging_snapshot(*, session: Session, as_of: date | None = None) -> int:
+    """
+    Replace the whole aging snapshot. Returns the number of renters with an open balance.
+    """
+    as_of = as_of or get_ny_time().date()
+    rows = session.exec(_aging_statement(as_of)).all()
+    session.execute(delete(AgingSnapshot))
+    session.add_all(AgingSnapshot(**_snapshot_values(row, as_of)) for row in rows)
+    session.commit()
+    return len(rows)
+
+
+def refresh_aging_snapshot(
+    *, session: Session, renter_id: uuid.UUID, as_of: date | None = None
+) -> None:
+    """
+    Recompute a single renter's snapshot row inside the caller's transaction.
+    """
+    as_of = as_of or get_ny_time().date()
+    row = session.exec(
+        _aging_statement(as_of).where(Installment.renter_id == renter_id)
+    ).first()
+    snapshot = session.get(AgingSnapshot, renter_id)
+    if row is None:
+        if snapshot:
+            session.delete(snapshot)
+        return
+    values = _snapshot_values(row, as_of)
+    if snapshot:
+        snapshot.sqlmodel_update(values)
+    else:
+        snapshot = AgingSnapshot(**values)
+    session.add(snapshot)
+
+
+def expiry_columns() -> dict[str, Any]:
+    return {
+        "registration": col(Car.registration_expires_at),
+        "insurance": col(Car.insurance_expires_at),
+    }
+
+
+def expiring_cars_statement(
+    *, now: datetime, within_days: int, include_expired: bool = True
+) -> Any:
+    """
+    Cars whose registration or insurance expires before now + within_days.
+
+    Each side of the OR is a range on an indexed column, so the database can
+    answer it with two index range scans instead of a table scan.
+    """
+    horizon = now + timedelta(days=within_days)
+    conditions = []
+    for column in expiry_columns().values():
+        condition = column <= horizon
+        if not include_expired:
+            condition = condition & (column >= now)
+        conditions.append(condition)
+    return select(Car).where(or_(*conditions))
+
+
+def write_expiry_digest(
+    *,
+    session: Session,
+    digest_date: date | None = None,
+    within_days: int | None = None,
+    lookback_days: int | None = None,
+) -> int:
+    """
+    Write the expiry digest for digest_date, replacing any earlier run for
+    the same day: documents expiring within within_days, and those that
+    expired in the last lookback_days. Returns the number of digest rows
+    written.
+    """
+    digest_date = digest_date or get_ny_time().date()
+    within_days = within_days if within_days is not None else settings.EXPIRY_DIGEST_WITHIN_DAYS
+    if lookback_days is None:
+        lookback_days = settings.EXPIRY_DIGEST_LOOKBACK_DAYS
+    start = datetime.combine(digest_date, time.min)
+    horizon = start + timedelta(days=within_days)
+    lapsed = start - timedelta(days=lookback_days)
+
+    session.execute(delete(ExpiryDigest).where(col(ExpiryDigest.digest_date) == digest_date))
+    digests = []
+    for document, column in expiry_columns().items():
+        rows = session.exec(
+            select(Car.id, column).where(column >= lapsed, column <= horizon)
+        ).all()
+        digests.extend(
+            ExpiryDigest(
+                digest_date=digest_date,
+                car_id=car_id,
+                document=document,
+                expires_at=expires_at,
+                days_left=(expires_at.date() - digest_date).days,
+            )
+            for car_id, expires_at in rows
+        )
+    session.add_all(digests)
+    session.commit()
+    return len(digests)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Rebuilding aging snapshot")
+    with Session(engine) as session:
+        renters = rebuild_aging_snapshot(session=session)
+    logger.info("Aging snapshot rebuilt for %s renters", renters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+import argparse
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from sqlalchemy import column, event, inspect, literal_column, table, text, true
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, col, delete, insert, select
+
+from app.models import (
+    Car,
+    CarRental,
+    LicensePlate,
+    PlateLease,
+    Renter,
+    SearchEntry,
+    SearchHit,
+)
+from app.plate_search import MIN_TRIGRAM_LENGTH, match_phrase
+
+logger = logging.getLogger(__name__)
+
+# FTS5 trigram table over searchentry.key (SQLite), kept in step by triggers
+# on searchentry
+FTS_TABLE = "searchentryfts"
+fts_table = table(FTS_TABLE, column("rowid"))
+
+# entity -> model, in the order hits of the same rank are listed
+INDEXED_MODELS: dict[str, Any] = {
+    "renter": Renter,
+    "car": Car,
+    "plate": LicensePlate,
+    "rental": CarRental,
+    "lease": PlateLease,
+}
+ENTITY_BY_MODEL = {model: entity for entity, model in INDEXED_MODELS.items()}
+
+# model -> (fields shown in contract hits, [(contract entity, foreign key)]).
+# Contracts are re-indexed when these fields change and are deleted with
+# the row by ON DELETE CASCADE.
+CONTRACT_DEPENDENCIES: dict[Any, tuple[tuple[str, ...], list[tuple[str, Any]]]] = {
+    Renter: (("full_name",), [("rental", CarRental.renter_id), ("lease", PlateLease.renter_id)]),
+    Car: (("plate_number", "model"), [("rental", CarRental.car_id)]),
+    LicensePlate: (("plate_number",), [("lease", PlateLease.plate_id)]),
+}
+
+# Hit ranks: the whole key, the start of a key, anywhere in a key
+EXACT, PREFIX, SUBSTRING = 0, 1, 2
+
+# Entries read per kind of match, which bounds a query however common the term
+CANDIDATE_LIMIT = 200
+
+# session.info key of the entities whose entries a flush has to rewrite
+PENDING_CHANGES = "search_index_changes"
+
+# (ref_id, title, subtitle, status, keys)
+Document = tuple[uuid.UUID, str, str | None, str | None, list[Any]]
+
+
+def normalize(value: Any) -> str:
+    """Search form of a key or query: lower case, single spaces."""
+    return " ".join(str(value).split()).lower()
+
+
+def _renter_documents(connection: Connection, where: Any) -> Iterator[Document]:
+    statement = select(
+        Renter.id,
+        Renter.full_name,
+        Renter.phone,
+        Renter.driver_license_number,
+        Renter.phone_normalized,
+        Renter.driver_license_normalized,
+    )
+    for id, full_name, phone, license_number, *normalized in connection.execute(
+        statement.where(where)
+    ):
+        # Each later part of the name is a key too, so a last name is a prefix
+        # match; phone and license are also keys without their formatting
+        keys = [full_name, *full_name.split()[1:], phone, license_number, *normalized]
+        yield id, full_name, phone, None, keys
+
+
+def _car_documents(connection: Connection, where: Any) -> Iterator[Document]:
+    statement = select(
+        Car.id, Car.plate_number, Car.vin_number, Car.car_id, Car.year, Car.model, Car.status
+    )
+    for id, plate_number, vin_number, car_id, year, model, status in connection.execute(
+        statement.where(where)
+    ):
+        yield id, plate_number or model, f"{year} {model}", status, [plate_number, vin_number, car_id]
+
+
+def _plate_documents(connection: Connection, where: Any) -> Iterator[Document]:
+    statement = select(
+        LicensePlate.id, LicensePlate.plate_number, LicensePlate.plate_state, LicensePlate.status
+    )
+    for id, plate_number, plate_state, status in connection.execute(statement.where(where)):
+        yield id, plate_number, plate_state, status, [plate_number]
+
+
+def _rental_documents(connection: Connection, where: Any) -> Iterator[Document]:
+    statement = (
+        select(
+            CarRental.id,
+            Renter.full_name,
+            Car.plate_number,
+            Car.model,
+            CarRental.start_date,
+            CarRental.status,
+        )
+        .join(Renter, CarRental.renter_id == Renter.id)
+        .join(Car, CarRental.car_id == Car.id)
+    )
+    for id, full_name, plate_number, model, start_date, status in connection.execute(
+        statement.where(where)
+    ):
+        subtitle = f"{plate_number or model}, from {start_date}"
+        yield id, full_name, subtitle, status, [full_name, plate_number]
+
+
+def _lease_documents(connection: Connection, where: Any) -> Iterator[Document]:
+    statement = (
+        select(
+            PlateLease.id,
+            Renter.full_name,
+            LicensePlate.plate_number,
+            PlateLease.start_date,
+            PlateLease.status,
+        )
+        .join(Renter, PlateLease.renter_id == Renter.id)
+        .join(LicensePlate, PlateLease.plate_id == LicensePlate.id)
+    )
+    for id, full_name, plate_number, start_date, status in connection.execute(
+        statement.where(where)
+    ):
+        yield id, full_name, f"{plate_number}, from {start_date}", status, [full_name, plate_number]
+
+
+DOCUMENTS = {
+    "renter": _renter_documents,
+    "car": _car_documents,
+    "plate": _plate_documents,
+    "rental": _rental_documents,
+    "lease": _lease_documents,
+}
+
+
+def _chunks(ids: Iterable[Any], size: int = 500) -> Iterator[list[Any]]:
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def index(connection: Connection, entity: str, ids: Iterable[uuid.UUID] | None = None) -> int:
+    """
+    Rewrite the search entries of the given rows of an entity, or of all its
+    rows. Rows that no longer exist lose their entries. Returns the number
+    of entries written.
+    """
+    model = INDEXED_MODELS[entity]
+    batches: Iterable[Any]
+    if ids is None:
+        connection.execute(delete(SearchEntry).where(col(SearchEntry.entity) == entity))
+        batches = [true()]
+    else:
+        batches = []
+        for chunk in _chunks(ids):
+            connection.execute(
+                delete(SearchEntry).where(
+                    col(SearchEntry.entity) == entity, col(SearchEntry.ref_id).in_(chunk)
+                )
+            )
+            batches.append(col(model.id).in_(chunk))
+
+    written = 0
+    for where in batches:
+        entries = [
+            {
+                "entity": entity,
+                "ref_id": ref_id,
+                "key": key,
+                "title": title,
+                "subtitle": subtitle,
+                "status": status,
+            }
+            for ref_id, title, subtitle, status, keys in DOCUMENTS[entity](connection, where)
+            for key in dict.fromkeys(normalize(key) for key in keys if key is not None)
+            if key
+        ]
+        if entries:
+            connection.execute(insert(SearchEntry), entries)
+            written += len(entries)
+    return written
+
+
+def rebuild(connection: Connection) -> int:
+    """Rewrite the whole search index from the source tables."""
+    return sum(index(connection, entity) for entity in INDEXED_MODELS)
+
+
+def create_index(_target: Any, connection: Connection, **_kw: Any) -> None:
+    """
+    Create the trigram index over search keys when it does not exist yet
+    (the FTS5 table and its triggers on SQLite, a pg_trgm GIN index on
+    Postgres) and fill the search index from the source tables. Runs after
+    metadata.create_all, as the index is not a model.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        if inspect(connection).has_table(FTS_TABLE):
+            return
+    elif dialect == "postgresql":
+        indexes = inspect(connection).get_indexes(SearchEntry.__tablename__)
+        if any(index["name"] == "ix_searchentry_key_trgm" for index in indexes):
+            return
+    else:
+        return
+
+    # Entries first: the triggers below only follow changes of the entries
+    # the FTS table already holds
+    rebuild(connection)
+    if dialect == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(
+            text("CREATE INDEX ix_searchentry_key_trgm ON searchentry USING gin (key gin_trgm_ops)")
+        )
+        return
+
+    # External-content FTS5 table: it indexes searchentry.key by rowid
+    # without storing a second copy of the keys
+    connection.execute(
+        text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "key, content = 'searchentry', content_rowid = 'id', tokenize = 'trigram')"
+        )
+    )
+    connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+    connection.execute(
+        text(
+            "CREATE TRIGGER searchentry_fts_insert AFTER INSERT ON searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE} (rowid, key) VALUES (NEW.id, NEW.key); END"
+        )
+    )
+    connection.execute(
+        text(
+            "CREATE TRIGGER searchentry_fts_delete AFTER DELETE ON searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, key) "
+            "VALUES ('delete', OLD.id, OLD.key); END"
+        )
+    )
+    connection.execute(
+        text(
+            "CREATE TRIGGER searchentry_fts_update AFTER UPDATE ON searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, key) VALUES ('delete', OLD.id, OLD.key); "
+            f"INSERT INTO {FTS_TABLE} (rowid, key) VALUES (NEW.id, NEW.key); END"
+        )
+    )
+
+
+def _contract_ids(session: Session, obj: Any) -> Iterator[tuple[str, uuid.UUID]]:
+    _, contracts = CONTRACT_DEPENDENCIES[type(obj)]
+    for entity, foreign_key in contracts:
+        model = INDEXED_MODELS[entity]
+        for id in session.connection().execute(select(model.id).where(foreign_key == obj.id)).scalars():
+            yield entity, id
+
+
+def _collect_cascades(session: Session, _flush_context: Any, _instances: Any) -> None:
+    # Contracts the database deletes with a row never reach the session
+    changes = session.info.setdefault(PENDING_CHANGES, defaultdict(set))
+    for obj in session.deleted:
+        if type(obj) in CONTRACT_DEPENDENCIES:
+            for entity, id in _contract_ids(session, obj):
+                changes[entity].add(id)
+
+
+def _apply_changes(session: Session, _flush_context: Any) -> None:
+    changes = session.info.pop(PENDING_CHANGES, None) or defaultdict(set)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        entity = ENTITY_BY_MODEL.get(type(obj))
+        if entity is None or (obj in session.dirty and not session.is_modified(obj)):
+            continue
+        changes[entity].add(obj.id)
+        if obj in session.dirty and type(obj) in CONTRACT_DEPENDENCIES:
+            fields, _ = CONTRACT_DEPENDENCIES[type(obj)]
+            if any(inspect(obj).attrs[field].history.has_changes() for field in fields):
+                for contract_entity, id in _contract_ids(session, obj):
+                    changes[contract_entity].add(id)
+    connection = session.connection()
+    for entity, ids in changes.items():
+        if ids:
+            index(connection, entity, ids)
+
+
+def _discard_changes(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop(PENDING_CHANGES, None)
+
+
+def register(session_class: type[Session]) -> None:
+    """
+    Rewrite the search entries of every indexed row an ORM flush writes,
+    inside that flush. Bulk statements have to call index() themselves.
+    """
+    event.listen(session_class, "before_flush", _collect_cascades)
+    event.listen(session_class, "after_flush", _apply_changes)
+    event.listen(session_class, "after_soft_rollback", _discard_changes)
+
+
+def _rank(key: str, term: str) -> int:
+    if key == term:
+        return EXACT
+    if key.startswith(term):
+        return PREFIX
+    return SUBSTRING
+
+
+def search(*, session: Session, q: str, limit: int = 20) -> list[SearchHit]:
+    """
+    Hits for q across renters, cars, plates and contracts, best first:
+    whole-key matches, then key prefixes, then substrings.
+
+    Prefixes are read from the key B-tree and substrings from the trigram
+    index (pg_trgm on Postgres), each capped at CANDIDATE_LIMIT entries, so
+    the cost does not grow with the number of rows that contain the term.
+    Terms shorter than a trigram are matched as prefixes only.
+    """
+    term = normalize(q)
+    if not term:
+        return []
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    candidates = list(
+        session.exec(
+            select(SearchEntry)
+            .where(col(SearchEntry.key) >= term, col(SearchEntry.key) < upper)
+            .order_by(SearchEntry.key)
+            .limit(CANDIDATE_LIMIT)
+        )
+    )
+    if len(term) >= MIN_TRIGRAM_LENGTH:
+        if session.get_bind().dialect.name == "sqlite":
+            matches = col(SearchEntry.id).in_(
+                select(fts_table.c.rowid)
+                .where(literal_column(FTS_TABLE).op("MATCH")(match_phrase(term)))
+                .limit(CANDIDATE_LIMIT)
+            )
+        else:
+            matches = col(SearchEntry.key).contains(term)
+        candidates.extend(
+            session.exec(select(SearchEntry).where(matches).limit(CANDIDATE_LIMIT))
+        )
+
+    # Best-ranked key per entity row
+    best: dict[tuple[str, uuid.UUID], tuple[int, SearchEntry]] = {}
+    for entry in candidates:
+        rank = _rank(entry.key, term)
+        found = best.get((entry.entity, entry.ref_id))
+        if found is None or rank < found[0]:
+            best[(entry.entity, entry.ref_id)] = (rank, entry)
+    order = list(INDEXED_MODELS)
+    ranked = sorted(
+        best.values(),
+        key=lambda hit: (hit[0], order.index(hit[1].entity), hit[1].title),
+    )
+    return [
+        SearchHit(
+            type=entry.entity,
+            id=entry.ref_id,
+            title=entry.title,
+            subtitle=entry.subtitle,
+            status=entry.status,
+            matched=entry.key,
+        )
+        for _, entry in ranked[:limit]
+    ]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    argparse.ArgumentParser(
+        description="Rebuild the search index from cars, plates, renters and contracts"
+    ).parse_args()
+    # app.core.db registers this module's listeners, so it is imported late
+    from app.core.db import engine
+
+    with Session(engine) as session:
+        written = rebuild(session.connection())
+        session.commit()
+    logger.info("Wrote %s search entries", written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import logging
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlmodel import Session, col, delete, func, select
+
+from app.models import Car, CarRental, LicensePlate, PlateLease, Renter, StatusCounter
+
+logger = logging.getLogger(__name__)
+
+# model -> status columns counted in the status counter
+COUNTED_FIELDS: dict[Any, tuple[str, ...]] = {
+    Car: ("status",),
+    LicensePlate: ("status",),
+    CarRental: ("status", "payment_status"),
+    PlateLease: ("status", "payment_status"),
+}
+
+# model -> (contract model, foreign key) rows removed with it by ON DELETE CASCADE
+CASCADED_CONTRACTS: dict[Any, list[tuple[Any, Any]]] = {
+    Renter: [(CarRental, CarRental.renter_id), (PlateLease, PlateLease.renter_id)],
+    Car: [(CarRental, CarRental.car_id)],
+    LicensePlate: [(PlateLease, PlateLease.plate_id)],
+}
+
+# session.info key of the counter changes collected before a flush
+PENDING_DELTAS = "status_count_deltas"
+
+# (entity, field, value) -> change in count
+Deltas = Counter[tuple[str, str, str]]
+
+
+def count_rows(connection: Connection, model: Any, where: Any = None) -> Deltas:
+    """Count rows of a model per value of each of its counted fields."""
+    counts: Deltas = Counter()
+    for field in COUNTED_FIELDS[model]:
+        column = getattr(model, field)
+        statement = select(column, func.count()).group_by(column)
+        if where is not None:
+            statement = statement.where(where)
+        for value, count in connection.execute(statement):
+            counts[(model.__tablename__, field, value)] += count
+    return counts
+
+
+def adjust(connection: Connection, deltas: Deltas) -> None:
+    """Add deltas to the counters in the connection's transaction (upsert per counter)."""
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    table = StatusCounter.__table__
+    for (entity, field, value), delta in deltas.items():
+        if not delta or value is None:
+            continue
+        statement = dialect.insert(table).values(
+            entity=entity, field=field, value=value, count=delta
+        )
+        connection.execute(
+            statement.on_conflict_do_update(
+                index_elements=["entity", "field", "value"],
+                set_={"count": table.c["count"] + delta},
+            )
+        )
+
+
+def remove_rows(connection: Connection, model: Any, where: Any) -> None:
+    """Take rows that are about to be bulk-deleted out of the counter."""
+    removed = count_rows(connection, model, where)
+    adjust(connection, Counter({key: -count for key, count in removed.items()}))
+
+
+def stored_value(session: Session, obj: Any, field: str) -> Any:
+    """Value of a counted field as it is in the database, before this flush."""
+    history = inspect(obj).attrs[field].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    model = type(obj)
+    return session.connection().execute(
+        select(getattr(model, field)).where(model.id == inspect(obj).identity[0])
+    ).scalar_one_or_none()
+
+
+def _collect_deltas(session: Session, _flush_context: Any, _instances: Any) -> None:
+    deltas: Deltas = session.info.setdefault(PENDING_DELTAS, Counter())
+    for obj in session.new:
+        for field in COUNTED_FIELDS.get(type(obj), ()):
+            deltas[(obj.__tablename__, field, getattr(obj, field))] += 1
+    for obj in session.dirty:
+        if obj in session.deleted:
+            continue
+        for field in COUNTED_FIELDS.get(type(obj), ()):
+            if not inspect(obj).attrs[field].history.has_changes():
+                continue
+            old, new = stored_value(session, obj, field), getattr(obj, field)
+            if old != new:
+                deltas[(obj.__tablename__, field, old)] -= 1
+                deltas[(obj.__tablename__, field, new)] += 1
+    for obj in session.deleted:
+        for field in COUNTED_FIELDS.get(type(obj), ()):
+            deltas[(obj.__tablename__, field, stored_value(session, obj, field))] -= 1
+        # Contracts the database deletes with this row never reach the session
+        for model, foreign_key in CASCADED_CONTRACTS.get(type(obj), ()):
+            flushed_ids = [other.id for other in session.deleted if isinstance(other, model)]
+            deltas.subtract(
+                count_rows(
+                    session.connection(),
+                    model,
+                    (foreign_key == obj.id) & col(model.id).not_in(flushed_ids),
+                )
+            )
+
+
+def _apply_deltas(session: Session, _flush_context: Any) -> None:
+    deltas = session.info.pop(PENDING_DELTAS, None)
+    if deltas:
+        adjust(session.connection(), deltas)
+
+
+def _discard_deltas(session: Session, _previous_transaction: Any) -> None:
+    session.info.pop(PENDING_DELTAS, None)
+
+
+def register(session_class: type[Session]) -> None:
+    """
+    Keep the status counter in step with every ORM status change, inside
+    the flush that writes it. Bulk statements have to call adjust() themselves.
+    """
+    event.listen(session_class, "before_flush", _collect_deltas)
+    event.listen(session_class, "after_flush", _apply_deltas)
+    event.listen(session_class, "after_soft_rollback", _discard_deltas)
+
+
+def verify(*, session: Session, rebuild: bool = False) -> int:
+    """
+    Compare the status counter against counts from the source tables.
+    Returns the number of drifted counters; with rebuild, rewrites the counter.
+    """
+    connection = session.connection()
+    expected: Deltas = Counter()
+    for model in COUNTED_FIELDS:
+        expected.update(count_rows(connection, model))
+    recorded: Deltas = Counter(
+        {
+            (counter.entity, counter.field, counter.value): counter.count
+            for counter in session.exec(select(StatusCounter))
+        }
+    )
+    drifted = [key for key in expected.keys() | recorded.keys() if expected[key] != recorded[key]]
+    for entity, field, value in sorted(drifted):
+        logger.warning(
+            "%s.%s=%s count drift: counter %s, actual %s",
+            entity,
+            field,
+            value,
+            recorded[(entity, field, value)],
+            expected[(entity, field, value)],
+        )
+    if rebuild and drifted:
+        session.execute(delete(StatusCounter))
+        session.add_all(
+            StatusCounter(entity=entity, field=field, value=value, count=count)
+            for (entity, field, value), count in expected.items()
+            if count
+        )
+        session.commit()
+    return len(drifted)
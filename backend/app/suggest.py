@@ -0,0 +1,159 @@
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlmodel import Session, func, select
+
+from app.models import Car, Renter
+from app.status_counts import stored_value
+
+logger = logging.getLogger(__name__)
+
+# suggestion field -> column whose distinct values are suggested
+SUGGEST_FIELDS: dict[str, Any] = {
+    "model": Car.model,
+    "color": Car.color,
+    "marker": Car.marker,
+    "full_name": Renter.full_name,
+}
+
+# session.info key of the value changes waiting for the transaction to commit
+PENDING_CHANGES = "suggestion_changes"
+
+# (suggestion field, value) -> change in the number of rows with the value
+Changes = Counter[tuple[str, str]]
+
+
+class SortedValues:
+    """
+    Distinct values of one field with their row counts, kept in a list
+    sorted case-insensitively so a prefix is found with bisect.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[tuple[str, str]] = []
+        self._counts: Counter[str] = Counter()
+
+    def add(self, value: str, count: int = 1) -> None:
+        if self._counts[value] <= 0:
+            insort(self._keys, (value.casefold(), value))
+        self._counts[value] += count
+
+    def remove(self, value: str, count: int = 1) -> None:
+        if self._counts[value] <= 0:
+            return
+        self._counts[value] -= count
+        if self._counts[value] <= 0:
+            del self._counts[value]
+            index = bisect_left(self._keys, (value.casefold(), value))
+            if index < len(self._keys) and self._keys[index][1] == value:
+                del self._keys[index]
+
+    def prefixed(self, prefix: str, limit: int) -> list[str]:
+        folded = prefix.casefold()
+        values = []
+        for index in range(bisect_left(self._keys, (folded,)), len(self._keys)):
+            key, value = self._keys[index]
+            if not key.startswith(folded) or len(values) >= limit:
+                break
+            values.append(value)
+        return values
+
+
+class Suggestions:
+    """
+    In-memory type-ahead dictionary of every SUGGEST_FIELDS column. Loaded
+    from the database once; ORM writes are applied when their transaction
+    commits. Each worker process has its own copy, so writes made by other
+    processes show up at the next load().
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, SortedValues] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, session: Session) -> None:
+        values = {name: SortedValues() for name in SUGGEST_FIELDS}
+        for name, column in SUGGEST_FIELDS.items():
+            for value, count in session.exec(select(column, func.count()).group_by(column)):
+                if value:
+                    values[name].add(value, count)
+        with self._lock:
+            self._values = values
+            self.loaded = True
+        logger.info("Loaded suggestions for %s", ", ".join(SUGGEST_FIELDS))
+
+    def apply(self, changes: Changes) -> None:
+        with self._lock:
+            if not self.loaded:
+                return
+            for (name, value), change in changes.items():
+                if change > 0:
+                    self._values[name].add(value, change)
+                elif change < 0:
+                    self._values[name].remove(value, -change)
+
+    def suggest(self, field: str, prefix: str, limit: int = 10) -> list[str]:
+        with self._lock:
+            return self._values[field].prefixed(prefix, limit)
+
+
+suggestions = Suggestions()
+
+def _fields_by_model() -> dict[Any, list[tuple[str, str]]]:
+    fields: dict[Any, list[tuple[str, str]]] = {}
+    for name, column in SUGGEST_FIELDS.items():
+        fields.setdefault(column.class_, []).append((name, column.key))
+    return fields
+
+
+# model -> [(suggestion field, attribute)]
+FIELDS_BY_MODEL = _fields_by_model()
+
+
+def _collect_changes(session: Session, _flush_context: Any, _instances: Any) -> None:
+    changes: Changes = session.info.setdefault(PENDING_CHANGES, Counter())
+    for obj in session.new:
+        for name, attribute in FIELDS_BY_MODEL.get(type(obj), ()):
+            if value := getattr(obj, attribute):
+                changes[(name, value)] += 1
+    for obj in session.dirty:
+        if obj in session.deleted:
+            continue
+        for name, attribute in FIELDS_BY_MODEL.get(type(obj), ()):
+            if not inspect(obj).attrs[attribute].history.has_changes():
+                continue
+            old, new = stored_value(session, obj, attribute), getattr(obj, attribute)
+            if old != new:
+                if old:
+                    changes[(name, old)] -= 1
+                if new:
+                    changes[(name, new)] += 1
+    for obj in session.deleted:
+        for name, attribute in FIELDS_BY_MODEL.get(type(obj), ()):
+            if value := stored_value(session, obj, attribute):
+                changes[(name, value)] -= 1
+
+
+def _apply_changes(session: Session) -> None:
+    changes = session.info.pop(PENDING_CHANGES, None)
+    if changes:
+        suggestions.apply(changes)
+
+
+def _discard_changes(session: Session) -> None:
+    session.info.pop(PENDING_CHANGES, None)
+
+
+def register(session_class: type[Session]) -> None:
+    """
+    Apply the suggestion field changes of every ORM flush to the in-memory
+    dictionary once the transaction commits; a rollback discards them.
+    """
+    event.listen(session_class, "before_flush", _collect_changes)
+    event.listen(session_class, "after_commit", _apply_changes)
+    event.listen(session_class, "after_rollback", _discard_changes)
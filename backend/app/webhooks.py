@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Engine, event
+from sqlmodel import Session, col, delete, select, update
+
+from app.core.config import settings
+from app.models import Webhook, WebhookDelivery, get_ny_time
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_EVENTS = (
+    "payment.posted",
+    "rental.paid_off",
+    "lease.paid_off",
+    "rental.frozen",
+    "lease.frozen",
+)
+
+# session.info key set when a transaction queued deliveries
+DELIVERIES_QUEUED = "webhooks_deliveries_queued"
+
+
+def enqueue(session: Session, event_name: str, data: Any) -> None:
+    """
+    Queue a delivery of the event to every active webhook subscribed to it.
+    The deliveries are written in the session's transaction, so they are
+    sent if and only if it commits, and the request pays for an insert,
+    not for the HTTP calls.
+    """
+    webhooks = session.exec(select(Webhook).where(col(Webhook.is_active).is_(True))).all()
+    payload = jsonable_encoder(data)
+    now = get_ny_time()
+    for webhook in webhooks:
+        if webhook.events and event_name not in webhook.events:
+            continue
+        session.add(
+            WebhookDelivery(
+                webhook_id=webhook.id,
+                event=event_name,
+                payload=payload,
+                next_attempt_time=now,
+                create_time=now,
+            )
+        )
+        session.info[DELIVERIES_QUEUED] = True
+
+
+def sign(secret: str, timestamp: int, body: bytes) -> str:
+    """
+    X-Webhook-Signature of a request: HMAC-SHA256 of "<timestamp>.<body>"
+    with the webhook's secret, hex encoded. Receivers recompute it, and
+    reject stale X-Webhook-Timestamp values to stop replays.
+    """
+    message = f"{timestamp}.".encode() + body
+    return "sha256=" + hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Wait before retrying a delivery that failed `attempts` times: doubling
+    from WEBHOOK_RETRY_SECONDS up to WEBHOOK_RETRY_MAX_SECONDS, plus up to
+    10% jitter so a batch that failed together does not retry together.
+    """
+    seconds = min(
+        settings.WEBHOOK_RETRY_SECONDS * 2 ** (attempts - 1), settings.WEBHOOK_RETRY_MAX_SECONDS
+    )
+    return timedelta(seconds=seconds * (1 + random.random() / 10))
+
+
+def _claim_due(session: Session, now: datetime) -> list[tuple[WebhookDelivery, Webhook]]:
+    """
+    Take a batch of due deliveries for this worker: their next attempt is
+    moved past the request timeout, so other workers skip them unless this
+    one dies before recording the outcome.
+    """
+    due = (
+        select(WebhookDelivery.id)
+        .where(WebhookDelivery.status == "pending", col(WebhookDelivery.next_attempt_time) <= now)
+        .order_by(WebhookDelivery.next_attempt_time, WebhookDelivery.id)
+        .limit(settings.WEBHOOK_BATCH_SIZE)
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        due = due.with_for_update(skip_locked=True)
+    ids = session.execute(
+        update(WebhookDelivery)
+        .where(col(WebhookDelivery.id).in_(due.scalar_subquery()))
+        .values(
+            attempts=WebhookDelivery.attempts + 1,
+            next_attempt_time=now + timedelta(seconds=2 * settings.WEBHOOK_TIMEOUT_SECONDS),
+        )
+        .returning(WebhookDelivery.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    session.commit()
+    if not ids:
+        return []
+    batch = list(
+        session.exec(
+            select(WebhookDelivery, Webhook)
+            .join(Webhook)
+            .where(col(WebhookDelivery.id).in_(ids))
+        ).all()
+    )
+    # No transaction is held open while the requests are out
+    session.expunge_all()
+    session.commit()
+    return batch
+
+
+async def _send(
+    client: httpx.AsyncClient, delivery: WebhookDelivery, webhook: Webhook
+) -> tuple[int | None, str | None]:
+    """Response status and error (None when delivered) of one attempt."""
+    body = json.dumps(
+        {
+            "id": delivery.id,
+            "event": delivery.event,
+            "created": delivery.create_time.isoformat(),
+            "data": delivery.payload,
+        },
+        separators=(",", ":"),
+    ).encode()
+    timestamp = int(time.time())
+    headers = {
+        "Content-Type": "application/json",
+        "X-Webhook-Id": str(delivery.id),
+        "X-Webhook-Event": delivery.event,
+        "X-Webhook-Timestamp": str(timestamp),
+        "X-Webhook-Signature": sign(webhook.secret, timestamp, body),
+    }
+    try:
+        response = await client.post(webhook.url, content=body, headers=headers)
+    except httpx.HTTPError as error:
+        return None, f"{type(error).__name__}: {error}"[:255]
+    if response.is_success:
+        return response.status_code, None
+    return response.status_code, f"HTTP {response.status_code}"
+
+
+async def dispatch_due(engine: Engine, client: httpx.AsyncClient) -> int:
+    """
+    Send one batch of due deliveries concurrently over the client's
+    connection pool and record the outcomes. Returns the batch size.
+    """
+    with Session(engine) as session:
+        batch = _claim_due(session, get_ny_time())
+        if not batch:
+            return 0
+        results = await asyncio.gather(
+            *(_send(client, delivery, webhook) for delivery, webhook in batch)
+        )
+        now = get_ny_time()
+        for (delivery, webhook), (response_status, error) in zip(batch, results, strict=True):
+            delivery.response_status = response_status
+            delivery.last_error = error
+            if error is None:
+                delivery.status = "delivered"
+                delivery.delivered_time = now
+            elif delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                delivery.status = "failed"
+                logger.warning(
+                    "Webhook delivery %s to %s failed %s times, giving up: %s",
+                    delivery.id, webhook.url, delivery.attempts, error,
+                )
+            else:
+                delivery.next_attempt_time = now + retry_delay(delivery.attempts)
+            session.add(delivery)
+        session.commit()
+        return len(batch)
+
+
+class WebhookDispatcher:
+    """
+    Sends queued webhook deliveries from a background thread running its
+    own event loop, with one pooled httpx client for all requests. Commits
+    that queue deliveries in this process wake it at once; deliveries from
+    other workers and retries are picked up every WEBHOOK_POLL_SECONDS.
+    """
+
+    def __init__(self) -> None:
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._stopping = False
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self._run(engine),), name="webhook-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.WEBHOOK_TIMEOUT_SECONDS + 5)
+            self._thread = None
+
+    def notify(self) -> None:
+        """Look for due deliveries now rather than at the next poll."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self, engine: Engine) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        limits = httpx.Limits(max_connections=settings.WEBHOOK_BATCH_SIZE)
+        async with httpx.AsyncClient(
+            timeout=settings.WEBHOOK_TIMEOUT_SECONDS, limits=limits
+        ) as client:
+            while not self._stopping:
+                self._wake.clear()
+                try:
+                    sent = await dispatch_due(engine, client)
+                except Exception:
+                    logger.exception("Webhook dispatch failed")
+                    sent = 0
+                if sent == settings.WEBHOOK_BATCH_SIZE:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wake.wait(), settings.WEBHOOK_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        self._loop = None
+
+
+dispatcher = WebhookDispatcher()
+
+
+def _notify_dispatcher(session: Session) -> None:
+    if session.info.pop(DELIVERIES_QUEUED, False):
+        dispatcher.notify()
+
+
+def _forget_deliveries(session: Session) -> None:
+    session.info.pop(DELIVERIES_QUEUED, None)
+
+
+def register(session_class: type[Session]) -> None:
+    """Wake this process's dispatcher when a transaction that queued deliveries commits."""
+    event.listen(session_class, "after_commit", _notify_dispatcher)
+    event.listen(session_class, "after_rollback", _forget_deliveries)
+
+
+def prune(*, session: Session, older_than_days: int | None = None, now: datetime | None = None) -> int:
+    """Delete sent and failed deliveries older than the retention period. Returns the number deleted."""
+    days = settings.WEBHOOK_RETENTION_DAYS if older_than_days is None else older_than_days
+    cutoff = (now or get_ny_time()) - timedelta(days=days)
+    result = session.execute(
+        delete(WebhookDelivery).where(
+            col(WebhookDelivery.status).in_(("delivered", "failed")),
+            col(WebhookDelivery.create_time) < cutoff,
+        )
+    )
+    session.commit()
+    return result.rowcount
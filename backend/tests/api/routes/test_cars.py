@@ -0,0 +1,468 @@
+from datetime import timedelta
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, func, select
+
+from app import plate_search, reports
+from app.api import listing
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Car, get_ny_time
+from tests.utils.rental import (
+    create_random_plate,
+    create_random_renter,
+    random_plate_number,
+)
+
+
+def _create_car(db: Session, **kwargs: object) -> Car:
+    car = Car(model="Honda Accord", year=2021, plate_number=random_plate_number(), **kwargs)
+    db.add(car)
+    db.commit()
+    db.refresh(car)
+    return car
+
+
+def test_read_expiring_cars(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    now = get_ny_time()
+    soon = _create_car(db, registration_expires_at=now + timedelta(days=5))
+    insured = _create_car(
+        db,
+        registration_expires_at=now + timedelta(days=400),
+        insurance_expires_at=now + timedelta(days=2),
+    )
+    later = _create_car(db, insurance_expires_at=now + timedelta(days=90))
+
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/expiring",
+        params={"within_days": 30, "include_expired": False, "limit": 1000},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    ids = [car["id"] for car in response.json()["data"]]
+    assert str(later.id) not in ids
+    assert ids.index(str(insured.id)) < ids.index(str(soon.id))
+
+
+def test_expiry_digest(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    today = get_ny_time().date()
+    car = _create_car(db, insurance_expires_at=get_ny_time() + timedelta(days=3))
+    lapsed = _create_car(db, registration_expires_at=get_ny_time() - timedelta(days=5))
+    long_lapsed = _create_car(db, registration_expires_at=get_ny_time() - timedelta(days=90))
+    written = reports.write_expiry_digest(
+        session=db, digest_date=today, within_days=30, lookback_days=30
+    )
+    assert written >= 2
+
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/expiry-digest",
+        params={"digest_date": str(today)},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    digests = [d for d in response.json()["data"] if d["car_id"] == str(car.id)]
+    assert len(digests) == 1
+    assert digests[0]["document"] == "insurance"
+    car_ids = {d["car_id"] for d in response.json()["data"]}
+    assert str(lapsed.id) in car_ids
+    assert str(long_lapsed.id) not in car_ids
+    assert digests[0]["days_left"] == 3
+    assert digests[0]["plate_number"] == car.plate_number
+
+
+def test_create_car_assigns_next_car_id(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    data = {"model": "Toyota Sienna", "year": 2023, "plate_number": random_plate_number()}
+    first = client.post(
+        f"{settings.API_V1_STR}/cars/", headers=superuser_token_headers, json=data
+    ).json()
+    data["plate_number"] = random_plate_number()
+    second = client.post(
+        f"{settings.API_V1_STR}/cars/", headers=superuser_token_headers, json=data
+    ).json()
+    assert second["car_id"] == first["car_id"] + 1
+
+
+def test_create_car_duplicate_plate_number(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = _create_car(db)
+    data = {"model": "Toyota Sienna", "year": 2023, "plate_number": car.plate_number}
+    response = client.post(
+        f"{settings.API_V1_STR}/cars/", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == (
+        f"A car with plate number '{car.plate_number}' already exists."
+    )
+
+    other = _create_car(db)
+    response = client.put(
+        f"{settings.API_V1_STR}/cars/{other.id}",
+        headers=superuser_token_headers,
+        json={"plate_number": car.plate_number},
+    )
+    assert response.status_code == 400
+
+
+def test_create_car_duplicate_car_id(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    car = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": "Toyota Sienna", "year": 2023},
+    ).json()
+    response = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": "Toyota Sienna", "year": 2023, "car_id": car["car_id"]},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"A car with ID '{car['car_id']}' already exists."
+
+
+def _lose_car_id_race(db: Session, races: int) -> Any:
+    """Give the next `races` new cars a taken car_id, as a concurrent create would."""
+    taken = (db.exec(select(func.max(Car.car_id))).one() or 0) + 1
+    _create_car(db, car_id=taken)
+    lost = []
+
+    def hook(session: Session, _flush_context: Any, _instances: Any) -> None:
+        for car in session.new:
+            if isinstance(car, Car) and len(lost) < races:
+                lost.append(car)
+                car.car_id = taken
+
+    return hook
+
+
+def test_create_car_allocates_again_after_losing_a_race(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    hook = _lose_car_id_race(db, races=1)
+    event.listen(Session, "before_flush", hook)
+    try:
+        response = client.post(
+            f"{settings.API_V1_STR}/cars/",
+            headers=superuser_token_headers,
+            json={"model": "Toyota Sienna", "year": 2023},
+        )
+    finally:
+        event.remove(Session, "before_flush", hook)
+    assert response.status_code == 200
+    assert response.json()["car_id"] is not None
+
+
+def test_create_car_reports_a_generated_car_id_conflict(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    hook = _lose_car_id_race(db, races=2)
+    event.listen(Session, "before_flush", hook)
+    try:
+        response = client.post(
+            f"{settings.API_V1_STR}/cars/",
+            headers=superuser_token_headers,
+            json={"model": "Toyota Sienna", "year": 2023},
+        )
+    finally:
+        event.remove(Session, "before_flush", hook)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Could not allocate a car ID, retry."
+
+
+def test_car_and_plate_are_linked_by_plate_number(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    plate = create_random_plate(db)
+    renter = create_random_renter(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": "Sienna", "year": 2021, "plate_number": plate.plate_number},
+    )
+    car = response.json()
+    assert car["plate_id"] == str(plate.id)
+    client.post(
+        f"{settings.API_V1_STR}/leases/",
+        headers=superuser_token_headers,
+        json={
+            "plate_id": str(plate.id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    )
+
+    response = client.get(f"{settings.API_V1_STR}/cars/{car['id']}", headers=superuser_token_headers)
+    assert response.status_code == 200
+    linked_plate = response.json()["plate"]
+    assert linked_plate["plate_number"] == plate.plate_number
+    assert linked_plate["status"] == "rented"
+    assert linked_plate["current_renter_name"] == renter.full_name
+
+    response = client.get(f"{settings.API_V1_STR}/plates/{plate.id}", headers=superuser_token_headers)
+    assert response.json()["car"]["id"] == car["id"]
+
+    # Moving the car to another plate number unlinks it
+    response = client.put(
+        f"{settings.API_V1_STR}/cars/{car['id']}",
+        headers=superuser_token_headers,
+        json={"plate_number": random_plate_number()},
+    )
+    assert response.json()["plate_id"] is None
+    response = client.get(f"{settings.API_V1_STR}/plates/{plate.id}", headers=superuser_token_headers)
+    assert response.json()["car"] is None
+
+
+def test_read_cars_facets(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    model = "Sienna " + random_plate_number()
+    for year, status in ((2020, "available"), (2021, "available"), (2021, "maintenance")):
+        db.add(Car(model=model, year=year, status=status, plate_number=random_plate_number()))
+    db.commit()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        params={"model": model, "facets": "status,year"},
+    )
+    content = response.json()
+    assert content["count"] == 3
+    assert content["facets"] == {
+        "status": {"available": 2, "maintenance": 1},
+        "year": {"2020": 1, "2021": 2},
+    }
+
+
+def test_read_cars_order_by(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    model = "Sienna " + random_plate_number()
+    for year in (2021, 2019, 2021, 2020):
+        db.add(Car(model=model, year=year, plate_number=random_plate_number()))
+    db.commit()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        params={"model": model, "order_by": "-year"},
+    )
+    data = response.json()["data"]
+    assert [car["year"] for car in data] == [2021, 2021, 2020, 2019]
+    assert data[0]["id"] > data[1]["id"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        params={"order_by": "notes"},
+    )
+    assert response.status_code == 400
+
+
+def test_car_sort_is_served_by_index(db: Session) -> None:
+    statement = (
+        select(Car)
+        .order_by(*listing.order_by_clauses("-year", source=Car, allowed=["year"]))
+        .limit(10)
+    )
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    assert "ix_car_year_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_fleet_search(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    vin = "1FLEET" + random_plate_number()
+    for suffix, wav, year in (("A", 1, 2019), ("B", 1, 2022), ("C", 0, 2022)):
+        db.add(
+            Car(
+                model="Sienna",
+                year=year,
+                wav=wav,
+                color="white",
+                vin_number=vin + suffix,
+                plate_number=random_plate_number(),
+            )
+        )
+    db.commit()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        params={
+            "status": "available",
+            "wav": 1,
+            "year_min": 2020,
+            "color": "white",
+            "vin_prefix": vin,
+        },
+    )
+    content = response.json()
+    assert content["count"] == 1
+    assert content["data"][0]["vin_number"] == vin + "B"
+
+
+def test_fleet_search_is_served_by_indexes(db: Session) -> None:
+    def plan(statement: Any) -> str:
+        sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+        return " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+    fleet = select(Car).where(Car.status == "available", Car.wav == 1, Car.year >= 2020)
+    assert "ix_car_status_wav_year" in plan(fleet)
+    by_vin = select(Car).where(*listing.prefix_filter(Car.vin_number, "1FT"))
+    assert "ix_car_vin_number" in plan(by_vin)
+
+
+def test_plate_number_substring_search(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    plate = create_random_plate(db)
+    car = _create_car(db)
+    car.plate_number = plate.plate_number
+    db.add(car)
+    db.commit()
+    middle = plate.plate_number[2:6]
+
+    for path in ("cars", "plates"):
+        response = client.get(
+            f"{settings.API_V1_STR}/{path}/",
+            headers=superuser_token_headers,
+            params={"plate_number": middle.lower()},
+        )
+        numbers = [item["plate_number"] for item in response.json()["data"]]
+        assert plate.plate_number in numbers
+        assert all(middle in number for number in numbers)
+
+    # Renaming the car keeps the number indexed while the plate still has it
+    car.plate_number = random_plate_number()
+    db.add(car)
+    db.commit()
+    response = client.get(
+        f"{settings.API_V1_STR}/plates/",
+        headers=superuser_token_headers,
+        params={"plate_number": plate.plate_number},
+    )
+    assert [item["id"] for item in response.json()["data"]] == [str(plate.id)]
+    response = client.get(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        params={"plate_number": car.plate_number[1:]},
+    )
+    assert [item["id"] for item in response.json()["data"]] == [str(car.id)]
+
+
+def test_plate_number_search_is_served_by_trigram_index(db: Session) -> None:
+    statement = select(Car).where(plate_search.plate_number_contains(db, Car.plate_number, "123"))
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    assert plate_search.TRIGRAM_TABLE in plan
+    assert "ix_car_plate_number" in plan
+
+
+def test_car_reads_answer_conditional_requests(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = _create_car(db)
+    url = f"{settings.API_V1_STR}/cars/{car.id}"
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    not_modified = client.get(url, headers={**superuser_token_headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+    # Unchanged data is served from the response cache: only the token
+    # check and the write version lookup reach the database
+    statements: list[str] = []
+
+    def record(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        cached = client.get(url, headers=superuser_token_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert cached.json() == response.json()
+    assert len(statements) == 2
+    assert "FROM user" in statements[0] and "FROM changelog" in statements[1]
+
+    # Renting the car out changes it, and so its ETag
+    renter = create_random_renter(db)
+    client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        json={
+            "car_id": str(car.id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    )
+    response = client.get(url, headers={**superuser_token_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["current_renter_id"] == str(renter.id)
+
+    # So does renaming its renter, which the car list shows
+    list_url = f"{settings.API_V1_STR}/cars/"
+    params = {"plate_number": car.plate_number}
+    listed = client.get(list_url, headers=superuser_token_headers, params=params)
+    client.put(
+        f"{settings.API_V1_STR}/renters/{renter.id}",
+        headers=superuser_token_headers,
+        json={"full_name": "Renamed Renter"},
+    )
+    response = client.get(
+        list_url,
+        headers={**superuser_token_headers, "If-None-Match": listed.headers["ETag"]},
+        params=params,
+    )
+    assert response.status_code == 200
+    assert response.json()["data"][0]["current_renter_name"] == "Renamed Renter"
+
+
+def test_car_list_is_compressed_for_clients_that_accept_it(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        _create_car(db)
+    url = f"{settings.API_V1_STR}/cars/"
+    params = {"limit": 1000}
+    plain = client.get(
+        url, headers={**superuser_token_headers, "Accept-Encoding": "identity"}, params=params
+    )
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.content) >= settings.COMPRESSION_MINIMUM_SIZE
+
+    # httpx decodes the body; the cached compressed copy shares the ETag
+    for _ in range(2):
+        gzipped = client.get(
+            url, headers={**superuser_token_headers, "Accept-Encoding": "gzip"}, params=params
+        )
+        assert gzipped.headers["Content-Encoding"] == "gzip"
+        assert int(gzipped.headers["Content-Length"]) < len(plain.content)
+        assert gzipped.headers["ETag"] == plain.headers["ETag"]
+        assert "Accept-Encoding" in gzipped.headers["Vary"]
+        assert gzipped.content == plain.content
+
+    # Bodies the handlers return go through the middleware
+    schema = client.get(f"{settings.API_V1_STR}/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert schema.headers["Content-Encoding"] == "gzip"
+    health = client.get(
+        f"{settings.API_V1_STR}/utils/health-check/", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "Content-Encoding" not in health.headers
+    assert health.json() is True
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, update
+
+from app import changelog
+from app.core.config import settings
+from app.models import ChangeLog
+from tests.utils.rental import create_random_renter, random_plate_number
+
+
+def _changes(client: TestClient, headers: dict[str, str], **params: Any) -> dict[str, Any]:
+    response = client.get(f"{settings.API_V1_STR}/changes/", headers=headers, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_change_feed_records_every_write(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    since = _changes(client, superuser_token_headers)["next_since"]
+    renter = create_random_renter(db)
+    car = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": "Sienna", "year": 2021, "plate_number": random_plate_number()},
+    ).json()
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        json={
+            "car_id": car["id"],
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+    client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 40.0, "payment_date": "2026-01-05"},
+    )
+    client.delete(f"{settings.API_V1_STR}/cars/{car['id']}", headers=superuser_token_headers)
+
+    feed = _changes(client, superuser_token_headers, since=since)
+    changes = [(change["entity"], change["id"], change["op"]) for change in feed["data"]]
+    assert changes[0] == ("renter", str(renter.id), "insert")
+    assert ("car", car["id"], "insert") in changes
+    assert ("rental", rental["id"], "insert") in changes
+    # The car is rented, then deleted with its rental by the cascade
+    assert changes.index(("car", car["id"], "update")) < changes.index(("car", car["id"], "delete"))
+    assert ("rental", rental["id"], "delete") in changes
+    paid = [
+        change["snapshot"]["paid_amount"]
+        for change in feed["data"]
+        if change["id"] == rental["id"] and change["op"] == "update"
+    ]
+    assert paid[-1] == 40.0
+    seqs = [change["seq"] for change in feed["data"]]
+    assert seqs == sorted(seqs) and feed["next_since"] == seqs[-1]
+
+    assert _changes(client, superuser_token_headers, since=feed["next_since"])["data"] == []
+
+
+def test_change_feed_reports_pruned_changes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    since = _changes(client, superuser_token_headers)["next_since"]
+    create_random_renter(db)
+    create_random_renter(db)
+    db.execute(
+        update(ChangeLog)
+        .where(col(ChangeLog.seq) <= since + 1)
+        .values(create_time=datetime(2000, 1, 1))
+    )
+    db.commit()
+    assert changelog.prune(session=db) >= 1
+
+    response = client.get(
+        f"{settings.API_V1_STR}/changes/", headers=superuser_token_headers, params={"since": since}
+    )
+    assert response.status_code == 410
+    assert len(_changes(client, superuser_token_headers, since=since + 1)["data"]) == 1
@@ -0,0 +1,105 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import anyio
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import events
+from app.core.config import settings
+from app.core.db import engine
+from tests.utils.rental import (
+    create_random_car,
+    create_random_renter,
+    random_plate_number,
+)
+
+
+async def _connected() -> bool:
+    return False
+
+
+async def _next_event(messages: AsyncIterator[str]) -> dict[str, Any]:
+    """The next event of the stream, skipping keepalives."""
+    with anyio.fail_after(5):
+        while True:
+            message = await messages.__anext__()
+            if message.startswith("id: "):
+                fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+                return {"event": fields["event"], "id": int(fields["id"]), **json.loads(fields["data"])}
+
+
+def test_event_stream_publishes_committed_writes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    renter = create_random_renter(db)
+
+    async def listen() -> list[dict[str, Any]]:
+        messages = events.stream(
+            engine=engine, topics={"cars", "payments"}, is_disconnected=_connected
+        )
+        try:
+            assert await messages.__anext__() == "retry: 3000\n\n"
+            car = client.post(
+                f"{settings.API_V1_STR}/cars/",
+                headers=superuser_token_headers,
+                json={"model": "Sienna", "year": 2021, "plate_number": random_plate_number()},
+            ).json()
+            rental = client.post(
+                f"{settings.API_V1_STR}/rentals/",
+                headers=superuser_token_headers,
+                json={
+                    "car_id": car["id"],
+                    "renter_id": str(renter.id),
+                    "start_date": "2026-01-01",
+                    "total_amount": 100.0,
+                },
+            ).json()
+            client.post(
+                f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+                headers=superuser_token_headers,
+                json={"amount": 40.0, "payment_date": "2026-01-05"},
+            )
+            return [await _next_event(messages) for _ in range(3)]
+        finally:
+            await messages.aclose()
+
+    inserted, rented, paid = anyio.run(listen)
+    # The rental itself is not on a subscribed topic
+    assert (inserted["event"], inserted["entity"], inserted["op"]) == ("cars", "car", "insert")
+    assert (rented["id"], rented["op"], rented["snapshot"]["status"]) == (inserted["id"], "update", "rented")
+    assert (paid["event"], paid["entity"], paid["op"]) == ("payments", "rental_payment", "insert")
+    assert paid["snapshot"]["amount"] == 40.0
+    assert inserted["seq"] < rented["seq"] < paid["seq"]
+
+
+def test_event_stream_replays_changes_after_last_event_id(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    since = client.get(f"{settings.API_V1_STR}/changes/", headers=superuser_token_headers).json()[
+        "next_since"
+    ]
+    create_random_renter(db)
+    car = create_random_car(db)
+
+    async def reconnect() -> dict[str, Any]:
+        messages = events.stream(
+            engine=engine, topics={"cars"}, last_event_id=since, is_disconnected=_connected
+        )
+        try:
+            await messages.__anext__()
+            return await _next_event(messages)
+        finally:
+            await messages.aclose()
+
+    missed = anyio.run(reconnect)
+    assert (missed["entity"], missed["id"], missed["op"]) == ("car", str(car.id), "insert")
+    assert missed["seq"] > since
+
+    response = client.get(
+        f"{settings.API_V1_STR}/events/stream",
+        headers=superuser_token_headers,
+        params={"topics": "cars,boats"},
+    )
+    assert response.status_code == 400
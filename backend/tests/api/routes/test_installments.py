@@ -0,0 +1,189 @@
+import uuid
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import get_ny_time
+from tests.utils.rental import (
+    create_random_car,
+    create_random_plate,
+    create_random_renter,
+)
+
+
+def test_create_rental_generates_installments(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(renter.id),
+        "start_date": "2026-01-01",
+        "end_date": "2026-01-29",
+        "total_amount": 400.0,
+        "frequency": "weekly",
+    }
+    response = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 200
+    rental = response.json()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/installments",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 4
+    assert [i["due_date"] for i in content["data"]] == [
+        "2026-01-01",
+        "2026-01-08",
+        "2026-01-15",
+        "2026-01-22",
+    ]
+    assert all(i["amount"] == 100.0 for i in content["data"])
+    assert all(i["renter_id"] == str(renter.id) for i in content["data"])
+
+
+def test_read_installments_of_unknown_contract(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    for path in ("rentals", "leases"):
+        response = client.get(
+            f"{settings.API_V1_STR}/{path}/{uuid.uuid4()}/installments",
+            headers=superuser_token_headers,
+        )
+        assert response.status_code == 404
+
+
+def test_pay_rental_allocates_to_installments(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(renter.id),
+        "start_date": "2026-01-01",
+        "end_date": "2026-01-22",
+        "total_amount": 300.0,
+        "frequency": "weekly",
+    }
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    ).json()
+    response = client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 150.0, "payment_date": "2026-01-02"},
+    )
+    assert response.status_code == 200
+
+    content = client.get(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/installments",
+        headers=superuser_token_headers,
+    ).json()
+    assert [i["status"] for i in content["data"]] == ["paid", "partial", "unpaid"]
+    assert [i["paid_amount"] for i in content["data"]] == [100.0, 50.0, 0.0]
+
+
+def test_pay_rental_settles_exactly_in_cents(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(renter.id),
+        "start_date": "2026-01-01",
+        "total_amount": 0.3,
+        "frequency": "weekly",
+    }
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    ).json()
+    for _ in range(3):
+        response = client.post(
+            f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+            headers=superuser_token_headers,
+            json={"amount": 0.1, "payment_date": "2026-01-02"},
+        )
+        assert response.status_code == 200
+    content = response.json()
+    assert content["paid_amount"] == 0.3
+    assert content["remaining_amount"] == 0.0
+    assert content["payment_status"] == "paid"
+
+    response = client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 0.01, "payment_date": "2026-01-02"},
+    )
+    assert response.status_code == 400
+
+
+def test_update_lease_regenerates_installments(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    plate = create_random_plate(db)
+    renter = create_random_renter(db)
+    data = {
+        "plate_id": str(plate.id),
+        "renter_id": str(renter.id),
+        "start_date": "2026-01-01",
+        "end_date": "2026-03-01",
+        "total_amount": 200.0,
+        "frequency": "monthly",
+    }
+    lease = client.post(
+        f"{settings.API_V1_STR}/leases/", headers=superuser_token_headers, json=data
+    ).json()
+    response = client.put(
+        f"{settings.API_V1_STR}/leases/{lease['id']}",
+        headers=superuser_token_headers,
+        json={"end_date": "2026-05-01"},
+    )
+    assert response.status_code == 200
+
+    content = client.get(
+        f"{settings.API_V1_STR}/leases/{lease['id']}/installments",
+        headers=superuser_token_headers,
+    ).json()
+    assert content["count"] == 4
+    assert all(i["amount"] == 50.0 for i in content["data"])
+
+
+def test_read_overdue_installments(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    today = get_ny_time().date()
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(renter.id),
+        "start_date": str(today - timedelta(days=14)),
+        "end_date": str(today + timedelta(days=7)),
+        "total_amount": 300.0,
+        "frequency": "weekly",
+    }
+    client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/installments/overdue",
+        params={"limit": 1000},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    overdue = [
+        i for i in response.json()["data"] if i["renter_id"] == str(renter.id)
+    ]
+    assert len(overdue) == 2
+    assert all(date.fromisoformat(i["due_date"]) < today for i in overdue)
+    assert overdue[0]["renter_name"] == renter.full_name
@@ -0,0 +1,65 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from tests.utils.rental import create_random_plate, create_random_renter
+
+
+def test_create_lease_rejects_second_active_lease(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    plate = create_random_plate(db)
+    data = {
+        "plate_id": str(plate.id),
+        "renter_id": str(create_random_renter(db).id),
+        "start_date": "2026-01-01",
+        "total_amount": 100.0,
+    }
+    response = client.post(
+        f"{settings.API_V1_STR}/leases/", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"{settings.API_V1_STR}/leases/", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Plate already has an active lease"
+
+
+def test_plate_points_at_current_lease(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    plate = create_random_plate(db)
+    renter = create_random_renter(db)
+    data = {
+        "plate_id": str(plate.id),
+        "renter_id": str(renter.id),
+        "start_date": "2026-01-01",
+        "total_amount": 100.0,
+    }
+    lease = client.post(
+        f"{settings.API_V1_STR}/leases/", headers=superuser_token_headers, json=data
+    ).json()
+
+    def read_plate() -> dict[str, Any]:
+        response = client.get(
+            f"{settings.API_V1_STR}/plates/",
+            headers=superuser_token_headers,
+            params={"plate_number": plate.plate_number},
+        )
+        (data,) = response.json()["data"]
+        return data
+
+    current = read_plate()
+    assert current["status"] == "rented"
+    assert current["current_lease_id"] == lease["id"]
+    assert current["current_renter_name"] == renter.full_name
+    assert current["current_remaining_amount"] == 100.0
+
+    client.delete(f"{settings.API_V1_STR}/leases/{lease['id']}", headers=superuser_token_headers)
+    current = read_plate()
+    assert current["status"] == "available"
+    assert current["current_lease_id"] is None
@@ -0,0 +1,120 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from tests.utils.rental import (
+    create_random_car,
+    create_random_plate,
+    create_random_renter,
+)
+
+
+def _pay(client: TestClient, headers: dict[str, str], url: str, amount: float, day: str) -> None:
+    response = client.post(
+        f"{url}/pay", headers=headers, json={"amount": amount, "payment_date": day}
+    )
+    assert response.status_code == 200
+
+
+def test_payment_journal(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    renter = create_random_renter(db)
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        json={
+            "car_id": str(create_random_car(db).id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+    lease = client.post(
+        f"{settings.API_V1_STR}/leases/",
+        headers=superuser_token_headers,
+        json={
+            "plate_id": str(create_random_plate(db).id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+    rental_url = f"{settings.API_V1_STR}/rentals/{rental['id']}"
+    lease_url = f"{settings.API_V1_STR}/leases/{lease['id']}"
+    _pay(client, superuser_token_headers, rental_url, 10.0, "2026-01-05")
+    _pay(client, superuser_token_headers, lease_url, 20.0, "2026-01-03")
+    _pay(client, superuser_token_headers, rental_url, 30.0, "2026-01-04")
+    _pay(client, superuser_token_headers, lease_url, 40.5, "2026-01-06")
+
+    entries = []
+    params: dict[str, str | int] = {"renter_id": str(renter.id), "limit": 3}
+    while True:
+        page = client.get(
+            f"{settings.API_V1_STR}/payments/", headers=superuser_token_headers, params=params
+        ).json()
+        entries.extend(page["data"])
+        if not page["next_cursor"]:
+            break
+        params["cursor"] = page["next_cursor"]
+    assert [(entry["contract_type"], entry["payment_date"]) for entry in entries] == [
+        ("lease", "2026-01-03"),
+        ("rental", "2026-01-04"),
+        ("rental", "2026-01-05"),
+        ("lease", "2026-01-06"),
+    ]
+    assert [entry["running_total"] for entry in entries] == [20.0, 50.0, 60.0, 100.5]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/payments/",
+        headers=superuser_token_headers,
+        params={
+            "renter_id": str(renter.id),
+            "contract_type": "rental",
+            "payment_date_from": "2026-01-05",
+        },
+    )
+    assert [entry["amount"] for entry in response.json()["data"]] == [10.0]
+
+    response = client.get(
+        f"{rental_url}/payments", headers=superuser_token_headers, params={"amount_min": 20}
+    )
+    assert [payment["amount"] for payment in response.json()["data"]] == [30.0]
+
+
+def test_read_rentals_date_range(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": "Sienna", "year": 2021},
+    ).json()
+    for start_date in ("2025-03-01", "2025-06-01"):
+        rental = client.post(
+            f"{settings.API_V1_STR}/rentals/",
+            headers=superuser_token_headers,
+            json={
+                "car_id": car["id"],
+                "renter_id": str(create_random_renter(db).id),
+                "start_date": start_date,
+                "total_amount": 100.0,
+            },
+        ).json()
+        client.post(
+            f"{settings.API_V1_STR}/rentals/{rental['id']}/freeze",
+            headers=superuser_token_headers,
+        )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        params={
+            "car_id": car["car_id"],
+            "start_date_from": "2025-05-01",
+            "start_date_to": "2025-06-30",
+        },
+    )
+    content = response.json()
+    assert content["count"] == 1
+    assert content["data"][0]["start_date"] == "2025-06-01"
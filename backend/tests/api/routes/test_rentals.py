@@ -0,0 +1,183 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import CarRental, Installment, RentalPayment
+from tests.utils.rental import create_random_car, create_random_renter
+
+
+def test_create_rental_rejects_second_active_rental(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(create_random_renter(db).id),
+        "start_date": "2026-01-01",
+        "total_amount": 100.0,
+    }
+    first = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    )
+    assert first.status_code == 200
+
+    data["renter_id"] = str(create_random_renter(db).id)
+    response = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Car already has an active rental"
+
+    # Once the first rental is frozen the car can be rented again
+    client.post(
+        f"{settings.API_V1_STR}/rentals/{first.json()['id']}/freeze",
+        headers=superuser_token_headers,
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 200
+
+
+def test_delete_renter_cascades_in_database(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    renter_id = create_random_renter(db).id
+    data = {
+        "car_id": str(create_random_car(db).id),
+        "renter_id": str(renter_id),
+        "start_date": "2026-01-01",
+        "end_date": "2026-02-01",
+        "frequency": "weekly",
+        "total_amount": 500.0,
+    }
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    ).json()
+    client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 100.0, "payment_date": "2026-01-01"},
+    )
+
+    deletes: list[str] = []
+
+    def record(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        if statement.startswith("DELETE"):
+            deletes.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.delete(
+            f"{settings.API_V1_STR}/renters/{renter_id}", headers=superuser_token_headers
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    # The renter row only; rentals, payments and installments cascade in the
+    # database. Derived tables (aging snapshot, search index) are rewritten.
+    assert [d for d in deletes if "agingsnapshot" not in d and "searchentry" not in d] == [
+        "DELETE FROM renter WHERE renter.id = ?"
+    ]
+
+    db.expire_all()
+    assert db.get(CarRental, rental["id"]) is None
+    assert not db.exec(select(RentalPayment).where(RentalPayment.rental_id == rental["id"])).all()
+    assert not db.exec(select(Installment).where(Installment.renter_id == renter_id)).all()
+
+
+def test_car_points_at_current_rental(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(renter.id),
+        "start_date": "2026-01-01",
+        "total_amount": 100.0,
+    }
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, json=data
+    ).json()
+    client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 40.0, "payment_date": "2026-01-02"},
+    )
+
+    def read_car() -> dict[str, Any]:
+        response = client.get(
+            f"{settings.API_V1_STR}/cars/",
+            headers=superuser_token_headers,
+            params={"plate_number": car.plate_number},
+        )
+        (data,) = response.json()["data"]
+        return data
+
+    current = read_car()
+    assert current["status"] == "rented"
+    assert current["current_rental_id"] == rental["id"]
+    assert current["current_renter_id"] == str(renter.id)
+    assert current["current_renter_name"] == renter.full_name
+    assert current["current_remaining_amount"] == 60.0
+
+    client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 60.0, "payment_date": "2026-01-03"},
+    )
+    current = read_car()
+    assert current["status"] == "available"
+    assert current["current_rental_id"] is None
+    assert current["current_renter_name"] is None
+
+
+def test_read_rentals_facets(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": "Sienna", "year": 2021},
+    ).json()
+    for rental_type in ("lease", "lease_to_own"):
+        rental = client.post(
+            f"{settings.API_V1_STR}/rentals/",
+            headers=superuser_token_headers,
+            json={
+                "car_id": car["id"],
+                "renter_id": str(create_random_renter(db).id),
+                "start_date": "2026-01-01",
+                "total_amount": 100.0,
+                "rental_type": rental_type,
+            },
+        ).json()
+        if rental_type == "lease":
+            client.post(
+                f"{settings.API_V1_STR}/rentals/{rental['id']}/freeze",
+                headers=superuser_token_headers,
+            )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        params={"car_id": car["car_id"], "facets": "payment_status,rental_type"},
+    )
+    content = response.json()
+    assert content["count"] == 2
+    assert content["facets"] == {
+        "payment_status": {"cancel": 1, "unpaid": 1},
+        "rental_type": {"lease": 1, "lease_to_own": 1},
+    }
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        params={"facets": "renter_id"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,53 @@
+import random
+import string
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.api import listing
+from app.core.config import settings
+from app.models import Renter
+
+
+def test_renter_lookup_ignores_phone_and_license_formatting(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    digits = "".join(random.choices(string.digits, k=7))
+    license_number = "".join(random.choices(string.ascii_uppercase + string.digits, k=9))
+    renter = client.post(
+        f"{settings.API_V1_STR}/renters/",
+        headers=superuser_token_headers,
+        json={
+            "full_name": "Jane Formatted",
+            "phone": f"+1 (646) {digits[:3]}-{digits[3:]}",
+            "driver_license_number": f"{license_number[:3]}-{license_number[3:6]} {license_number[6:]}".lower(),
+        },
+    ).json()
+
+    def lookup(**params: str) -> list[str]:
+        response = client.get(
+            f"{settings.API_V1_STR}/renters/", headers=superuser_token_headers, params=params
+        )
+        assert response.status_code == 200
+        return [row["id"] for row in response.json()["data"]]
+
+    assert lookup(phone=f"646{digits}") == [renter["id"]]
+    assert renter["id"] in lookup(phone="(646) " + digits[:2])
+    assert lookup(driver_license_number=license_number) == [renter["id"]]
+    assert lookup(search=f"646-{digits[:3]}-{digits[3:]}") == [renter["id"]]
+
+    # Updating the phone moves the lookup with it
+    client.put(
+        f"{settings.API_V1_STR}/renters/{renter['id']}",
+        headers=superuser_token_headers,
+        json={"phone": f"917.{digits[:3]}.{digits[3:]}"},
+    )
+    assert lookup(phone=f"646{digits}") == []
+    assert lookup(phone=f"917{digits}") == [renter["id"]]
+
+
+def test_renter_lookup_is_served_by_index(db: Session) -> None:
+    statement = select(Renter).where(*listing.prefix_filter(Renter.phone_normalized, "646"))
+    sql = str(statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+    assert "ix_renter_phone_normalized" in plan
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import reports
+from app.core.config import settings
+from app.models import AgingSnapshot, get_ny_time
+from tests.utils.rental import create_random_car, create_random_renter
+
+
+def _create_overdue_rental(
+    client: TestClient, headers: dict[str, str], db: Session
+) -> dict[str, str]:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    today = get_ny_time().date()
+    data = {
+        "car_id": str(car.id),
+        "renter_id": str(renter.id),
+        "start_date": str(today - timedelta(weeks=6)),
+        "end_date": str(today + timedelta(weeks=2)),
+        "total_amount": 800.0,
+        "frequency": "weekly",
+    }
+    response = client.post(f"{settings.API_V1_STR}/rentals/", headers=headers, json=data)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_aging_report_buckets(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    rental = _create_overdue_rental(client, superuser_token_headers, db)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/reports/aging",
+        params={"limit": 1000},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    rows = {row["renter_id"]: row for row in response.json()["data"]}
+    row = rows[rental["renter_id"]]
+    # 8 weekly installments of 100: 6 past due (42, 35, ... 7 days), 2 current
+    assert row["current_amount"] == 200.0
+    assert row["days_1_30"] == 400.0
+    assert row["days_31_60"] == 200.0
+    assert row["overdue_amount"] == 600.0
+    assert row["total_amount"] == 800.0
+    assert row["renter_name"] is not None
+
+
+def test_aging_report_updated_by_payment(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    rental = _create_overdue_rental(client, superuser_token_headers, db)
+    response = client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/pay",
+        headers=superuser_token_headers,
+        json={"amount": 250.0, "payment_date": str(get_ny_time().date())},
+    )
+    assert response.status_code == 200
+
+    snapshot = db.get(AgingSnapshot, rental["renter_id"])
+    assert snapshot
+    db.refresh(snapshot)
+    assert snapshot.days_31_60 == 0.0
+    assert snapshot.days_1_30 == 350.0
+    assert snapshot.total_amount == 550.0
+
+
+def test_rebuild_aging_snapshot(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    rental = _create_overdue_rental(client, superuser_token_headers, db)
+    count = reports.rebuild_aging_snapshot(session=db)
+    assert count >= 1
+    snapshot = db.get(AgingSnapshot, rental["renter_id"])
+    assert snapshot
+    assert snapshot.total_amount == 800.0
@@ -0,0 +1,94 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api import compression, responses
+from app.core.config import settings
+from tests.utils.rental import create_random_car
+
+
+def _read_cars(
+    client: TestClient, headers: dict[str, str], **extra: str
+) -> tuple[dict[str, str], bytes]:
+    # stream() leaves the body as sent, so the content coding can be checked
+    with client.stream(
+        "GET",
+        f"{settings.API_V1_STR}/cars/",
+        headers={**headers, **extra},
+        params={"limit": 1000},
+    ) as response:
+        assert response.status_code == 200
+        return dict(response.headers), b"".join(response.iter_raw())
+
+
+@pytest.fixture(autouse=True)
+def cars(db: Session) -> None:
+    for _ in range(3):
+        create_random_car(db)
+
+
+def test_brotli_is_preferred_when_installed(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    brotli = pytest.importorskip("brotli")
+    headers, body = _read_cars(
+        client, superuser_token_headers, **{"Accept-Encoding": "gzip, br"}
+    )
+    assert headers["content-encoding"] == "br"
+    assert json.loads(brotli.decompress(body))["count"] >= 3
+
+
+def test_gzip_is_used_without_brotli(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(compression, "brotli", None)
+    headers, body = _read_cars(
+        client, superuser_token_headers, **{"Accept-Encoding": "gzip, br"}
+    )
+    assert headers["content-encoding"] == "gzip"
+    assert json.loads(gzip.decompress(body))["count"] >= 3
+    headers, _ = _read_cars(
+        client, superuser_token_headers, **{"Accept-Encoding": "br"}
+    )
+    assert "content-encoding" not in headers
+
+
+def test_msgpack_is_negotiated_when_installed(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    msgpack = pytest.importorskip("msgpack")
+    plain = {"Accept-Encoding": "identity"}
+    json_headers, json_body = _read_cars(client, superuser_token_headers, **plain)
+    headers, body = _read_cars(
+        client, superuser_token_headers, **plain, Accept=responses.MSGPACK
+    )
+    assert headers["content-type"] == responses.MSGPACK
+    assert headers["etag"] != json_headers["etag"]
+    assert msgpack.unpackb(body) == json.loads(json_body)
+
+
+def test_json_is_sent_without_msgpack(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(responses, "msgpack", None)
+    headers, body = _read_cars(
+        client,
+        superuser_token_headers,
+        **{"Accept-Encoding": "identity", "Accept": responses.MSGPACK},
+    )
+    assert headers["content-type"] == responses.JSON
+    assert json.loads(body)["count"] >= 3
+
+
+def test_fast_json_response_without_orjson(monkeypatch: pytest.MonkeyPatch) -> None:
+    content = {"amount": 1.5, "name": "Jane", "ids": [1, 2]}
+    rendered = responses.FastJSONResponse(content).body
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.FastJSONResponse(content).body) == json.loads(rendered)
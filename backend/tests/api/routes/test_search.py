@@ -0,0 +1,123 @@
+from pathlib import Path
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app import search_index
+from app.core.config import settings
+from app.models import Car, SearchEntry
+from tests.utils.rental import create_random_car, create_random_renter
+from tests.utils.utils import random_lower_string
+
+
+def _search(client: TestClient, headers: dict[str, str], q: str) -> list[dict[str, Any]]:
+    response = client.get(f"{settings.API_V1_STR}/search/", headers=headers, params={"q": q})
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_search_ranks_hits_across_entities(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    last_name = random_lower_string()[:10]
+    renter.full_name = f"Jane {last_name}"
+    db.add(renter)
+    db.commit()
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        json={
+            "car_id": str(car.id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+
+    hits = _search(client, superuser_token_headers, car.plate_number.lower())
+    assert (hits[0]["type"], hits[0]["id"]) == ("car", str(car.id))
+    assert hits[0]["status"] == "rented"
+    assert hits[0]["subtitle"] == "2022 Toyota Camry"
+    assert ("rental", rental["id"]) in [(hit["type"], hit["id"]) for hit in hits]
+
+    # A last name is a key prefix: the renter comes before their contracts
+    hits = _search(client, superuser_token_headers, last_name.upper())
+    assert [(hit["type"], hit["id"]) for hit in hits] == [
+        ("renter", str(renter.id)),
+        ("rental", rental["id"]),
+    ]
+    assert hits[1]["title"] == renter.full_name
+
+    hits = _search(client, superuser_token_headers, renter.phone[3:8])
+    assert [hit["id"] for hit in hits if hit["type"] == "renter"] == [str(renter.id)]
+    assert hits[0]["matched"] == renter.phone
+
+
+def test_search_index_follows_writes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        json={
+            "car_id": str(car.id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+
+    new_name = random_lower_string()
+    client.put(
+        f"{settings.API_V1_STR}/renters/{renter.id}",
+        headers=superuser_token_headers,
+        json={"full_name": new_name},
+    )
+    assert _search(client, superuser_token_headers, renter.full_name) == []
+    hits = _search(client, superuser_token_headers, new_name)
+    assert {hit["type"] for hit in hits} == {"renter", "rental"}
+    assert all(hit["title"] == new_name for hit in hits)
+
+    # Deleting the car takes its rental with it, in the database and the index
+    client.delete(f"{settings.API_V1_STR}/cars/{car.id}", headers=superuser_token_headers)
+    hits = _search(client, superuser_token_headers, new_name)
+    assert [hit["type"] for hit in hits] == ["renter"]
+    db.expire_all()
+    entries = db.exec(select(SearchEntry).where(SearchEntry.ref_id == rental["id"])).all()
+    assert entries == []
+
+
+def test_search_is_served_by_indexes(db: Session) -> None:
+    def plan(sql: str) -> str:
+        return " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+    assert "ix_searchentry_key" in plan("SELECT * FROM searchentry WHERE key >= 't12' AND key < 't13'")
+    assert "VIRTUAL TABLE" in plan(
+        f"SELECT rowid FROM {search_index.FTS_TABLE} WHERE {search_index.FTS_TABLE} MATCH '\"t12\"'"
+    )
+
+
+def test_create_all_builds_the_search_index_of_existing_rows(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Car(model="Sienna", year=2021, plate_number="XK4821"))
+        session.commit()
+        # A database whose tables predate the index
+        connection = session.connection()
+        connection.exec_driver_sql("DELETE FROM searchentry")
+        connection.exec_driver_sql(f"DROP TABLE {search_index.FTS_TABLE}")
+        for action in ("insert", "delete", "update"):
+            connection.exec_driver_sql(f"DROP TRIGGER searchentry_fts_{action}")
+        session.commit()
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        hits = search_index.search(session=session, q="k482")
+        assert [(hit.type, hit.title) for hit in hits] == [("car", "XK4821")]
+    engine.dispose()
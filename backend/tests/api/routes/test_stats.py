@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import status_counts
+from app.core.config import settings
+from tests.utils.rental import create_random_car, create_random_renter
+
+
+def _counts(client: TestClient, headers: dict[str, str]) -> dict[tuple[str, str, str], int]:
+    response = client.get(f"{settings.API_V1_STR}/stats/counts", headers=headers)
+    assert response.status_code == 200
+    return {
+        (row["entity"], row["field"], row["value"]): row["count"]
+        for row in response.json()["data"]
+    }
+
+
+def test_status_counts_follow_status_changes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    before = _counts(client, superuser_token_headers)
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    rental = client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        json={
+            "car_id": str(car.id),
+            "renter_id": str(renter.id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+
+    def change(key: tuple[str, str, str]) -> int:
+        return _counts(client, superuser_token_headers).get(key, 0) - before.get(key, 0)
+
+    assert change(("car", "status", "rented")) == 1
+    assert change(("car", "status", "available")) == 0
+    assert change(("carrental", "payment_status", "unpaid")) == 1
+
+    client.post(
+        f"{settings.API_V1_STR}/rentals/{rental['id']}/freeze", headers=superuser_token_headers
+    )
+    assert change(("car", "status", "rented")) == 0
+    assert change(("car", "status", "available")) == 1
+    assert change(("carrental", "payment_status", "unpaid")) == 0
+    assert change(("carrental", "payment_status", "cancel")) == 1
+
+    # The rental goes with its renter through ON DELETE CASCADE
+    client.delete(f"{settings.API_V1_STR}/renters/{renter.id}", headers=superuser_token_headers)
+    assert change(("carrental", "payment_status", "cancel")) == 0
+    assert change(("carrental", "status", "active")) == 0
+
+
+def test_verify_rebuilds_status_counts(db: Session) -> None:
+    status_counts.verify(session=db, rebuild=True)
+    assert status_counts.verify(session=db) == 0
@@ -0,0 +1,68 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Car
+from tests.utils.rental import random_plate_number
+from tests.utils.utils import random_lower_string
+
+
+def _suggest(client: TestClient, headers: dict[str, str], field: str, prefix: str) -> list[str]:
+    response = client.get(
+        f"{settings.API_V1_STR}/suggest/{field}", headers=headers, params={"prefix": prefix}
+    )
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_suggestions_follow_committed_writes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    model = "Zq" + random_lower_string()[:8]
+    car = client.post(
+        f"{settings.API_V1_STR}/cars/",
+        headers=superuser_token_headers,
+        json={"model": model, "year": 2021, "plate_number": random_plate_number()},
+    ).json()
+    assert _suggest(client, superuser_token_headers, "model", model[:4].upper()) == [model]
+
+    # Rolled back writes are not suggested
+    db.add(Car(model=model + "x", year=2021, plate_number=random_plate_number()))
+    db.flush()
+    db.rollback()
+    assert _suggest(client, superuser_token_headers, "model", model) == [model]
+
+    renamed = model + " Hybrid"
+    client.put(
+        f"{settings.API_V1_STR}/cars/{car['id']}",
+        headers=superuser_token_headers,
+        json={"model": renamed},
+    )
+    assert _suggest(client, superuser_token_headers, "model", model) == [renamed]
+    client.delete(f"{settings.API_V1_STR}/cars/{car['id']}", headers=superuser_token_headers)
+    assert _suggest(client, superuser_token_headers, "model", model) == []
+
+
+def test_suggestions_do_not_query_the_database(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    statements: list[str] = []
+
+    def record(_conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        statements.append(statement)
+
+    _suggest(client, superuser_token_headers, "full_name", "a")
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        _suggest(client, superuser_token_headers, "full_name", "a")
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # Only the current user lookup of the token check
+    assert all("FROM user" in statement for statement in statements)
+
+    response = client.get(f"{settings.API_V1_STR}/suggest/notes", headers=superuser_token_headers)
+    assert response.status_code == 404
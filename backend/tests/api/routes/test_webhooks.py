@@ -0,0 +1,145 @@
+import hmac
+import json
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app import webhooks
+from app.core.config import settings
+from app.models import WebhookDelivery, get_ny_time
+from tests.utils.rental import create_random_car, create_random_renter
+from tests.utils.webhook import webhook_receiver
+
+
+def _create_rental(client: TestClient, headers: dict[str, str], db: Session) -> dict[str, Any]:
+    return client.post(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=headers,
+        json={
+            "car_id": str(create_random_car(db).id),
+            "renter_id": str(create_random_renter(db).id),
+            "start_date": "2026-01-01",
+            "total_amount": 100.0,
+        },
+    ).json()
+
+
+def _wait_until(condition: Callable[[], Any], timeout: float = 5) -> Any:
+    deadline = time.monotonic() + timeout
+    while not (result := condition()):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    return result
+
+
+def test_webhooks_deliver_signed_contract_events(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    secret = "s3cret-for-the-accounting-system"
+    with webhook_receiver() as receiver:
+        response = client.post(
+            f"{settings.API_V1_STR}/webhooks/",
+            headers=superuser_token_headers,
+            json={
+                "url": receiver.url,
+                "events": ["payment.posted", "rental.paid_off", "rental.frozen"],
+                "secret": secret,
+            },
+        )
+        assert response.status_code == 200
+        webhook = response.json()
+        assert webhook["secret"] == secret
+
+        paid = _create_rental(client, superuser_token_headers, db)
+        for amount in (40.0, 60.0):
+            client.post(
+                f"{settings.API_V1_STR}/rentals/{paid['id']}/pay",
+                headers=superuser_token_headers,
+                json={"amount": amount, "payment_date": "2026-01-05"},
+            )
+        frozen = _create_rental(client, superuser_token_headers, db)
+        client.post(f"{settings.API_V1_STR}/rentals/{frozen['id']}/freeze", headers=superuser_token_headers)
+
+        requests = receiver.wait_for(4)
+        bodies = []
+        for headers, body in requests:
+            expected = webhooks.sign(secret, int(headers["X-Webhook-Timestamp"]), body)
+            assert hmac.compare_digest(headers["X-Webhook-Signature"], expected)
+            bodies.append(json.loads(body))
+        bodies.sort(key=lambda body: body["id"])
+        assert [body["event"] for body in bodies] == [
+            "payment.posted",
+            "payment.posted",
+            "rental.paid_off",
+            "rental.frozen",
+        ]
+        assert bodies[0]["data"]["payment"]["amount"] == 40.0
+        assert bodies[0]["data"]["rental"]["remaining_amount"] == 60.0
+        assert bodies[2]["data"]["rental"]["id"] == paid["id"]
+        assert bodies[2]["data"]["rental"]["payment_status"] == "paid"
+        assert bodies[3]["data"]["rental"]["id"] == frozen["id"]
+
+        def delivered() -> bool:
+            response = client.get(
+                f"{settings.API_V1_STR}/webhooks/{webhook['id']}/deliveries",
+                headers=superuser_token_headers,
+                params={"status": "delivered"},
+            )
+            return response.json()["count"] == 4
+
+        _wait_until(delivered)
+        client.delete(f"{settings.API_V1_STR}/webhooks/{webhook['id']}", headers=superuser_token_headers)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/webhooks/",
+        headers=superuser_token_headers,
+        json={"url": "https://example.com/hooks", "events": ["car.washed"]},
+    )
+    assert response.status_code == 400
+
+
+def test_webhooks_retry_failed_deliveries_with_backoff(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    with webhook_receiver() as receiver:
+        receiver.statuses = [500]
+        webhook = client.post(
+            f"{settings.API_V1_STR}/webhooks/",
+            headers=superuser_token_headers,
+            json={"url": receiver.url, "events": ["rental.frozen"]},
+        ).json()
+        rental = _create_rental(client, superuser_token_headers, db)
+        client.post(f"{settings.API_V1_STR}/rentals/{rental['id']}/freeze", headers=superuser_token_headers)
+        receiver.wait_for(1)
+
+        def delivery() -> WebhookDelivery | None:
+            db.expire_all()
+            return db.exec(
+                select(WebhookDelivery).where(WebhookDelivery.webhook_id == webhook["id"])
+            ).first()
+
+        failed = _wait_until(lambda: (row := delivery()) and row.last_error and row)
+        assert (failed.status, failed.attempts, failed.last_error) == ("pending", 1, "HTTP 500")
+        wait = failed.next_attempt_time - get_ny_time()
+        assert timedelta(seconds=settings.WEBHOOK_RETRY_SECONDS - 5) < wait
+        assert wait <= timedelta(seconds=settings.WEBHOOK_RETRY_SECONDS * 1.1)
+
+        # Once due, the same delivery is sent again
+        failed.next_attempt_time = get_ny_time()
+        db.add(failed)
+        db.commit()
+        webhooks.dispatcher.notify()
+        (first, _), (second, _) = receiver.wait_for(2)
+        assert first["X-Webhook-Id"] == second["X-Webhook-Id"] == str(failed.id)
+        retried = _wait_until(lambda: (row := delivery()) and row.status == "delivered" and row)
+        assert (retried.attempts, retried.response_status, retried.last_error) == (2, 204, None)
+
+        client.delete(f"{settings.API_V1_STR}/webhooks/{webhook['id']}", headers=superuser_token_headers)
+
+    base = settings.WEBHOOK_RETRY_SECONDS
+    assert timedelta(seconds=4 * base) <= webhooks.retry_delay(3) <= timedelta(seconds=4.4 * base)
+    assert webhooks.retry_delay(50) <= timedelta(seconds=1.1 * settings.WEBHOOK_RETRY_MAX_SECONDS)
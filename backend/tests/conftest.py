@@ -1,13 +1,19 @@
+import os
+import shutil
+import tempfile
 from collections.abc import Generator
+from pathlib import Path
+
+# Tests run against a scratch database, never the bundled car_rental.db
+os.environ["SQLITE_FILE"] = str(Path(tempfile.mkdtemp()) / "test.db")
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, delete
+from sqlmodel import Session
 
 from app.core.config import settings
 from app.core.db import engine, init_db
 from app.main import app
-from app.models import Item, User
 from tests.utils.user import authentication_token_from_email
 from tests.utils.utils import get_superuser_token_headers
 
@@ -17,11 +23,8 @@ def db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         init_db(session)
         yield session
-        statement = delete(Item)
-        session.execute(statement)
-        statement = delete(User)
-        session.execute(statement)
-        session.commit()
+    engine.dispose()
+    shutil.rmtree(Path(settings.SQLITE_FILE).parent, ignore_errors=True)
 
 
 @pytest.fixture(scope="module")
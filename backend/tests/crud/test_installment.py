@@ -0,0 +1,73 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import CarRental
+from tests.utils.rental import create_random_car, create_random_renter
+
+
+def test_installment_due_dates_weekly() -> None:
+    due_dates = crud.installment_due_dates(
+        start_date=date(2026, 1, 1), end_date=date(2026, 1, 29), frequency="weekly"
+    )
+    assert due_dates == [
+        date(2026, 1, 1),
+        date(2026, 1, 8),
+        date(2026, 1, 15),
+        date(2026, 1, 22),
+    ]
+
+
+def test_installment_due_dates_monthly_clamps_month_end() -> None:
+    due_dates = crud.installment_due_dates(
+        start_date=date(2026, 1, 31), end_date=date(2026, 4, 1), frequency="monthly"
+    )
+    assert due_dates == [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)]
+
+
+def test_installment_due_dates_open_ended() -> None:
+    due_dates = crud.installment_due_dates(
+        start_date=date(2026, 1, 1), end_date=None, frequency="weekly"
+    )
+    assert due_dates == [date(2026, 1, 1)]
+
+
+def test_split_amount_puts_remainder_last() -> None:
+    amounts = crud.split_amount(Decimal("100.00"), 3)
+    assert amounts == [Decimal("33.33"), Decimal("33.33"), Decimal("33.34")]
+    assert sum(amounts) == Decimal("100.00")
+
+
+def test_allocate_paid_oldest_first() -> None:
+    amounts = [Decimal("50.00")] * 3
+    assert crud.allocate_paid(amounts, Decimal("70.00")) == [
+        Decimal("50.00"),
+        Decimal("20.00"),
+        Decimal("0.00"),
+    ]
+
+
+def test_backfill_installments_schedules_contracts_without_one(db: Session) -> None:
+    rental = CarRental(
+        car_id=create_random_car(db).id,
+        renter_id=create_random_renter(db).id,
+        start_date=date(2026, 1, 1),
+        end_date=date(2026, 1, 15),
+        frequency="weekly",
+        total_amount=Decimal("100.00"),
+        paid_amount=Decimal("60.00"),
+    )
+    db.add(rental)
+    db.commit()
+    assert rental.installments == []
+
+    assert crud.backfill_installments(session=db) >= 1
+    db.refresh(rental)
+    schedule = [(i.due_date, i.amount, i.status) for i in rental.installments]
+    assert schedule == [
+        (date(2026, 1, 1), Decimal("50.00"), "paid"),
+        (date(2026, 1, 8), Decimal("50.00"), "partial"),
+    ]
+    assert crud.backfill_installments(session=db) == 0
@@ -0,0 +1,86 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.archive import archive_contracts
+from app.core.config import settings
+from app.models import (
+    CarRental,
+    CarRentalArchive,
+    RentalPayment,
+    RentalPaymentArchive,
+)
+from tests.utils.rental import create_random_car, create_random_renter
+
+
+def _create_rental(db: Session, *, payment_status: str, update_time: datetime) -> CarRental:
+    rental = CarRental(
+        car_id=create_random_car(db).id,
+        renter_id=create_random_renter(db).id,
+        start_date=date(2024, 1, 1),
+        total_amount=Decimal("100.00"),
+        paid_amount=Decimal("100.00"),
+        remaining_amount=Decimal("0.00"),
+        payment_status=payment_status,
+        update_time=update_time,
+    )
+    db.add(rental)
+    db.add(RentalPayment(rental_id=rental.id, amount=Decimal("100.00"), payment_date=date(2024, 1, 1)))
+    db.commit()
+    db.refresh(rental)
+    return rental
+
+
+def test_archive_contracts(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    old_paid = _create_rental(db, payment_status="paid", update_time=datetime(2024, 2, 1))
+    old_unpaid = _create_rental(db, payment_status="unpaid", update_time=datetime(2024, 2, 1))
+    recent_paid = _create_rental(db, payment_status="paid", update_time=datetime(2026, 9, 1))
+    old_paid_id = old_paid.id
+
+    archived = archive_contracts(
+        session=db, older_than_months=12, chunk_size=1, now=datetime(2026, 10, 1)
+    )
+    assert archived >= 1
+
+    db.expire_all()
+    assert db.get(CarRental, old_paid_id) is None
+    assert db.get(CarRental, old_unpaid.id) is not None
+    assert db.get(CarRental, recent_paid.id) is not None
+    archived_rental = db.get(CarRentalArchive, old_paid_id)
+    assert archived_rental is not None
+    assert archived_rental.archived_at == datetime(2026, 10, 1)
+    payments = db.exec(
+        select(RentalPaymentArchive).where(RentalPaymentArchive.rental_id == old_paid_id)
+    ).all()
+    assert [payment.amount for payment in payments] == [Decimal("100.00")]
+
+    params = {"payment_status": "paid", "limit": 1000}
+    hot = client.get(
+        f"{settings.API_V1_STR}/rentals/", headers=superuser_token_headers, params=params
+    ).json()
+    assert str(old_paid_id) not in [rental["id"] for rental in hot["data"]]
+    everything = client.get(
+        f"{settings.API_V1_STR}/rentals/",
+        headers=superuser_token_headers,
+        params={**params, "include_archived": True},
+    ).json()
+    assert str(old_paid_id) in [rental["id"] for rental in everything["data"]]
+    assert everything["count"] == hot["count"] + archived
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rentals/{old_paid_id}/payments",
+        headers=superuser_token_headers,
+        params={"include_archived": True},
+    )
+    assert response.json()["count"] == 1
+
+    response = client.get(
+        f"{settings.API_V1_STR}/rentals/{old_paid_id}", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["payment_status"] == "paid"
+    assert response.json()["renter_name"] is not None
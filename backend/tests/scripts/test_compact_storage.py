@@ -0,0 +1,119 @@
+import sqlite3
+from collections.abc import Generator
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.compact_storage import benchmark, convert
+from app.core.config import settings
+from app.models import Car, CarRental, Renter, set_compact_storage
+
+
+@pytest.fixture(autouse=True)
+def restore_storage() -> Generator[None, None, None]:
+    compact = settings.COMPACT_STORAGE
+    yield
+    set_compact_storage(compact)
+
+
+def _seed(path: Path) -> CarRental:
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine, expire_on_commit=False) as session:
+        renter = Renter(full_name="Jane Doe", phone="5550001111", driver_license_number="D1234567")
+        car = Car(model="Sienna", year=2021, car_id=1, status="rented")
+        rental = CarRental(
+            car_id=car.id,
+            renter_id=renter.id,
+            start_date=date(2026, 1, 1),
+            total_amount=Decimal("100.00"),
+            rental_type="lease_to_own",
+        )
+        session.add_all([renter, car, rental])
+        session.commit()
+    engine.dispose()
+    return rental
+
+
+def _read_rental(path: Path, rental: CarRental) -> CarRental:
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        stored = session.exec(
+            select(CarRental).where(
+                CarRental.id == rental.id, CarRental.payment_status == "unpaid"
+            )
+        ).one()
+        assert stored.car.status == "rented"
+        session.expunge(stored)
+    engine.dispose()
+    return stored
+
+
+def test_compact_encoding_round_trip(tmp_path: Path) -> None:
+    set_compact_storage(True)
+    path = tmp_path / "compact.db"
+    rental = _seed(path)
+
+    row = sqlite3.connect(path).execute(
+        "SELECT typeof(id), length(id), typeof(car_id), typeof(rental_type) FROM carrental"
+    ).fetchone()
+    assert row == ("blob", 16, "blob", "integer")
+
+    stored = _read_rental(path, rental)
+    assert stored.renter_id == rental.renter_id
+    assert stored.rental_type == "lease_to_own"
+
+
+def test_convert_to_compact_and_back(tmp_path: Path) -> None:
+    path = tmp_path / "text.db"
+    rental = _seed(path)
+    engine = create_engine(f"sqlite:///{path}")
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "CREATE TRIGGER car_touch AFTER UPDATE ON car "
+            "BEGIN UPDATE carrental SET update_time = NEW.update_time WHERE car_id = NEW.id; END"
+        )
+
+    def triggers() -> set[str]:
+        rows = sqlite3.connect(path).execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        return {name for (name,) in rows}
+
+    before = triggers()
+    assert "car_touch" in before
+    assert "carrental" in convert(engine=engine, compact=True)
+    assert convert(engine=engine, compact=True) == []
+    assert triggers() == before
+    (index_sql,) = sqlite3.connect(path).execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'ux_carrental_active_car_id'"
+    ).fetchone()
+    assert index_sql.endswith("WHERE status = 4 AND payment_status = 6")
+    set_compact_storage(True)
+    assert _read_rental(path, rental).rental_type == "lease_to_own"
+
+    assert "carrental" in convert(engine=engine, compact=False)
+    set_compact_storage(False)
+    row = sqlite3.connect(path).execute("SELECT id, rental_type FROM carrental").fetchone()
+    assert row == (str(rental.id), "lease_to_own")
+    assert _read_rental(path, rental).rental_type == "lease_to_own"
+    engine.dispose()
+
+
+def test_statements_are_cached_per_encoding() -> None:
+    def cache_key() -> object:
+        return select(CarRental).where(CarRental.status == "active")._generate_cache_key()
+
+    set_compact_storage(False)
+    text = cache_key()
+    set_compact_storage(True)
+    assert cache_key() != text
+    set_compact_storage(False)
+    assert cache_key() == text
+
+
+def test_benchmark_seeds_both_encodings(tmp_path: Path) -> None:
+    results = benchmark(payments=200, rentals=30, directory=tmp_path)
+    assert set(results) == {"text", "compact"}
+    assert results["compact"]["table_bytes"] <= results["text"]["table_bytes"]
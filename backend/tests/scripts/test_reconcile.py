@@ -0,0 +1,54 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app import crud
+from app.models import CarRental, RentalPayment
+from app.reconcile import find_drift, reconcile
+from tests.utils.rental import create_random_car, create_random_renter
+
+
+def _create_drifted_rental(db: Session) -> CarRental:
+    car = create_random_car(db)
+    renter = create_random_renter(db)
+    rental = CarRental(
+        car_id=car.id,
+        renter_id=renter.id,
+        start_date=date(2026, 1, 1),
+        end_date=date(2026, 1, 15),
+        frequency="weekly",
+        total_amount=Decimal("200.00"),
+        # Payments below add up to 150, not 50
+        paid_amount=Decimal("50.00"),
+        remaining_amount=Decimal("150.00"),
+    )
+    db.add(rental)
+    db.add(RentalPayment(rental_id=rental.id, amount=Decimal("100.00"), payment_date=date(2026, 1, 1)))
+    db.add(RentalPayment(rental_id=rental.id, amount=Decimal("50.00"), payment_date=date(2026, 1, 8)))
+    crud.sync_installments(session=db, contract=rental, regenerate=True)
+    db.commit()
+    db.refresh(rental)
+    return rental
+
+
+def test_find_drift(db: Session) -> None:
+    rental = _create_drifted_rental(db)
+    drifts = {drift.id: drift for drift in find_drift(session=db, contract_type="rental")}
+    drift = drifts[rental.id]
+    assert drift.recorded_paid == Decimal("50.00")
+    assert drift.actual_paid == Decimal("150.00")
+    assert drift.expected_remaining == Decimal("50.00")
+    assert drift.expected_status == "unpaid"
+
+
+def test_reconcile_repair(db: Session) -> None:
+    rental = _create_drifted_rental(db)
+    assert reconcile(session=db, repair=True, chunk_size=1) >= 1
+
+    db.refresh(rental)
+    assert rental.paid_amount == Decimal("150.00")
+    assert rental.remaining_amount == Decimal("50.00")
+    assert [i.status for i in rental.installments] == ["paid", "partial"]
+    drifts = [drift.id for drift in find_drift(session=db, contract_type="rental")]
+    assert rental.id not in drifts
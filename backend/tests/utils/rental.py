@@ -0,0 +1,44 @@
+import random
+import string
+from datetime import date
+
+from sqlmodel import Session
+
+from app.models import Car, LicensePlate, Renter
+from tests.utils.utils import random_lower_string
+
+
+def random_plate_number() -> str:
+    return "T" + "".join(random.choices(string.digits, k=7))
+
+
+def create_random_renter(db: Session) -> Renter:
+    renter = Renter(
+        full_name=random_lower_string(),
+        phone="718" + "".join(random.choices(string.digits, k=7)),
+        driver_license_number=random_lower_string()[:12].upper(),
+    )
+    db.add(renter)
+    db.commit()
+    db.refresh(renter)
+    return renter
+
+
+def create_random_car(db: Session) -> Car:
+    car = Car(model="Toyota Camry", year=2022, plate_number=random_plate_number())
+    db.add(car)
+    db.commit()
+    db.refresh(car)
+    return car
+
+
+def create_random_plate(db: Session) -> LicensePlate:
+    plate = LicensePlate(
+        plate_number=random_plate_number(),
+        purchase_date=date(2025, 1, 1),
+        purchase_amount=1000.0,
+    )
+    db.add(plate)
+    db.commit()
+    db.refresh(plate)
+    return plate
@@ -0,0 +1,49 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class WebhookReceiver:
+    """Local stand-in for a webhook endpoint, recording the requests it gets."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.requests: list[tuple[dict[str, str], bytes]] = []
+        # Response statuses to answer with, in order; 204 once used up
+        self.statuses: list[int] = []
+        self.received = threading.Condition()
+
+    def wait_for(self, count: int, timeout: float = 5) -> list[tuple[dict[str, str], bytes]]:
+        with self.received:
+            assert self.received.wait_for(lambda: len(self.requests) >= count, timeout)
+            return list(self.requests)
+
+
+@contextmanager
+def webhook_receiver() -> Iterator[WebhookReceiver]:
+    receiver: WebhookReceiver
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            with receiver.received:
+                status = receiver.statuses.pop(0) if receiver.statuses else 204
+                receiver.requests.append((dict(self.headers), body))
+                receiver.received.notify_all()
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    receiver = WebhookReceiver(f"http://127.0.0.1:{server.server_address[1]}/hooks")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield receiver
+    finally:
+        server.shutdown()
+        server.server_close()